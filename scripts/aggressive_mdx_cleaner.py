@@ -8,27 +8,34 @@ This script aggressively fixes all MDX formatting issues with a clean slate appr
 import os
 import re
 from pathlib import Path
-import frontmatter
+from typing import List
+
+from build_manifest import BuildManifest, module_rule_files
+from frontmatter_io import dumps_post, load_post
+from mdx_blocks import HEADING, Block, BlockBuilder, parse_blocks, render_blocks
+from output_writer import OutputWriter
+from term_matcher import TermMatcher
+
+THEOLOGICAL_TERMS = TermMatcher([
+    'missiological', 'missional', 'incarnational', 'ecclesiological',
+    'Christendom', 'post-Christendom', 'multiplication', 'APEST',
+    'trinitarian'
+])
+
+FOREIGN_TERMS = TermMatcher(['shelach', 'eskénosen', 'missio Dei'], ignore_case=False, whole_words=False)
 
 def clean_mdx_content_aggressive(content: str) -> str:
     """Aggressively clean MDX content"""
+    return render_blocks(clean_mdx_blocks_aggressive(parse_blocks(content)))
     
-    # Split into lines and clean
-    lines = content.split('\n')
-    clean_lines = []
-    
-    # Remove empty lines and normalize
-    for line in lines:
-        line = line.strip()
-        if line:
-            clean_lines.append(line)
-    
-    # Process content
-    result_lines = []
+def clean_mdx_blocks_aggressive(blocks: List[Block]) -> List[Block]:
+    """Aggressively clean tokenized MDX content; blank lines are dropped"""
+    result = BlockBuilder()
     i = 0
     
-    while i < len(clean_lines):
-        line = clean_lines[i]
+    while i < len(blocks):
+        block = blocks[i]
+        line = block.line
         
         # Skip malformed frontmatter lines that somehow got into content
         if (line.startswith('title:') or line.startswith('type:') or 
@@ -42,62 +49,60 @@ def clean_mdx_content_aggressive(content: str) -> str:
             header_match = re.search(r'PRINCIPLE\s+\d+:\s*[^"]*', line, re.IGNORECASE)
             if header_match:
                 clean_header = header_match.group().strip()
-                result_lines.append(f"# {clean_header}")
-                result_lines.append("")
+                result.add(f"# {clean_header}")
+                result.blank()
             i += 1
             continue
         
         # Handle opening quotes (make blockquotes)
         if (line.startswith('"') and line.endswith('"') and 
             ('—' in line or '–' in line) and len(line) > 30):
-            result_lines.append(f"> {line}")
-            result_lines.append("")
+            result.add(f"> {line}")
+            result.blank()
             i += 1
             continue
         
         # Handle section headers (all caps, standalone)
-        if (line.isupper() and 5 <= len(line) <= 50 and 
-            not line.startswith('"') and not line.startswith('#') and
+        if (block.upper and 5 <= len(line) <= 50 and 
+            not line.startswith('"') and block.kind != HEADING and
             '.' not in line and ',' not in line and
             not 'PRINCIPLE' in line):
             
             # Clean spaced headers
             if re.match(r'^[A-Z](\s+[A-Z])+', line):
                 clean_header = re.sub(r'\s+', ' ', line)
-                result_lines.append(f"## {clean_header}")
+                result.add(f"## {clean_header}")
             else:
-                result_lines.append(f"## {line}")
-            result_lines.append("")
+                result.add(f"## {line}")
+            result.blank()
             i += 1
             continue
         
         # Handle long quotes
         if (line.startswith('"') and not line.endswith('"') and len(line) > 30):
             # Process as blockquote until we find the end
-            result_lines.append(f"> {line}")
+            result.add(f"> {line}")
             i += 1
-            while i < len(clean_lines):
-                quote_line = clean_lines[i]
-                result_lines.append(f"> {quote_line}")
+            
+            while i < len(blocks):
+                quote_line = blocks[i].line
+                result.add(f"> {quote_line}")
+                
                 if (quote_line.endswith('"') or 
                     '(emphasis added)' in quote_line.lower() or
                     (quote_line.startswith('(') and quote_line.endswith(')'))):
                     break
                 i += 1
-            result_lines.append("")
+            
+            result.blank()
             i += 1
             continue
         
         # Clean regular text
-        line = fix_emphasis(line)
-        result_lines.append(line)
+        result.add_rewritten(block, fix_emphasis(line))
         i += 1
     
-    # Join and final cleanup
-    result = '\n'.join(result_lines)
-    result = re.sub(r'\n\s*\n\s*\n+', '\n\n', result)
-    
-    return result.strip()
+    return result.blocks
 
 def fix_emphasis(line: str) -> str:
     """Fix emphasis formatting in a line"""
@@ -107,31 +112,18 @@ def fix_emphasis(line: str) -> str:
     line = re.sub(r'\*\*\*\*([^*]+)\*\*\*\*', r'**\1**', line)
     
     # Bold theological terms (first occurrence only)
-    theological_terms = [
-        'missiological', 'missional', 'incarnational', 'ecclesiological',
-        'Christendom', 'post-Christendom', 'multiplication', 'APEST',
-        'trinitarian'
-    ]
-    
-    for term in theological_terms:
-        # Only bold if not already formatted
-        if term.lower() in line.lower() and f'**{term}**' not in line.lower():
-            pattern = r'\b' + re.escape(term) + r'\b'
-            line = re.sub(pattern, f'**{term}**', line, count=1, flags=re.IGNORECASE)
+    line = THEOLOGICAL_TERMS.emphasize(line, '**', skip_marked=True, fold_marked=True)
     
     # Italicize foreign terms
-    foreign_terms = ['shelach', 'eskénosen', 'missio Dei']
-    for term in foreign_terms:
-        if term in line and f'*{term}*' not in line:
-            line = line.replace(term, f'*{term}*')
+    line = FOREIGN_TERMS.emphasize(line, '*', first_only=False, skip_marked=True)
     
     return line
 
-def process_mdx_file(file_path: Path):
+def process_mdx_file(file_path: Path, writer: OutputWriter) -> bool:
     """Process a single MDX file with aggressive cleaning"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+            post = load_post(f)
         
         print(f"🧹 Aggressive clean: {file_path.parent.name}")
         
@@ -139,13 +131,14 @@ def process_mdx_file(file_path: Path):
         post.content = clean_mdx_content_aggressive(post.content)
         
         # Write back
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        writer.write_text(file_path, dumps_post(post))
         
         print(f"✅ Cleaned: {file_path.parent.name}")
+        return True
         
     except Exception as e:
         print(f"❌ Error: {file_path}: {e}")
+        return False
 
 def main():
     """Main function"""
@@ -153,12 +146,21 @@ def main():
     
     print("🧹 Aggressive MDX cleanup - final pass...")
     
+    manifest = BuildManifest('aggressive_mdx_cleaner', module_rule_files(__name__))
+    writer = OutputWriter()
+    
     for principle_dir in sorted(principles_dir.iterdir()):
         if principle_dir.is_dir():
             mdx_file = principle_dir / 'overview.mdx'
             if mdx_file.exists():
-                process_mdx_file(mdx_file)
+                if manifest.is_fresh(mdx_file):
+                    continue
+                if process_mdx_file(mdx_file, writer):
+                    manifest.record(mdx_file)
     
+    manifest.save()
+    print(manifest.summary())
+    print(writer.summary())
     print("✅ Aggressive cleanup complete!")
 
 if __name__ == "__main__":
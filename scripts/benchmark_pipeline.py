@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the PDF to MDX pipeline
+
+Generates a synthetic book of configurable size from the structure of the
+real content/principles/*/overview.mdx files, renders it to a PDF, and
+times each pipeline stage on it: PDF open, page text extraction, chapter
+assembly, clean_text() (checked against the legacy multi-pass version),
+frontmatter parsing and serializing, and every formatter stage. The real
+ebook in docs/ and any other PDF can be benchmarked the same way. Results
+are printed as a throughput table and can be written as JSON.
+
+With --check, nothing is timed: both converters' clean_text() is compared
+with its legacy version on the text of the real ebook, any --pdf, the
+synthetic book and a set of edge cases. Both converters then convert the
+real ebook and a synthetic book with images and a repeated chapter title
+twice; every image they reference must be tagged in the MDX written, and
+the second run must write nothing. Last, frontmatter_io must read and
+write every MDX file in content/principles and the synthetic book as
+python-frontmatter does. The exit status is non-zero if any check fails.
+
+Opening a PDF by path, from a memory map and from a bytes copy is timed
+separately, and on Linux the private and file-backed memory of parallel
+workers that open the PDF each way is reported as well.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+import fitz  # PyMuPDF
+import frontmatter
+
+from frontmatter_io import dumps_post, loads_post
+from improved_pdf_to_mdx import ImprovedPDFToMDXConverter
+from mdx_blocks import parse_blocks, render_blocks
+from mdx_pipeline import MDXPipeline, default_stages
+from pdf_images import PDFImageExtractor
+from pdf_page_store import EXTRACTION_MODE, PageTextStore, open_document
+from pdf_to_mdx_converter import PDFToMDXConverter
+from run_report import RunReport
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PRINCIPLES_DIR = REPO_ROOT / 'content' / 'principles'
+REAL_PDF = REPO_ROOT / 'docs' / 'Rethink 12 Principles ebook.pdf'
+
+LINES_PER_PAGE = 45
+
+# Ways to open a PDF compared by benchmark_pdf_open(): by path (what the
+# converters do), from a memory map, and from a private bytes copy
+OPEN_MODES = ('path', 'mapped', 'bytes')
+
+
+def load_template_lines(principles_dir: Path = PRINCIPLES_DIR) -> List[str]:
+    """Collect plain body lines from the real chapters, with MDX markers removed"""
+    lines = []
+    for mdx_file in sorted(principles_dir.glob('*/overview.mdx')):
+        post = frontmatter.load(mdx_file)
+        for line in post.content.split('\n'):
+            line = re.sub(r'^(#+|>)\s*', '', line.strip()).replace('*', '')
+            if line:
+                lines.append(line)
+    return lines
+
+
+def synthetic_chapters(chapters: int, pages_per_chapter: int, seed: int = 12) -> List[Dict]:
+    """Build chapters shaped like the real book: a principle title, an
+    attributed opening quote, section headers and body text"""
+    rng = random.Random(seed)
+    template = load_template_lines()
+    headers = [line for line in template if line.isupper() and 5 < len(line) < 50] or ['SECTION']
+    body = [line for line in template if not line.isupper()]
+
+    book = []
+    for number in range(1, chapters + 1):
+        lines = [f"PRINCIPLE {number}: RETHINK {rng.choice(headers)}",
+                 '"Mission is not primarily an activity of the church." —David Bosch']
+        while len(lines) < pages_per_chapter * LINES_PER_PAGE:
+            if rng.random() < 0.04:
+                lines.append(rng.choice(headers))
+            lines.append(rng.choice(body))
+        book.append({'number': number, 'lines': lines[:pages_per_chapter * LINES_PER_PAGE]})
+    return book
+
+
+def write_synthetic_pdf(book: List[Dict], pdf_path: Path, outline: bool = False, images: bool = False):
+    """Render synthetic chapters to a PDF with LINES_PER_PAGE lines per page,
+    optionally bookmarking each chapter title in the PDF outline and
+    placing a distinct image on each chapter's first page"""
+    doc = fitz.open()
+    toc = []
+    for chapter in book:
+        lines = chapter['lines']
+        toc.append([1, lines[0], len(doc) + 1])
+        for start in range(0, len(lines), LINES_PER_PAGE):
+            page = doc.new_page()
+            text = '\n'.join(lines[start:start + LINES_PER_PAGE])
+            page.insert_text((54, 54), text.encode('latin-1', 'replace').decode('latin-1'),
+                             fontsize=9)
+            if images and start == 0:
+                pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+                pix.set_rect(pix.irect, (chapter['number'] * 40 % 256, 90, 160))
+                page.insert_image(fitz.Rect(400, 700, 464, 764), pixmap=pix)
+    if outline:
+        doc.set_toc(toc)
+    doc.save(str(pdf_path))
+    doc.close()
+
+
+def write_synthetic_mdx(book: List[Dict], principles_dir: Path):
+    """Write synthetic chapters as unformatted overview.mdx files"""
+    for chapter in book:
+        chapter_dir = principles_dir / f"principle-{chapter['number']}"
+        chapter_dir.mkdir(parents=True, exist_ok=True)
+        post = frontmatter.Post('\n'.join(chapter['lines']),
+                                title=chapter['lines'][0], slug=chapter_dir.name,
+                                chapter=chapter['number'], type='principle')
+        (chapter_dir / 'overview.mdx').write_text(frontmatter.dumps(post), encoding='utf-8')
+
+
+class Benchmark:
+    def __init__(self, repeat: int = 1):
+        self.repeat = repeat
+        self.results: List[Dict] = []
+        self.memory: List[Dict] = []
+        # Outputs that differ from their reference implementation
+        self.failures: List[str] = []
+
+    def time(self, name: str, func: Callable, units: float = 0, unit: str = '',
+             bytes_in: int = 0, setup: Callable = None):
+        """Run func `repeat` times, quietly, and record the best wall time"""
+        best = None
+        result = None
+        for _ in range(self.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                if setup:
+                    setup()
+                start = time.perf_counter()
+                result = func()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        self.results.append({
+            'stage': name,
+            'seconds': best,
+            'units': units,
+            'unit': unit,
+            'bytes': bytes_in,
+            'unitsPerSecond': units / best if best and units else None,
+            'mbPerSecond': bytes_in / best / 1e6 if best and bytes_in else None,
+        })
+        return result
+
+    def report(self, title: str):
+        print(f"\n📊 {title}")
+        print("-" * 86)
+        print(f"{'stage':<48}{'seconds':>10}{'throughput':>18}{'MB/s':>10}")
+        for row in self.results:
+            rate = f"{row['unitsPerSecond']:,.0f} {row['unit']}/s" if row['unitsPerSecond'] else ''
+            mb = f"{row['mbPerSecond']:.2f}" if row['mbPerSecond'] else ''
+            print(f"{row['stage']:<48}{row['seconds']:>10.4f}{rate:>18}{mb:>10}")
+
+        if self.memory:
+            print(f"\n{'open mode':<24}{'workers':>8}{'open ms':>10}{'private MB':>14}{'file-backed MB':>16}")
+            for row in self.memory:
+                print(f"{row['mode']:<24}{row['workers']:>8}{row['openSeconds'] * 1000:>10.2f}"
+                      f"{row['privateKb'] / 1024:>14.1f}{row['fileKb'] / 1024:>16.1f}")
+
+
+def benchmark_pdf(bench: Benchmark, pdf_path: Path, workers: int, out_dir: Path):
+    """Time the PDF stages of both converters on one PDF"""
+    size = pdf_path.stat().st_size
+    doc = bench.time('open_pdf', lambda: open_document(str(pdf_path)), bytes_in=size)
+    pages = len(doc)
+    benchmark_pdf_open(bench, pdf_path, workers)
+
+    store = bench.time('extract pages (serial)', lambda: PageTextStore(doc).load(), pages, 'pages')
+    if workers > 1:
+        bench.time(f'extract pages ({workers} workers)',
+                   lambda: PageTextStore(doc, str(pdf_path), workers).load(), pages, 'pages')
+    text = pages_text(store, pages)
+    doc.close()
+
+    benchmark_clean_text(bench, text, out_dir)
+    basic = PDFToMDXConverter(str(pdf_path), str(out_dir / 'basic'))
+    improved = ImprovedPDFToMDXConverter(str(pdf_path), str(out_dir / 'improved'))
+    bench.time('PDFToMDXConverter.convert', basic.convert, pages, 'pages', size)
+    bench.time('ImprovedPDFToMDXConverter.convert', improved.convert, pages, 'pages', size)
+
+
+def open_pdf_mode(pdf_path: Path, mode: str):
+    """Open a PDF in one of OPEN_MODES"""
+    if mode == 'bytes':
+        return fitz.open(stream=pdf_path.read_bytes(), filetype='pdf')
+    return open_document(str(pdf_path), mapped=mode == 'mapped')
+
+
+def read_rss_kb() -> Dict[str, int]:
+    """Resident memory of this process in kB, split into private (RssAnon)
+    and file-backed (RssFile) pages; empty where /proc is not available"""
+    rss = {}
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('RssAnon', 'RssFile'):
+                    rss[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return rss
+
+
+def _open_and_extract(job) -> Dict:
+    """Open a PDF in a fresh worker process, extract every page, and report
+    the open time and how much the worker's resident memory grew"""
+    pdf_path, mode = job
+    before = read_rss_kb()
+    start = time.perf_counter()
+    doc = open_pdf_mode(pdf_path, mode)
+    opened = time.perf_counter() - start
+    for page in doc:
+        page.get_text(EXTRACTION_MODE)
+    after = read_rss_kb()
+    doc.close()
+    return {'openSeconds': opened, **{key: after[key] - before[key] for key in after}}
+
+
+def benchmark_pdf_open(bench: Benchmark, pdf_path: Path, workers: int):
+    """Time each way of opening a PDF, then measure the memory of `workers`
+    processes that each open it that way and extract every page. File-backed
+    pages of a memory map are shared between the workers; private pages
+    are not."""
+    size = pdf_path.stat().st_size
+    for mode in OPEN_MODES:
+        bench.time(f'open_pdf ({mode})', lambda: open_pdf_mode(pdf_path, mode).close(), bytes_in=size)
+
+    if not read_rss_kb():
+        return
+    for mode in OPEN_MODES:
+        with multiprocessing.Pool(workers, maxtasksperchild=1) as pool:
+            rows = pool.map(_open_and_extract, [(pdf_path, mode)] * workers, chunksize=1)
+        bench.memory.append({
+            'mode': mode,
+            'workers': workers,
+            'openSeconds': max(row['openSeconds'] for row in rows),
+            'privateKb': sum(row['RssAnon'] for row in rows),
+            'fileKb': sum(row['RssFile'] for row in rows),
+        })
+
+
+def legacy_clean_text(text: str) -> str:
+    """PDFToMDXConverter.clean_text() before it became a single pass, kept
+    as the reference its output is checked against"""
+    text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(\.)([A-Z])', r'. \2', text)
+    
+    lines = text.split('\n')
+    cleaned_lines = []
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            cleaned_lines.append('')
+            continue
+        if (i < len(lines) - 1 and 
+            line and 
+            not line.endswith('.') and 
+            not line.endswith('!') and 
+            not line.endswith('?') and
+            not line.endswith(':') and
+            lines[i + 1].strip() and
+            not lines[i + 1].strip()[0].isupper()):
+            cleaned_lines.append(line + ' ')
+        else:
+            cleaned_lines.append(line)
+    
+    text = ''.join(cleaned_lines)
+    text = re.sub(r' +', ' ', text)
+    return text.strip()
+
+
+def legacy_improved_clean_text(text: str) -> str:
+    """ImprovedPDFToMDXConverter.clean_text() before it became a single
+    pass, kept as the reference its output is checked against"""
+    cleaned_lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if (re.match(r'^\d+$', line) or
+            line.upper() in ['RETHINK', 'THE 12 PRINCIPLES'] or
+            len(line) < 3):
+            continue
+        cleaned_lines.append(line)
+    
+    text = '\n'.join(cleaned_lines)
+    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(\.)([A-Z])', r'. \2', text)
+    return text.strip()
+
+
+# Lines that exercise the clean_text() rules: blank and whitespace-only
+# runs, page numbers, running headers, short lines and the aB / a.B joins
+CLEAN_TEXT_LINES = [
+    '', '', ' ', '\t', '  \t ', '7', '12', ' 345 ', '12a', 'RETHINK', 'rethink ', 'Rethink',
+    'THE 12 PRINCIPLES', 'The 12 Principles', ' THE 12 PRINCIPLES ', 'a', 'ab', 'A.', 'Ab', '..',
+    'abc', 'aB', 'a.B', 'end of a.', 'end of aB', 'word a.Bcd', 'mid aBc word', 'ends with:',
+    'a question?', 'an exclamation!', 'lower start', 'Upper start', '  spaced   out  ',
+    '“Quoted start', '- list item', '# Heading', 'x.Y.z', 'tail a', 'Bcd head',
+]
+
+
+def pages_text(store: PageTextStore, pages: int) -> str:
+    """A document's text as the converters assemble it from its pages"""
+    return ''.join(store.pages[page_num] + '\n' for page_num in range(pages))
+
+
+def clean_text_cases(count: int = 2000, seed: int = 21) -> List[str]:
+    """Each edge-case line alone, between others and in random runs"""
+    rng = random.Random(seed)
+    cases = list(CLEAN_TEXT_LINES)
+    cases += [f"{a}\n{b}\n{c}" for a in CLEAN_TEXT_LINES for b in CLEAN_TEXT_LINES
+              for c in ('', 'next line', 'Next line')]
+    cases += ['\n'.join(rng.choice(CLEAN_TEXT_LINES) for _ in range(rng.randint(1, 30)))
+              for _ in range(count)]
+    cases += ['\n' * n + 'a' + '\n' * n + 'b' + ' \n' * n for n in range(1, 6)]
+    return cases
+
+
+def check_clean_text(texts: Dict[str, str]) -> List[str]:
+    """Compare both converters' clean_text() with their legacy versions;
+    returns a description of every text whose output differs"""
+    basic = PDFToMDXConverter('', '')
+    improved = ImprovedPDFToMDXConverter('', '')
+    failures = []
+    for name, legacy, current in [
+        ('PDFToMDXConverter.clean_text', legacy_clean_text, basic.clean_text),
+        ('ImprovedPDFToMDXConverter.clean_text', legacy_improved_clean_text, improved.clean_text),
+    ]:
+        for label, text in texts.items():
+            expected = legacy(text)
+            cleaned = current(text)
+            if cleaned != expected:
+                failures.append(f"{name} differs on {label}: {text[:60]!r} -> "
+                                f"{cleaned[:60]!r}, expected {expected[:60]!r}")
+    return failures
+
+
+def check_conversion(pdf_path: Path, out_dir: Path) -> List[str]:
+    """Convert a PDF with images twice with both converters; returns a
+    description of every referenced image missing from the MDX written and
+    of any file the second run wrote"""
+    failures = []
+    for converter_class in (PDFToMDXConverter, ImprovedPDFToMDXConverter):
+        name = f"{converter_class.__name__} on {pdf_path.name}"
+        converter_dir = out_dir / pdf_path.stem / converter_class.__name__
+        for _ in range(2):
+            images = PDFImageExtractor(converter_dir / 'images', workers=1)
+            converter = converter_class(str(pdf_path), str(converter_dir), images=images,
+                                        report=RunReport(converter_class.__name__, quiet=True))
+            with contextlib.redirect_stdout(io.StringIO()):
+                converter.convert()
+
+        written = ''.join(mdx_file.read_text(encoding='utf-8')
+                          for mdx_file in (converter_dir / 'principles').glob('*/overview.mdx'))
+        # Image files are named by the image's hash
+        missing = [image_hash for image_hash in images.used if image_hash not in written]
+        if missing:
+            failures.append(f"{name}: {len(missing)} of {len(images.used)} referenced images "
+                            f"are not tagged in the MDX written")
+        rewritten = converter.writer.changed + images.writer.changed
+        if rewritten:
+            failures.append(f"{name}: a rerun on the unchanged PDF wrote {rewritten} files")
+    return failures
+
+
+def image_book(book: List[Dict]) -> List[Dict]:
+    """The first chapters of a synthetic book, the last one repeating the
+    title of the one before, as a chapter in two parts would"""
+    chapters = [dict(chapter) for chapter in book[:3]]
+    chapters[-1]['lines'] = chapters[-2]['lines'][:1] + chapters[-1]['lines'][1:]
+    return chapters
+
+
+def run_checks(pdf_paths: List[Path], book: List[Dict], tmp: Path) -> int:
+    """The --check mode; returns the exit status"""
+    texts = {f"edge case {i}": text for i, text in enumerate(clean_text_cases())}
+    synthetic_pdf = tmp / 'synthetic.pdf'
+    write_synthetic_pdf(book, synthetic_pdf)
+    for pdf_path in [synthetic_pdf] + pdf_paths:
+        doc = open_document(str(pdf_path))
+        texts[pdf_path.name] = pages_text(PageTextStore(doc).load(), len(doc))
+        doc.close()
+
+    failures = check_clean_text(texts)
+    if not failures:
+        print(f"✅ clean_text() matches the legacy versions on {len(texts)} texts "
+              f"({', '.join(pdf_path.name for pdf_path in [synthetic_pdf] + pdf_paths)} and edge cases)")
+
+    conversion_pdfs = pdf_paths[:1] if REAL_PDF in pdf_paths else []
+    for outline in (False, True):
+        image_pdf = tmp / f"images{'-outline' if outline else ''}.pdf"
+        write_synthetic_pdf(image_book(book), image_pdf, outline, images=True)
+        conversion_pdfs.append(image_pdf)
+    conversion_failures = []
+    for pdf_path in conversion_pdfs:
+        conversion_failures += check_conversion(pdf_path, tmp / 'conversions')
+    if not conversion_failures:
+        print(f"✅ Every referenced image is tagged and reruns write nothing "
+              f"({', '.join(pdf_path.name for pdf_path in conversion_pdfs)})")
+
+    failures += conversion_failures
+
+    write_synthetic_mdx(book, tmp / 'synthetic' / 'principles')
+    mdx = {**mdx_texts(PRINCIPLES_DIR, '*/*.mdx'), **mdx_texts(tmp / 'synthetic' / 'principles')}
+    frontmatter_failures = check_frontmatter(mdx)
+    if not frontmatter_failures:
+        print(f"✅ frontmatter_io matches python-frontmatter on {len(mdx)} MDX files "
+              f"(content/principles and the synthetic book)")
+
+    failures += frontmatter_failures
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+def benchmark_clean_text(bench: Benchmark, text: str, out_dir: Path):
+    """Time both converters' clean_text() against their legacy multi-pass
+    versions on the same text, checking that the output is identical"""
+    basic = PDFToMDXConverter('', str(out_dir / 'basic'))
+    improved = ImprovedPDFToMDXConverter('', str(out_dir / 'improved'))
+    lines = text.count('\n')
+    size = len(text.encode('utf-8'))
+    
+    for name, legacy, current in [
+        ('PDFToMDXConverter.clean_text', legacy_clean_text, basic.clean_text),
+        ('ImprovedPDFToMDXConverter.clean_text', legacy_improved_clean_text, improved.clean_text),
+    ]:
+        expected = bench.time(f'{name} (legacy)', lambda: legacy(text), lines, 'lines', size)
+        cleaned = bench.time(name, lambda: current(text), lines, 'lines', size)
+        if cleaned != expected:
+            bench.failures.append(f"{name} differs from the legacy implementation")
+
+
+def mdx_texts(principles_dir: Path, pattern: str = '*/overview.mdx') -> Dict[str, str]:
+    """The MDX files of a content tree, by path"""
+    return {str(mdx_file): mdx_file.read_text(encoding='utf-8')
+            for mdx_file in sorted(principles_dir.glob(pattern))}
+
+
+def check_frontmatter(texts: Dict[str, str]) -> List[str]:
+    """Compare the frontmatter_io codec with python-frontmatter; returns a
+    description of every text either half of the codec handles differently"""
+    failures = []
+    for label, text in texts.items():
+        post = frontmatter.loads(text)
+        fast_post = loads_post(text)
+        if fast_post.metadata != post.metadata or fast_post.content != post.content:
+            failures.append(f"frontmatter_io.loads_post differs from frontmatter.loads on {label}")
+        if dumps_post(post) != frontmatter.dumps(post):
+            failures.append(f"frontmatter_io.dumps_post differs from frontmatter.dumps on {label}")
+    return failures
+
+
+def benchmark_frontmatter(bench: Benchmark, principles_dir: Path, passes: int = 20):
+    """Time python-frontmatter against the frontmatter_io codec on a content
+    tree, checking that both produce the same posts and text"""
+    labelled = mdx_texts(principles_dir)
+    texts = list(labelled.values())
+    files = len(texts) * passes
+    size = sum(len(text.encode('utf-8')) for text in texts) * passes
+
+    posts = bench.time('frontmatter.loads', lambda: [frontmatter.loads(text) for text in texts * passes],
+                       files, 'files', size)
+    fast_posts = bench.time('frontmatter_io.loads_post', lambda: [loads_post(text) for text in texts * passes],
+                            files, 'files', size)
+    dumped = bench.time('frontmatter.dumps', lambda: [frontmatter.dumps(post) for post in posts], files, 'files')
+    fast_dumped = bench.time('frontmatter_io.dumps_post', lambda: [dumps_post(post) for post in posts],
+                             files, 'files')
+
+    same_posts = all(a.metadata == b.metadata and a.content == b.content for a, b in zip(posts, fast_posts))
+    if not (same_posts and dumped == fast_dumped):
+        bench.failures += check_frontmatter(labelled)
+
+
+def benchmark_formatters(bench: Benchmark, principles_dir: Path):
+    """Time every formatter stage and the fused pipeline over a content tree"""
+    contents = [frontmatter.load(f).content for f in sorted(principles_dir.glob('*/overview.mdx'))]
+    lines = sum(content.count('\n') + 1 for content in contents)
+    size = sum(len(content.encode('utf-8')) for content in contents)
+
+    documents = bench.time('parse_blocks', lambda: [parse_blocks(content) for content in contents],
+                           lines, 'lines', size)
+    for name, stage in default_stages(principles_dir):
+        documents = bench.time(name, lambda: [stage(blocks) for blocks in documents], lines, 'lines', size)
+    bench.time('render_blocks', lambda: [render_blocks(blocks) for blocks in documents], lines, 'lines')
+
+    work_dir = principles_dir.parent / 'pipeline-run'
+    manifest_path = principles_dir.parent / 'build-manifest.json'
+
+    def reset():
+        shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.copytree(principles_dir, work_dir)
+        manifest_path.unlink(missing_ok=True)
+
+    def run_pipeline():
+        MDXPipeline(str(work_dir), manifest_path=manifest_path).process_all_files()
+
+    bench.time('mdx_pipeline (cold)', run_pipeline, lines, 'lines', size, setup=reset)
+    bench.time('mdx_pipeline (no-op rebuild)', run_pipeline, len(contents), 'files')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PDF to MDX pipeline')
+    parser.add_argument('--chapters', type=int, default=12, help='synthetic chapters (default: 12)')
+    parser.add_argument('--pages-per-chapter', type=int, default=8,
+                        help='synthetic pages per chapter (default: 8)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='also time parallel extraction with this many workers (default: 4)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage; the best is kept')
+    parser.add_argument('--outline', action='store_true',
+                        help='bookmark the synthetic chapters so chapter detection reads the PDF outline')
+    parser.add_argument('--real', action='store_true', help=f'also benchmark {REAL_PDF.name}')
+    parser.add_argument('--pdf', action='append', default=[], type=Path,
+                        help='also benchmark this PDF, e.g. an image-heavy ebook (repeatable)')
+    parser.add_argument('--json', help='write the results to this JSON file')
+    parser.add_argument('--check', action='store_true',
+                        help='only check clean_text() against the legacy versions, the MDX the '
+                             'converters write and the frontmatter codec; exit 1 on any failure')
+    args = parser.parse_args()
+
+    report = {}
+    failures = []
+    with tempfile.TemporaryDirectory(prefix='rethink-bench-') as tmp:
+        tmp = Path(tmp)
+        book = synthetic_chapters(args.chapters, args.pages_per_chapter)
+        if args.check:
+            real = [REAL_PDF] if REAL_PDF.exists() else []
+            return run_checks(real + args.pdf, book, tmp)
+
+        pdf_path = tmp / 'synthetic.pdf'
+        write_synthetic_pdf(book, pdf_path, args.outline)
+        write_synthetic_mdx(book, tmp / 'synthetic' / 'principles')
+
+        title = f"Synthetic book: {args.chapters} chapters x {args.pages_per_chapter} pages"
+        if args.outline:
+            title += " (with outline)"
+        bench = Benchmark(args.repeat)
+        benchmark_pdf(bench, pdf_path, args.workers, tmp / 'synthetic-out')
+        benchmark_frontmatter(bench, tmp / 'synthetic' / 'principles')
+        benchmark_formatters(bench, tmp / 'synthetic' / 'principles')
+        bench.report(title)
+        failures += bench.failures
+        report['synthetic'] = {'title': title, 'stages': bench.results, 'memory': bench.memory}
+
+        if args.real and REAL_PDF.exists():
+            bench = Benchmark(args.repeat)
+            benchmark_pdf(bench, REAL_PDF, args.workers, tmp / 'real-out')
+            shutil.copytree(PRINCIPLES_DIR, tmp / 'real' / 'principles')
+            benchmark_frontmatter(bench, tmp / 'real' / 'principles')
+            benchmark_formatters(bench, tmp / 'real' / 'principles')
+            bench.report(REAL_PDF.name)
+            failures += bench.failures
+            report['real'] = {'title': REAL_PDF.name, 'stages': bench.results, 'memory': bench.memory}
+
+        for pdf_path in args.pdf:
+            bench = Benchmark(args.repeat)
+            benchmark_pdf(bench, pdf_path, args.workers, tmp / f"{pdf_path.stem}-out")
+            bench.report(pdf_path.name)
+            failures += bench.failures
+            report[pdf_path.name] = {'title': pdf_path.name, 'stages': bench.results, 'memory': bench.memory}
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"\n✅ Wrote {args.json}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,13 +3,24 @@
 /**
  * Build script to extract content from MDX files and generate principle-content.ts
  * Run with: node scripts/build-content.js
+ *
+ * Reads content/content-bundle.json, written by scripts/finalize_content.py,
+ * when it holds exactly the chapters in content/principles and every chapter
+ * file is unchanged since it was written. Otherwise the MDX files are parsed
+ * one by one.
  */
 
+const crypto = require('crypto');
 const fs = require('fs');
 const path = require('path');
-const matter = require('gray-matter');
 
 const CONTENT_ROOT = path.join(__dirname, '..', 'content', 'principles');
+const BUNDLE_FILE = path.join(
+  __dirname,
+  '..',
+  'content',
+  'content-bundle.json'
+);
 const OUTPUT_FILE = path.join(
   __dirname,
   '..',
@@ -18,6 +29,85 @@ const OUTPUT_FILE = path.join(
   'principle-content.ts'
 );
 
+// Size and mtime are checked first; a file that was only touched (a
+// checkout, a save without changes) still matches its content hash
+function isUnchanged(chapter) {
+  const sourcePath = path.join(CONTENT_ROOT, chapter.source);
+  if (!fs.existsSync(sourcePath)) return false;
+
+  const stat = fs.statSync(sourcePath);
+  if (
+    stat.size === chapter.sourceSize &&
+    Math.floor(stat.mtimeMs) === chapter.sourceMtimeMs
+  ) {
+    return true;
+  }
+  const hash = crypto
+    .createHash('sha256')
+    .update(fs.readFileSync(sourcePath))
+    .digest('hex');
+  return hash === chapter.sourceHash;
+}
+
+// The file each chapter is read from without a bundle: overview.mdx, or
+// ebook.mdx when there is no overview
+function chapterSources() {
+  return fs
+    .readdirSync(CONTENT_ROOT, { withFileTypes: true })
+    .filter(dirent => dirent.isDirectory())
+    .map(dirent =>
+      ['overview.mdx', 'ebook.mdx']
+        .map(name => `${dirent.name}/${name}`)
+        .find(source => fs.existsSync(path.join(CONTENT_ROOT, source)))
+    )
+    .filter(Boolean)
+    .sort();
+}
+
+function readBundle() {
+  if (!fs.existsSync(BUNDLE_FILE)) {
+    return null;
+  }
+
+  try {
+    const bundle = JSON.parse(fs.readFileSync(BUNDLE_FILE, 'utf8'));
+
+    // So does a chapter added, removed or switched to another source file
+    const bundled = bundle.chapters.map(chapter => chapter.source).sort();
+    if (bundled.join('\n') !== chapterSources().join('\n')) {
+      console.log(
+        'Content bundle is stale (chapters added or removed), reading MDX files'
+      );
+      return null;
+    }
+
+    // A chapter edited after the bundle was written makes it stale
+    for (const chapter of bundle.chapters) {
+      if (!isUnchanged(chapter)) {
+        console.log(
+          `Content bundle is stale (${chapter.source} changed), reading MDX files`
+        );
+        return null;
+      }
+    }
+    return bundle;
+  } catch (error) {
+    console.warn(`Failed to read ${BUNDLE_FILE}:`, error.message);
+    return null;
+  }
+}
+
+function bundleEntries(bundle) {
+  return bundle.chapters
+    .map(chapter => ({
+      slug: chapter.slug,
+      title: chapter.metadata.title || slugToTitle(chapter.slug),
+      content: chapter.content.trim(),
+      hasContent: chapter.content.trim().length > 0,
+    }))
+    .filter(entry => entry.hasContent);
+}
+
 function readMDXContent(principleSlug) {
   const principleDir = path.join(CONTENT_ROOT, principleSlug);
 
@@ -41,6 +131,8 @@ function readMDXContent(principleSlug) {
   }
 
   try {
+    // Only needed without a content bundle
+    const matter = require('gray-matter');
     const fileContents = fs.readFileSync(contentPath, 'utf8');
     const { data, content } = matter(fileContents);
 
@@ -75,22 +167,25 @@ function generateContentFile() {
     process.exit(1);
   }
 
-  const principles = fs
-    .readdirSync(CONTENT_ROOT, { withFileTypes: true })
-    .filter(dirent => dirent.isDirectory())
-    .map(dirent => dirent.name)
-    .sort();
-
-  const contentEntries = [];
-
-  for (const slug of principles) {
-    const mdxData = readMDXContent(slug);
-
-    if (mdxData && mdxData.hasContent) {
-      contentEntries.push({
-        slug,
-        ...mdxData,
-      });
+  const bundle = readBundle();
+  const contentEntries = bundle ? bundleEntries(bundle) : [];
+
+  if (!bundle) {
+    const principles = fs
+      .readdirSync(CONTENT_ROOT, { withFileTypes: true })
+      .filter(dirent => dirent.isDirectory())
+      .map(dirent => dirent.name)
+      .sort();
+
+    for (const slug of principles) {
+      const mdxData = readMDXContent(slug);
+
+      if (mdxData && mdxData.hasContent) {
+        contentEntries.push({
+          slug,
+          ...mdxData,
+        });
+      }
     }
   }
 
@@ -131,7 +226,8 @@ export function getTitleForSlug(slug: string): string | null {
   // Write the output file
   fs.writeFileSync(OUTPUT_FILE, output, 'utf8');
   console.log(
-    `Generated ${OUTPUT_FILE} with ${contentEntries.length} principle(s)`
+    `Generated ${OUTPUT_FILE} with ${contentEntries.length} principle(s)` +
+      (bundle ? ' from the content bundle' : '')
   );
 
   // List the principles found
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Incremental Build Manifest for the content scripts
+
+Records, per processed file, the hash of its input, the hash of the
+output that was written and the version hash of the rules that produced
+it. On the next run a file whose current contents still match the
+recorded output for the same rules version is skipped.
+
+The rules version covers a script's own source and that of every module
+in scripts/ it imports, directly or through other modules, so an edit to
+shared code such as mdx_blocks, term_matcher or frontmatter_io
+invalidates the output of every script that uses it.
+"""
+
+import hashlib
+import inspect
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+DEFAULT_MANIFEST_PATH = Path(__file__).resolve().parent.parent / '.cache' / 'build-manifest.json'
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+PathLike = Union[str, Path]
+
+
+def content_hash(*paths: PathLike) -> str:
+    """Return a SHA-256 hex digest over the contents of one or more files"""
+    digest = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        digest.update(path.name.encode('utf-8') + b'\0')
+        if path.exists():
+            digest.update(path.read_bytes())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def rules_hash(rule_files: Iterable[PathLike]) -> str:
+    """Return a version hash for the source files that define the rules"""
+    return content_hash(*sorted(set(str(Path(f).resolve()) for f in rule_files)))
+
+
+def module_rule_files(*module_names: str) -> List[str]:
+    """Source files of the named modules and of every module in scripts/
+    they import, followed through imported modules, classes and functions"""
+    files = set()
+    seen = set()
+    pending = list(module_names)
+    while pending:
+        module = sys.modules.get(pending.pop())
+        if module is None or id(module) in seen:
+            continue
+        seen.add(id(module))
+        path = getattr(module, '__file__', None)
+        if not path or Path(path).resolve().parent != SCRIPTS_DIR:
+            continue
+        files.add(str(Path(path).resolve()))
+        for value in vars(module).values():
+            name = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if isinstance(name, str):
+                pending.append(name)
+    return sorted(files)
+
+
+class BuildManifest:
+    def __init__(self, name: str, rule_files: Iterable[PathLike],
+                 path: PathLike = DEFAULT_MANIFEST_PATH):
+        self.name = name
+        self.path = Path(path)
+        self.rules_version = rules_hash(rule_files)
+        self.hits = 0
+        self.misses = 0
+        self.pending: Dict[str, str] = {}
+
+        data = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+            except ValueError:
+                data = {}
+        self.data = data
+        self.entries: Dict[str, Dict] = data.setdefault(name, {})
+
+    def key(self, *paths: PathLike) -> str:
+        return '|'.join(str(Path(p).resolve()) for p in paths)
+
+    def is_fresh(self, *paths: PathLike) -> bool:
+        """Check whether the files are unchanged since this rules version wrote them"""
+        key = self.key(*paths)
+        current = content_hash(*paths)
+        entry = self.entries.get(key)
+
+        if entry and entry['rules'] == self.rules_version and entry['output'] == current:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        self.pending[key] = current
+        return False
+
+    def record(self, *paths: PathLike):
+        """Record the files as processed, after their output has been written"""
+        key = self.key(*paths)
+        output = content_hash(*paths)
+        self.entries[key] = {
+            'input': self.pending.pop(key, output),
+            'output': output,
+            'rules': self.rules_version,
+        }
+
+    def save(self):
+        """Write the manifest to disk"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding='utf-8')
+
+    def summary(self) -> str:
+        return f"📦 Build manifest ({self.name}): {self.hits} unchanged, {self.misses} processed"
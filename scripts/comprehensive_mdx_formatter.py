@@ -9,115 +9,103 @@ are properly formatted with correct headers, blockquotes, and clean text.
 import os
 import re
 from pathlib import Path
-import frontmatter
+from typing import List
+
+from build_manifest import BuildManifest, module_rule_files
+from frontmatter_io import dumps_post, load_post
+from mdx_blocks import HEADING, Block, BlockBuilder, parse_blocks, render_blocks
+from output_writer import OutputWriter
+from term_matcher import TermMatcher
+
+THEOLOGICAL_TERMS = TermMatcher([
+    'missiological', 'missional', 'incarnational', 'ecclesiological',
+    'Christendom', 'post-Christendom', 'multiplication', 'APEST',
+    'trinitarian'
+])
+
+FOREIGN_TERMS = TermMatcher(['shelach', 'eskénosen', 'missio Dei'], ignore_case=False, whole_words=False)
 
 def format_mdx_content(content: str) -> str:
     """Comprehensive content formatting"""
+    return render_blocks(format_mdx_blocks(parse_blocks(content)))
     
-    # Step 1: Clean up and normalize the text
-    lines = content.split('\n')
-    cleaned_lines = []
+def format_mdx_blocks(blocks: List[Block]) -> List[Block]:
+    """Comprehensive formatting of tokenized content"""
     
-    for line in lines:
-        line = line.strip()
-        if line:
-            cleaned_lines.append(line)
-        elif cleaned_lines and cleaned_lines[-1] != '':
-            cleaned_lines.append('')  # Preserve paragraph breaks
-    
-    # Step 2: Process line by line for proper formatting
-    formatted_lines = []
+    # Process block by block for proper formatting
+    output = BlockBuilder()
     i = 0
     
-    while i < len(cleaned_lines):
-        line = cleaned_lines[i]
+    while i < len(blocks):
+        block = blocks[i]
+        line = block.line
         
-        if not line:
-            formatted_lines.append('')
-            i += 1
-            continue
+        # Preserve paragraph breaks
+        if block.gap:
+            output.blank()
         
         # Handle principle headers
         if line.startswith('# PRINCIPLE') or re.match(r'^#{2,4}\s+#\s+PRINCIPLE', line):
-            clean_header = re.sub(r'^#+\s*#+\s*', '# ', line)
-            formatted_lines.append(clean_header)
+            output.add_rewritten(block, re.sub(r'^#+\s*#+\s*', '# ', line))
             i += 1
             continue
         
         # Handle opening quotes (right after headers)
         if (line.startswith('"') and line.endswith('"') and '—' in line and 
             len(line) > 30):
-            formatted_lines.append(f"> {line}")
+            output.add(f"> {line}")
             i += 1
             continue
         
         # Handle section headers (all caps, standalone)
-        if (line.isupper() and 5 <= len(line) <= 50 and
-            not line.startswith('"') and not line.startswith('#') and
+        if (block.upper and 5 <= len(line) <= 50 and
+            not line.startswith('"') and block.kind != HEADING and
             '.' not in line and ',' not in line):
             
             # Clean spaced headers like "T H E   I N C A R N A T I O N"
             if re.match(r'^[A-Z](\s+[A-Z])+', line):
                 clean_header = re.sub(r'\s+', ' ', line)
-                formatted_lines.append(f"## {clean_header}")
+                output.add(f"## {clean_header}")
             else:
-                formatted_lines.append(f"## {line}")
+                output.add(f"## {line}")
             i += 1
             continue
         
         # Handle long scripture quotations
         if (line.startswith('"') and not line.endswith('"') and len(line) > 30):
             # Process multi-line quote
-            quote_lines = []
-            while i < len(cleaned_lines):
-                quote_line = cleaned_lines[i]
-                if quote_line:
-                    quote_lines.append(f"> {quote_line}")
-                    # Check for end of quote
-                    if (quote_line.endswith('"') or '(emphasis added)' in quote_line.lower() or
-                        (quote_line.startswith('(') and quote_line.endswith(')'))):
-                        break
+            while i < len(blocks):
+                quote_line = blocks[i].line
+                output.add(f"> {quote_line}")
+                # Check for end of quote
+                if (quote_line.endswith('"') or '(emphasis added)' in quote_line.lower() or
+                    (quote_line.startswith('(') and quote_line.endswith(')'))):
+                    break
                 i += 1
-            formatted_lines.extend(quote_lines)
             i += 1
             continue
         
         # Format regular text
-        formatted_line = format_text_line(line)
-        formatted_lines.append(formatted_line)
+        output.add_rewritten(block, format_text_line(line))
         i += 1
     
-    # Step 3: Join and final cleanup
-    result = '\n'.join(formatted_lines)
-    
-    # Clean up excessive spacing
-    result = re.sub(r'\n\s*\n\s*\n+', '\n\n', result)
+    blocks = output.blocks
     
-    # Fix formatting issues
-    result = re.sub(r'\*{3,6}([^*]+)\*{3,6}', r'**\1**', result)  # Fix excessive asterisks
+    # Fix excessive asterisks; the markers can pair across lines
+    if any('***' in block.line for block in blocks):
+        result = re.sub(r'\*{3,6}([^*]+)\*{3,6}', r'**\1**', render_blocks(blocks))
+        blocks = parse_blocks(result.strip())
     
-    return result.strip()
+    return blocks
 
 def format_text_line(line: str) -> str:
     """Format a single line of text with proper emphasis"""
     
     # Bold important theological terms (first occurrence)
-    theological_terms = [
-        'missiological', 'missional', 'incarnational', 'ecclesiological',
-        'Christendom', 'post-Christendom', 'multiplication', 'APEST',
-        'trinitarian'
-    ]
-    
-    for term in theological_terms:
-        if term.lower() in line.lower() and f'**{term}**' not in line.lower():
-            pattern = r'\b' + re.escape(term) + r'\b'
-            line = re.sub(pattern, f'**{term}**', line, count=1, flags=re.IGNORECASE)
+    line = THEOLOGICAL_TERMS.emphasize(line, '**', skip_marked=True, fold_marked=True)
     
     # Italicize foreign terms
-    foreign_terms = ['shelach', 'eskénosen', 'missio Dei']
-    for term in foreign_terms:
-        if term in line and f'*{term}*' not in line:
-            line = line.replace(term, f'*{term}*')
+    line = FOREIGN_TERMS.emphasize(line, '*', first_only=False, skip_marked=True)
     
     # Format book titles (simple pattern)
     line = re.sub(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z][a-z]+\s+[A-Z][a-z]+)', 
@@ -125,11 +113,11 @@ def format_text_line(line: str) -> str:
     
     return line
 
-def process_mdx_file(file_path: Path):
+def process_mdx_file(file_path: Path, writer: OutputWriter) -> bool:
     """Process a single MDX file"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+            post = load_post(f)
         
         print(f"🔧 Processing: {file_path.parent.name}")
         
@@ -137,13 +125,14 @@ def process_mdx_file(file_path: Path):
         post.content = format_mdx_content(post.content)
         
         # Write back
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        writer.write_text(file_path, dumps_post(post))
         
         print(f"✅ Completed: {file_path.parent.name}")
+        return True
         
     except Exception as e:
         print(f"❌ Error processing {file_path}: {e}")
+        return False
 
 def main():
     """Main function"""
@@ -151,12 +140,21 @@ def main():
     
     print("🚀 Comprehensive MDX formatting...")
     
+    manifest = BuildManifest('comprehensive_mdx_formatter', module_rule_files(__name__))
+    writer = OutputWriter()
+    
     for principle_dir in sorted(principles_dir.iterdir()):
         if principle_dir.is_dir():
             mdx_file = principle_dir / 'overview.mdx'
             if mdx_file.exists():
-                process_mdx_file(mdx_file)
-    
+                if manifest.is_fresh(mdx_file):
+                    continue
+                if process_mdx_file(mdx_file, writer):
+                    manifest.record(mdx_file)
+    
+    manifest.save()
+    print(manifest.summary())
+    print(writer.summary())
     print("✅ Comprehensive MDX formatting complete!")
 
 if __name__ == "__main__":
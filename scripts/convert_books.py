@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Batch PDF to MDX conversion for many books
+
+Takes PDF files, directories of PDFs and manifests, and converts every book
+through one shared, bounded process pool, each into its own output tree
+(<output-dir>/<book-slug>/principles/...). Prints a line per book as it
+finishes and an aggregate throughput summary at the end.
+
+A manifest is either a text file with one PDF path per line (blank lines
+and # comments are ignored) or a JSON list whose entries are a path or an
+object {"pdf": ..., "output": ..., "converter": "improved" | "basic"}.
+Relative paths in a manifest are resolved against the manifest's folder.
+
+A single book is converted in this process, with --workers page
+extraction processes instead; with several books, each pool worker
+converts one book at a time. All workers share the persistent page text
+cache.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List
+
+from improved_pdf_to_mdx import ImprovedPDFToMDXConverter
+from page_text_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, PageTextCache
+from pdf_images import PDFImageExtractor
+from pdf_to_mdx_converter import PDFToMDXConverter
+from run_report import RunReport
+
+CONVERTERS = {
+    'improved': ImprovedPDFToMDXConverter,
+    'basic': PDFToMDXConverter,
+}
+
+
+def book_slug(pdf_path: Path) -> str:
+    """Folder name for a book's output tree, from its file name"""
+    return re.sub(r'[^a-z0-9]+', '-', pdf_path.stem.lower()).strip('-') or 'book'
+
+
+def read_manifest(manifest: Path) -> List[Dict]:
+    """Read book entries from a JSON or line-per-path manifest"""
+    text = manifest.read_text(encoding='utf-8')
+    if manifest.suffix.lower() == '.json':
+        entries = [entry if isinstance(entry, dict) else {'pdf': entry} for entry in json.loads(text)]
+    else:
+        entries = [{'pdf': line.strip()} for line in text.splitlines()
+                   if line.strip() and not line.strip().startswith('#')]
+
+    for entry in entries:
+        entry['pdf'] = manifest.parent / entry['pdf']
+        if entry.get('output'):
+            entry['output'] = manifest.parent / entry['output']
+    return entries
+
+
+def collect_books(sources: List[str], output_dir: Path, converter: str) -> List[Dict]:
+    """Expand PDF files, directories and manifests into one job per book"""
+    entries = []
+    for source in map(Path, sources):
+        if source.is_dir():
+            entries.extend({'pdf': pdf} for pdf in sorted(source.rglob('*.pdf')))
+        elif source.suffix.lower() == '.pdf':
+            entries.append({'pdf': source})
+        else:
+            entries.extend(read_manifest(source))
+
+    books = []
+    seen_pdfs = set()
+    used_slugs = set()
+    for entry in entries:
+        pdf = Path(entry['pdf']).resolve()
+        if pdf in seen_pdfs:
+            continue
+        seen_pdfs.add(pdf)
+
+        slug = base = book_slug(pdf)
+        n = 2
+        while slug in used_slugs:
+            slug = f"{base}-{n}"
+            n += 1
+        used_slugs.add(slug)
+
+        books.append({
+            'pdf': str(pdf),
+            'slug': slug,
+            'output': str(entry.get('output') or output_dir / slug),
+            'converter': entry.get('converter') or converter,
+        })
+    return books
+
+
+def convert_book(job: Dict) -> Dict:
+    """Convert one book with its converter's output captured; runs in a pool
+    worker, so the result carries only counts and timings"""
+    result = {
+        'pdf': job['pdf'],
+        'slug': job['slug'],
+        'output': job['output'],
+        'converter': job['converter'],
+        'pages': 0,
+        'chapters': 0,
+        'bytes': 0,
+        'changed': 0,
+        'unchanged': 0,
+        'imagesEncoded': 0,
+        'seconds': 0.0,
+        'error': None,
+        'log': '',
+    }
+    start = time.perf_counter()
+    log = io.StringIO()
+    cache = PageTextCache(job['cache_dir'], job['cache_bytes']) if job['cache_dir'] else None
+    images = PDFImageExtractor(job['image_dir'], workers=job['workers']) if job['image_dir'] else None
+    try:
+        result['bytes'] = os.path.getsize(job['pdf'])
+        converter = CONVERTERS[job['converter']](job['pdf'], job['output'], workers=job['workers'],
+                                                 cache=cache, images=images,
+                                                 report=RunReport(job['converter'], quiet=True))
+        with contextlib.redirect_stdout(log):
+            chapters = converter.convert()
+        result['pages'] = len(converter.page_store) if converter.page_store else 0
+        result['chapters'] = len(chapters)
+        result['changed'] = converter.writer.changed
+        result['unchanged'] = converter.writer.unchanged
+        if images:
+            result['imagesEncoded'] = images.encoded
+            result['changed'] += images.writer.changed
+        if not chapters:
+            result['error'] = 'no chapters found'
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if cache:
+            cache.close()
+    result['seconds'] = time.perf_counter() - start
+    result['log'] = log.getvalue()
+    return result
+
+
+def print_result(result: Dict, verbose: bool = False):
+    if verbose and result['log']:
+        print(result['log'].rstrip())
+    if result['error']:
+        print(f"❌ {result['slug']}: {result['error']}")
+        return
+    rate = result['pages'] / result['seconds'] if result['seconds'] else 0
+    print(f"✅ {result['slug']}: {result['chapters']} chapters from {result['pages']} pages "
+          f"in {result['seconds']:.2f}s ({rate:.0f} pages/s), "
+          f"{result['changed']} files changed")
+
+
+def run_batch(jobs: List[Dict], workers: int, verbose: bool = False) -> List[Dict]:
+    """Convert every job, keeping at most workers * 2 books in flight;
+    returns the results in job order"""
+    if len(jobs) == 1 or workers == 1:
+        results = []
+        for job in jobs:
+            results.append(convert_book(job))
+            print_result(results[-1], verbose)
+        return results
+
+    results: Dict[int, Dict] = {}
+    pending = list(enumerate(jobs))
+    pending.reverse()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        while pending or in_flight:
+            while pending and len(in_flight) < workers * 2:
+                index, job = pending.pop()
+                in_flight[pool.submit(convert_book, job)] = index
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                results[index] = future.result()
+                print_result(results[index], verbose)
+    return [results[index] for index in range(len(jobs))]
+
+
+def summarize(results: List[Dict], workers: int, wall_seconds: float) -> Dict:
+    """Aggregate counts and throughput over every book"""
+    converted = [result for result in results if not result['error']]
+    pages = sum(result['pages'] for result in converted)
+    size = sum(result['bytes'] for result in converted)
+    busy = sum(result['seconds'] for result in results)
+    return {
+        'books': len(results),
+        'failed': len(results) - len(converted),
+        'workers': workers,
+        'pages': pages,
+        'chapters': sum(result['chapters'] for result in converted),
+        'bytes': size,
+        'filesChanged': sum(result['changed'] for result in converted),
+        'filesUnchanged': sum(result['unchanged'] for result in converted),
+        'imagesEncoded': sum(result['imagesEncoded'] for result in converted),
+        'wallSeconds': round(wall_seconds, 6),
+        'bookSeconds': round(busy, 6),
+        'pagesPerSecond': round(pages / wall_seconds, 1) if wall_seconds else None,
+        'mbPerSecond': round(size / wall_seconds / 1e6, 3) if wall_seconds else None,
+        'parallelism': round(busy / wall_seconds, 2) if wall_seconds else None,
+        'results': [{k: v for k, v in result.items() if k != 'log'} for result in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sources', nargs='+',
+                        help='PDF files, directories of PDFs, or manifests (.json or one path per line)')
+    parser.add_argument('--output-dir', required=True,
+                        help='root of the per-book output trees')
+    parser.add_argument('--converter', choices=sorted(CONVERTERS), default='improved',
+                        help='converter for books whose manifest entry names none (default: improved)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes shared by all books (default: one per CPU)')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR),
+                        help='directory of the persistent page text cache')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='evict least recently used pages beyond this size')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always extract page text with PyMuPDF')
+    parser.add_argument('--images', action='store_true',
+                        help='extract images into web formats and reference them in each chapter')
+    parser.add_argument('--image-dir',
+                        help='folder for the images of every book (default: <output-dir>/images)')
+    parser.add_argument('--report', help='write the batch summary and per-book results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help="print each converter's output")
+    args = parser.parse_args()
+
+    books = collect_books(args.sources, Path(args.output_dir), args.converter)
+    missing = [book['pdf'] for book in books if not os.path.exists(book['pdf'])]
+    for pdf in missing:
+        print(f"❌ PDF file not found: {pdf}")
+    unknown = {book['converter'] for book in books} - set(CONVERTERS)
+    for name in sorted(unknown):
+        print(f"❌ Unknown converter: {name}")
+    if missing or unknown:
+        return 1
+    if not books:
+        print("❌ No PDF files found")
+        return 1
+
+    workers = max(1, min(args.workers, len(books)))
+    # One book gets the workers for its pages; several books get one each
+    page_workers = args.workers if len(books) == 1 else 1
+    jobs = [dict(book,
+                 workers=page_workers,
+                 cache_dir=None if args.no_cache else args.cache_dir,
+                 cache_bytes=args.cache_size_mb * 1024 * 1024,
+                 image_dir=(args.image_dir or str(Path(args.output_dir) / 'images')) if args.images else None)
+            for book in books]
+
+    if workers > 1:
+        print(f"🚀 Converting {len(books)} books with {workers} worker processes")
+    else:
+        print(f"🚀 Converting {len(books)} book{'s' if len(books) > 1 else ''}")
+    start = time.perf_counter()
+    results = run_batch(jobs, workers, args.verbose)
+    summary = summarize(results, workers, time.perf_counter() - start)
+
+    print("\n📊 Batch Conversion Summary:")
+    print("-" * 60)
+    print(f"📚 Books: {summary['books'] - summary['failed']} converted, {summary['failed']} failed")
+    print(f"📄 Pages: {summary['pages']:,} ({summary['bytes'] / 1e6:.1f} MB) "
+          f"into {summary['chapters']} chapters")
+    print(f"📝 Output: {summary['filesChanged']} files changed, {summary['filesUnchanged']} unchanged")
+    if args.images:
+        print(f"🖼️  Images encoded: {summary['imagesEncoded']}")
+    print(f"⏱️  {summary['wallSeconds']:.3f}s wall, {summary['bookSeconds']:.3f}s of book conversion "
+          f"({summary['parallelism']}x parallel)")
+    print(f"🚀 Throughput: {summary['pagesPerSecond']} pages/s, {summary['mbPerSecond']} MB/s")
+
+    if args.report:
+        report_path = Path(args.report)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+        print(f"✅ Wrote batch report: {args.report}")
+    return 1 if summary['failed'] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -9,38 +9,56 @@ blockquotes, scripture formatting, emphasis, and other markdown elements.
 import os
 import re
 from pathlib import Path
-import frontmatter
+from typing import List
+
+from build_manifest import BuildManifest, module_rule_files
+from frontmatter_io import dumps_post, load_post
+from mdx_blocks import Block, BlockBuilder, parse_blocks, render_blocks
+from output_writer import OutputWriter
+from term_matcher import TermMatcher
+
+THEOLOGICAL_TERMS = TermMatcher([
+    'missio Dei', 'incarnational', 'missional',
+    'Christendom', 'post-Christendom', 'multiplication',
+    'ecclesiological', 'ecclesiologies', 'missiological',
+    'APEST', 'trinitarian'
+])
+
+FOREIGN_TERMS = TermMatcher(['shelach', 'eskénosen', 'missio Dei'])
 
 class EnhancedMDXFormatter:
     def __init__(self, principles_dir: str):
         self.principles_dir = Path(principles_dir)
+        self.writer = OutputWriter()
         
     def format_content(self, content: str) -> str:
         """Enhanced content formatting with proper MDX elements"""
-        lines = content.split('\n')
-        formatted_lines = []
+        return render_blocks(self.format_blocks(parse_blocks(content)))
+    
+    def format_blocks(self, blocks: List[Block]) -> List[Block]:
+        """Enhanced formatting of tokenized content"""
+        output = BlockBuilder()
         i = 0
         
-        while i < len(lines):
-            line = lines[i].strip()
+        while i < len(blocks):
+            block = blocks[i]
+            line = block.line
             
-            # Skip empty lines but preserve paragraph breaks
-            if not line:
-                formatted_lines.append('')
-                i += 1
-                continue
+            # Preserve paragraph breaks
+            if block.gap:
+                output.blank()
                 
             # Handle principle titles (already have # header)
             if line.startswith('# PRINCIPLE'):
-                formatted_lines.append(line)
-                formatted_lines.append('')
+                output.add_block(block)
+                output.blank()
                 i += 1
                 continue
             
             # Handle opening quotes (usually right after title)
             if self.is_opening_quote(line):
-                formatted_lines.append(f"> {line}")
-                formatted_lines.append('')
+                output.add(f"> {line}")
+                output.blank()
                 i += 1
                 continue
             
@@ -50,43 +68,39 @@ class EnhancedMDXFormatter:
                 if re.match(r'^[A-Z](\s+[A-Z])+', line):
                     # Spaced out headers like "T H E   I N C A R N A T I O N"
                     clean_header = re.sub(r'\s+', ' ', line)
-                    formatted_lines.append(f"## {clean_header}")
+                    output.add(f"## {clean_header}")
                 else:
-                    formatted_lines.append(f"## {line}")
-                formatted_lines.append('')
+                    output.add(f"## {line}")
+                output.blank()
                 i += 1
                 continue
             
             # Handle long scripture quotations
             if self.is_scripture_quote_start(line):
-                scripture_block, lines_consumed = self.process_scripture_block(i, lines)
-                formatted_lines.extend(scripture_block)
-                formatted_lines.append('')
-                i += lines_consumed
+                scripture_block, blocks_consumed = self.process_scripture_block(i, blocks)
+                output.extend(scripture_block)
+                output.blank()
+                i += blocks_consumed
                 continue
                 
             # Handle single line quotes
             if self.is_single_quote(line):
-                formatted_lines.append(f"> {line}")
-                formatted_lines.append('')
+                output.add(f"> {line}")
+                output.blank()
                 i += 1
                 continue
             
             # Handle list items that look like scripture or poem
             if self.is_scripture_list_item(line):
-                formatted_lines.append(f"> {line}")
+                output.add(f"> {line}")
                 i += 1
                 continue
             
             # Format regular paragraphs with emphasis
-            formatted_line = self.add_emphasis(line)
-            formatted_lines.append(formatted_line)
+            output.add_rewritten(block, self.add_emphasis(line))
             i += 1
         
-        # Join and clean up
-        result = '\n'.join(formatted_lines)
-        result = re.sub(r'\n\s*\n\s*\n+', '\n\n', result)
-        return result.strip()
+        return output.blocks
     
     def is_opening_quote(self, line: str) -> bool:
         """Check if this is an opening quote (attribution quote after title)"""
@@ -109,16 +123,13 @@ class EnhancedMDXFormatter:
                 not line.endswith('"') and
                 len(line) > 40)
     
-    def process_scripture_block(self, start_index: int, lines: list) -> tuple:
+    def process_scripture_block(self, start_index: int, blocks: list) -> tuple:
         """Process a multi-line scripture block"""
         block_lines = []
         i = start_index
         
-        while i < len(lines):
-            line = lines[i].strip()
-            if not line:
-                i += 1
-                continue
+        while i < len(blocks):
+            line = blocks[i].line
                 
             # Add as blockquote
             block_lines.append(f"> {line}")
@@ -152,28 +163,11 @@ class EnhancedMDXFormatter:
         line = re.sub(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]*){1,4})\s*,\s*([A-Z][a-z]+\s+[A-Z][a-z]+)', 
                       r'*\1*, \2', line)
         
-        # Bold key theological terms on first mention
-        theological_terms = [
-            r'\bmissio Dei\b', r'\bincarnational\b', r'\bmissional\b', 
-            r'\bChristendom\b', r'\bpost-Christendom\b', r'\bmultiplication\b',
-            r'\becclesiological\b', r'\becclesiologies\b', r'\bmissiological\b',
-            r'\bAPEST\b', r'\btrinitarian\b'
-        ]
-        
-        for term_pattern in theological_terms:
-            # Only bold first occurrence in this line
-            if re.search(term_pattern, line, re.IGNORECASE):
-                line = re.sub(term_pattern, lambda m: f"**{m.group()}**", 
-                             line, count=1, flags=re.IGNORECASE)
+        # Bold key theological terms on first mention in this line
+        line = THEOLOGICAL_TERMS.emphasize(line, '**', canonical=False)
         
         # Italicize foreign language terms
-        foreign_terms = [
-            r'\bshelach\b', r'\beskénosen\b', r'\bmissio Dei\b'
-        ]
-        
-        for term_pattern in foreign_terms:
-            line = re.sub(term_pattern, lambda m: f"*{m.group()}*", 
-                         line, flags=re.IGNORECASE)
+        line = FOREIGN_TERMS.emphasize(line, '*', first_only=False, canonical=False)
         
         # Format scripture references
         line = re.sub(r'\(([1-3]?\s*[A-Z][a-z]+\s+\d+:\d+(?:-\d+)?)\)', 
@@ -181,11 +175,11 @@ class EnhancedMDXFormatter:
         
         return line
     
-    def format_file(self, file_path: Path):
+    def format_file(self, file_path: Path) -> bool:
         """Format a single MDX file"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
+                post = load_post(f)
             
             print(f"🔧 Enhancing: {file_path.parent.name}/{file_path.name}")
             
@@ -193,24 +187,33 @@ class EnhancedMDXFormatter:
             post.content = self.format_content(post.content)
             
             # Write back
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(frontmatter.dumps(post))
+            self.writer.write_text(file_path, dumps_post(post))
                 
             print(f"✅ Enhanced: {file_path.parent.name}/{file_path.name}")
+            return True
             
         except Exception as e:
             print(f"❌ Error enhancing {file_path}: {e}")
+            return False
     
     def format_all_files(self):
         """Format all MDX files"""
         print("🚀 Starting enhanced MDX formatting...")
         
+        manifest = BuildManifest('enhanced_mdx_formatter', module_rule_files(__name__))
+        
         for principle_dir in sorted(self.principles_dir.iterdir()):
             if principle_dir.is_dir():
                 mdx_file = principle_dir / 'overview.mdx'
                 if mdx_file.exists():
-                    self.format_file(mdx_file)
+                    if manifest.is_fresh(mdx_file):
+                        continue
+                    if self.format_file(mdx_file):
+                        manifest.record(mdx_file)
         
+        manifest.save()
+        print(manifest.summary())
+        print(self.writer.summary())
         print("✅ Enhanced MDX formatting complete!")
 
 def main():
@@ -9,74 +9,82 @@ with correct blockquotes, headers, emphasis, and clean structure.
 import os
 import re
 from pathlib import Path
-import frontmatter
+from typing import List
+
+from build_manifest import BuildManifest, module_rule_files
+from frontmatter_io import dumps_post, load_post
+from mdx_blocks import HEADING, Block, BlockBuilder, parse_blocks, render_blocks
+from output_writer import OutputWriter
+from term_matcher import TermMatcher
+
+THEOLOGICAL_TERMS = TermMatcher([
+    'missiological', 'missional', 'incarnational', 'ecclesiological',
+    'Christendom', 'post-Christendom', 'multiplication', 'APEST'
+])
+
+FOREIGN_TERMS = TermMatcher(['shelach', 'eskénosen', 'missio Dei'], ignore_case=False, whole_words=False)
 
 class FinalMDXFormatter:
     def __init__(self, principles_dir: str):
         self.principles_dir = Path(principles_dir)
+        self.writer = OutputWriter()
         
     def format_content(self, content: str) -> str:
         """Final formatting pass for clean MDX"""
+        return render_blocks(self.format_blocks(parse_blocks(content)))
         
-        # First, let's clean up the content line by line
-        lines = content.split('\n')
-        formatted_lines = []
+    def format_blocks(self, blocks: List[Block]) -> List[Block]:
+        """Final formatting pass over tokenized content"""
+        output = BlockBuilder()
         i = 0
         
-        while i < len(lines):
-            line = lines[i].strip()
+        while i < len(blocks):
+            block = blocks[i]
+            line = block.line
             
-            if not line:
-                # Preserve single empty lines, remove multiple
-                if formatted_lines and formatted_lines[-1] != '':
-                    formatted_lines.append('')
-                i += 1
-                continue
+            # Preserve single empty lines, remove multiple
+            if block.gap:
+                output.blank()
             
             # Handle headers (already formatted)
-            if line.startswith('#'):
-                formatted_lines.append(line)
+            if block.kind == HEADING:
+                output.add_block(block)
                 i += 1
                 continue
                 
             # Handle quotes - opening quote after header
             if self.is_opening_quote(line):
-                formatted_lines.append(f"> {line}")
+                output.add(f"> {line}")
                 i += 1
                 continue
                 
             # Handle section headers
             if self.is_section_header(line):
-                if formatted_lines and formatted_lines[-1] != '':
-                    formatted_lines.append('')
-                formatted_lines.append(f"## {self.clean_header(line)}")
+                output.blank()
+                output.add(f"## {self.clean_header(line)}")
                 i += 1
                 continue
                 
             # Handle scripture quotations
             if self.is_long_quote_start(line):
-                quote_lines, consumed = self.format_long_quote(i, lines)
-                if formatted_lines and formatted_lines[-1] != '':
-                    formatted_lines.append('')
-                formatted_lines.extend(quote_lines)
+                quote_lines, consumed = self.format_long_quote(i, blocks)
+                output.blank()
+                output.extend(quote_lines)
                 i += consumed
                 continue
             
             # Handle regular text with formatting
-            formatted_line = self.format_text(line)
-            formatted_lines.append(formatted_line)
+            output.add_rewritten(block, self.format_text(line))
             i += 1
         
-        # Join and final cleanup
-        result = '\n'.join(formatted_lines)
-        
-        # Clean up excessive line breaks
-        result = re.sub(r'\n\s*\n\s*\n+', '\n\n', result)
+        blocks = output.blocks
         
-        # Fix bold formatting issues
-        result = re.sub(r'\*{3,4}([^*]+)\*{3,4}', r'**\1**', result)
+        # Fix bold formatting issues; the markers can pair across lines
+        if any('***' in block.line for block in blocks):
+            result = re.sub(r'\*{3,4}([^*]+)\*{3,4}', r'**\1**', render_blocks(blocks))
+            blocks = parse_blocks(result.strip())
         
-        return result.strip()
+        return blocks
     
     def is_opening_quote(self, line: str) -> bool:
         """Check for opening attribution quote"""
@@ -105,22 +113,23 @@ class FinalMDXFormatter:
         """Check for start of long quotation"""
         return (line.startswith('"') and not line.endswith('"') and len(line) > 30)
     
-    def format_long_quote(self, start_idx: int, lines: list) -> tuple:
+    def format_long_quote(self, start_idx: int, blocks: list) -> tuple:
         """Format a long quotation as blockquote"""
         quote_lines = []
         i = start_idx
         in_quote = True
         
-        while i < len(lines) and in_quote:
-            line = lines[i].strip()
-            if line:
-                quote_lines.append(f"> {line}")
-                # Check if quote ends
-                if (line.endswith('"') or 
-                    line.endswith('").') or 
-                    '(emphasis added)' in line.lower() or
-                    line.startswith('(') and line.endswith(')')):
-                    in_quote = False
+        while i < len(blocks) and in_quote:
+            line = blocks[i].line
+            quote_lines.append(f"> {line}")
+            
+            # Check if quote ends
+            if (line.endswith('"') or 
+                line.endswith('").') or 
+                '(emphasis added)' in line.lower() or
+                line.startswith('(') and line.endswith(')')):
+                in_quote = False
+            
             i += 1
         
         return quote_lines, i - start_idx
@@ -133,29 +142,18 @@ class FinalMDXFormatter:
                       r'*\1*, \2', text)
         
         # Bold important theological terms (but not if already formatted)
-        theological_terms = [
-            'missiological', 'missional', 'incarnational', 'ecclesiological',
-            'Christendom', 'post-Christendom', 'multiplication', 'APEST'
-        ]
-        
-        for term in theological_terms:
-            if term.lower() in text.lower() and f'**{term}**' not in text:
-                pattern = r'\b' + re.escape(term) + r'\b'
-                text = re.sub(pattern, f'**{term}**', text, count=1, flags=re.IGNORECASE)
+        text = THEOLOGICAL_TERMS.emphasize(text, '**', skip_marked=True)
         
         # Italicize Hebrew/Greek terms
-        foreign_terms = ['shelach', 'eskénosen', 'missio Dei']
-        for term in foreign_terms:
-            if term in text and f'*{term}*' not in text:
-                text = text.replace(term, f'*{term}*')
+        text = FOREIGN_TERMS.emphasize(text, '*', first_only=False, skip_marked=True)
         
         return text
     
-    def process_file(self, file_path: Path):
+    def process_file(self, file_path: Path) -> bool:
         """Process a single MDX file"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
+                post = load_post(f)
             
             print(f"🎯 Final formatting: {file_path.parent.name}")
             
@@ -163,24 +161,33 @@ class FinalMDXFormatter:
             post.content = self.format_content(post.content)
             
             # Save the file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(frontmatter.dumps(post))
+            self.writer.write_text(file_path, dumps_post(post))
             
             print(f"✅ Completed: {file_path.parent.name}")
+            return True
             
         except Exception as e:
             print(f"❌ Error processing {file_path}: {e}")
+            return False
     
     def process_all_files(self):
         """Process all MDX files"""
         print("🚀 Final MDX formatting pass...")
         
+        manifest = BuildManifest('final_mdx_formatter', module_rule_files(__name__))
+        
         for principle_dir in sorted(self.principles_dir.iterdir()):
             if principle_dir.is_dir():
                 mdx_file = principle_dir / 'overview.mdx'
                 if mdx_file.exists():
-                    self.process_file(mdx_file)
-        
+                    if manifest.is_fresh(mdx_file):
+                        continue
+                    if self.process_file(mdx_file):
+                        manifest.record(mdx_file)
+        
+        manifest.save()
+        print(manifest.summary())
+        print(self.writer.summary())
         print("✅ Final MDX formatting complete!")
 
 def main():
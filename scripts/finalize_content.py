@@ -3,15 +3,36 @@
 Final organizer and title extractor for the converted MDX files
 
 This script reads the generated MDX files and extracts better titles,
-ensuring proper organization and metadata.
+ensuring proper organization and metadata. It finishes by writing
+content/content-bundle.json, holding the metadata and body of every
+chapter plus the table of contents, which the site build reads instead of
+parsing each MDX file again. Each chapter records the size, mtime and
+SHA-256 of its source file; readers trust the bundle while every source
+still matches, checking the hash only when size or mtime moved.
+
+The table of contents is built from the YAML headers alone. The bundle
+reuses the previous bundle's entry for every chapter whose size and
+mtime are unchanged, so only edited chapters are read in full and hashed.
 """
 
+import hashlib
 import os
 import re
 import json
 from pathlib import Path
+from typing import Any, Dict
 import frontmatter
 
+from build_manifest import BuildManifest, module_rule_files
+from frontmatter_io import load_post, patch_metadata, read_head, read_metadata
+from output_writer import OutputWriter
+
+# The title search reads at most 30 lines plus 10 lines of lookahead
+TITLE_HEAD_LINES = 40
+
+PRINCIPLES_DIR = Path("/Users/joshshepherd/Desktop/GitHub/rethink-book/content/principles")
+BUNDLE_FILE = Path("/Users/joshshepherd/Desktop/GitHub/rethink-book/content/content-bundle.json")
+
 def extract_full_principle_title(content: str, principle_num: int) -> str:
     """Extract the full principle title from content"""
     lines = content.split('\n')
@@ -55,35 +76,37 @@ def extract_full_principle_title(content: str, principle_num: int) -> str:
     
     return f"PRINCIPLE {principle_num}"
 
-def update_principle_files():
-    """Update all principle files with better titles and metadata"""
-    principles_dir = Path("/Users/joshshepherd/Desktop/GitHub/rethink-book/content/principles")
-    
+def update_principle_files(writer: OutputWriter) -> Dict[str, frontmatter.Post]:
+    """Update all principle files with better titles and metadata; returns
+    the updated posts by slug"""
     print("🔧 Updating principle files with better titles...")
+    manifest = BuildManifest('finalize_content', module_rule_files(__name__))
+    posts = {}
     
     # Process each principle directory
     for i in range(1, 13):  # Principles 1-12
-        principle_dir = principles_dir / f"principle-{i}"
+        principle_dir = PRINCIPLES_DIR / f"principle-{i}"
         mdx_file = principle_dir / "overview.mdx"
+        chapter_files = (mdx_file, principle_dir / "activities.json", principle_dir / "quiz.json")
         
         if not mdx_file.exists():
             print(f"⚠️  Missing: {mdx_file}")
             continue
         
-        # Read the current file
-        with open(mdx_file, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        if manifest.is_fresh(*chapter_files):
+            continue
         
-        # Extract better title from content
-        better_title = extract_full_principle_title(post.content, i)
+        # Read only the header and the opening lines of the body
+        _, head = read_head(mdx_file, TITLE_HEAD_LINES)
         
-        # Update metadata
-        post.metadata['title'] = better_title
-        post.metadata['description'] = f"Principle {i}: {better_title.replace(f'PRINCIPLE {i}:', '').strip()}"
+        # Extract better title from content
+        better_title = extract_full_principle_title(head, i)
         
-        # Save updated file
-        with open(mdx_file, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        # Patch the metadata; the body is written back as it is
+        posts[principle_dir.name] = patch_metadata(mdx_file, {
+            'title': better_title,
+            'description': f"Principle {i}: {better_title.replace(f'PRINCIPLE {i}:', '').strip()}",
+        }, writer)
         
         print(f"✅ Updated Principle {i}: {better_title}")
         
@@ -102,8 +125,7 @@ def update_principle_files():
                     activity["title"] = f"Reflect on Principle {i}"
                     activity["description"] = f"Consider how this principle applies to your ministry context"
             
-            with open(activities_file, 'w', encoding='utf-8') as f:
-                json.dump(activities, f, indent=2)
+            writer.write_json(activities_file, activities)
         
         # Update quiz.json
         quiz_file = principle_dir / "quiz.json"
@@ -114,12 +136,74 @@ def update_principle_files():
             quiz["title"] = f"{better_title} - Knowledge Check"
             quiz["description"] = f"Test your understanding of {better_title}"
             
-            with open(quiz_file, 'w', encoding='utf-8') as f:
-                json.dump(quiz, f, indent=2)
+            writer.write_json(quiz_file, quiz)
+        
+        manifest.record(*chapter_files)
+    
+    manifest.save()
+    print(manifest.summary())
+    return posts
+
+def load_previous_chapters() -> Dict[str, Dict]:
+    """The chapters of the bundle written last time, by slug"""
+    try:
+        with open(BUNDLE_FILE, 'r', encoding='utf-8') as f:
+            return {chapter["slug"]: chapter for chapter in json.load(f)["chapters"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def load_chapters(posts: Dict[str, frontmatter.Post], previous: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Collect every chapter folder the site reads, reusing the posts that
+    update_principle_files() already holds and the previous bundle's
+    entries for chapters whose source is unchanged"""
+    chapters = {}
+    for chapter_dir in sorted(path for path in PRINCIPLES_DIR.iterdir() if path.is_dir()):
+        # The site prefers overview.mdx and falls back to ebook.mdx
+        has_overview = (chapter_dir / "overview.mdx").exists()
+        has_ebook = (chapter_dir / "ebook.mdx").exists()
+        if not has_overview and not has_ebook:
+            continue
+        
+        source = "overview.mdx" if has_overview else "ebook.mdx"
+        source_path = chapter_dir / source
+        post = posts.get(chapter_dir.name) if has_overview else None
+        stat = source_path.stat()
+        
+        # Same test as the readers' fast path in scripts/build-content.js
+        entry = previous.get(chapter_dir.name)
+        if (post is None and entry
+                and entry.get("source") == f"{chapter_dir.name}/{source}"
+                and entry.get("sourceSize") == stat.st_size
+                and entry.get("sourceMtimeMs") == stat.st_mtime_ns // 1_000_000):
+            chapters[chapter_dir.name] = {**entry, "hasOverview": has_overview, "hasEbook": has_ebook}
+            continue
+        
+        if post is None:
+            post = load_post(source_path)
+        chapters[chapter_dir.name] = {
+            "slug": chapter_dir.name,
+            "source": f"{chapter_dir.name}/{source}",
+            # Lets readers tell a touched file from an edited one
+            "sourceSize": stat.st_size,
+            "sourceMtimeMs": stat.st_mtime_ns // 1_000_000,
+            "sourceHash": hashlib.sha256(source_path.read_bytes()).hexdigest(),
+            "hasOverview": has_overview,
+            "hasEbook": has_ebook,
+            # Keys in the order the YAML header stores them
+            "metadata": dict(sorted(post.metadata.items())),
+            "content": post.content,
+        }
+    return chapters
 
-def create_table_of_contents():
+def chapter_metadata(slug: str, posts: Dict[str, frontmatter.Post]) -> Dict[str, Any]:
+    """A chapter's metadata, read from the YAML header alone unless
+    update_principle_files() already holds the post"""
+    if slug in posts:
+        return posts[slug].metadata
+    return read_metadata(PRINCIPLES_DIR / slug / "overview.mdx")
+
+def create_table_of_contents(writer: OutputWriter, posts: Dict[str, frontmatter.Post]):
     """Create a table of contents file"""
-    principles_dir = Path("/Users/joshshepherd/Desktop/GitHub/rethink-book/content/principles")
     
     toc_data = {
         "title": "Rethink: The 12 Principles",
@@ -128,8 +212,7 @@ def create_table_of_contents():
     }
     
     # Add introduction
-    intro_dir = principles_dir / "introduction"
-    if intro_dir.exists():
+    if (PRINCIPLES_DIR / "introduction").is_dir():
         toc_data["chapters"].append({
             "slug": "introduction",
             "title": "Introduction",
@@ -138,37 +221,52 @@ def create_table_of_contents():
     
     # Add principles
     for i in range(1, 13):
-        principle_dir = principles_dir / f"principle-{i}"
-        mdx_file = principle_dir / "overview.mdx"
-        
-        if mdx_file.exists():
-            with open(mdx_file, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
+        if (PRINCIPLES_DIR / f"principle-{i}" / "overview.mdx").exists():
+            metadata = chapter_metadata(f"principle-{i}", posts)
             
             toc_data["chapters"].append({
                 "slug": f"principle-{i}",
-                "title": post.metadata.get("title", f"Principle {i}"),
-                "description": post.metadata.get("description", f"Principle {i}"),
+                "title": metadata.get("title", f"Principle {i}"),
+                "description": metadata.get("description", f"Principle {i}"),
                 "principleNumber": i
             })
     
     # Save table of contents
     toc_file = Path("/Users/joshshepherd/Desktop/GitHub/rethink-book/content/table-of-contents.json")
-    with open(toc_file, 'w', encoding='utf-8') as f:
-        json.dump(toc_data, f, indent=2)
-    
-    print(f"✅ Created table of contents: {toc_file}")
+    if writer.write_json(toc_file, toc_data):
+        print(f"✅ Created table of contents: {toc_file}")
+    else:
+        print(f"⏭️  Table of contents unchanged: {toc_file}")
     return toc_data
 
+def create_content_bundle(writer: OutputWriter, chapters: Dict[str, Dict], toc_data: Dict):
+    """Write every chapter and the table of contents as one JSON file for the site build"""
+    bundle = {
+        "tableOfContents": toc_data,
+        "chapters": list(chapters.values()),
+    }
+    
+    if writer.write_json(BUNDLE_FILE, bundle, indent=None):
+        print(f"✅ Created content bundle: {BUNDLE_FILE}")
+    else:
+        print(f"⏭️  Content bundle unchanged: {BUNDLE_FILE}")
+
 def main():
     """Main function"""
     print("🚀 Final organization of converted PDF content...")
     
+    writer = OutputWriter()
+    
     # Update principle files
-    update_principle_files()
+    posts = update_principle_files(writer)
     
     # Create table of contents
-    toc_data = create_table_of_contents()
+    toc_data = create_table_of_contents(writer, posts)
+    
+    # Bundle everything for the site build
+    chapters = load_chapters(posts, load_previous_chapters())
+    create_content_bundle(writer, chapters, toc_data)
+    print(writer.summary())
     
     print("\n📊 Final Summary:")
     print("-" * 50)
@@ -10,72 +10,77 @@ markdown elements.
 import os
 import re
 from pathlib import Path
-import frontmatter
+from typing import List
+
+from build_manifest import BuildManifest, module_rule_files
+from frontmatter_io import dumps_post, load_post
+from mdx_blocks import Block, BlockBuilder, parse_blocks, render_blocks
+from output_writer import OutputWriter
+from term_matcher import TermMatcher
+
+THEOLOGICAL_TERMS = TermMatcher([
+    'missio Dei', 'incarnational', 'Christendom', 'post-Christendom',
+    'multiplication', 'discipleship', 'missional', 'ecclesiology'
+])
 
 class MDXFormatter:
     def __init__(self, principles_dir: str):
         self.principles_dir = Path(principles_dir)
+        self.writer = OutputWriter()
         
     def clean_and_format_content(self, content: str) -> str:
         """Clean and format content for proper MDX"""
-        lines = content.split('\n')
-        formatted_lines = []
+        return render_blocks(self.format_blocks(parse_blocks(content)))
+    
+    def format_blocks(self, blocks: List[Block]) -> List[Block]:
+        """Clean and format tokenized content"""
+        output = BlockBuilder()
         i = 0
         
-        while i < len(lines):
-            line = lines[i].strip()
+        while i < len(blocks):
+            block = blocks[i]
+            line = block.line
             
-            # Skip empty lines but preserve paragraph breaks
-            if not line:
-                formatted_lines.append('')
-                i += 1
-                continue
+            # Preserve paragraph breaks
+            if block.gap:
+                output.blank()
             
             # Format principle titles as main headers
-            if self.is_principle_title(line, i, lines):
-                title_lines = self.collect_title_lines(i, lines)
-                formatted_title = self.format_principle_title(title_lines)
-                formatted_lines.append(formatted_title)
+            if self.is_principle_title(line, i, blocks):
+                title_lines = self.collect_title_lines(i, blocks)
+                output.add(self.format_principle_title(title_lines))
+                output.blank()  # Add spacing after title
                 i += len(title_lines)
-                formatted_lines.append('')  # Add spacing after title
                 continue
             
             # Format quotes as blockquotes
             if self.is_quote_line(line):
-                quote = self.format_quote(line)
-                formatted_lines.append(quote)
-                formatted_lines.append('')  # Add spacing after quote
+                output.add(self.format_quote(line))
+                output.blank()  # Add spacing after quote
                 i += 1
                 continue
                 
             # Format section headers (all caps, short lines)
             if self.is_section_header(line):
-                header = self.format_section_header(line)
-                formatted_lines.append(header)
-                formatted_lines.append('')  # Add spacing after header
+                output.add(self.format_section_header(line))
+                output.blank()  # Add spacing after header
                 i += 1
                 continue
                 
             # Format scripture references and citations
-            if self.is_scripture_block(line, i, lines):
-                scripture_lines = self.collect_scripture_block(i, lines)
-                formatted_scripture = self.format_scripture_block(scripture_lines)
-                formatted_lines.extend(formatted_scripture)
-                formatted_lines.append('')  # Add spacing after scripture
-                i += len(scripture_lines)
+            if self.is_scripture_block(line, i, blocks):
+                scripture_lines = self.collect_scripture_block(i, blocks)
+                output.extend(self.format_scripture_block(scripture_lines))
+                output.blank()  # Add spacing after scripture
+                i = self.skip_source_lines(i, len(scripture_lines), blocks)
                 continue
             
             # Format emphasized text (italics for book titles, emphasis)
-            line = self.format_emphasis(line)
-            
-            # Add the line as a regular paragraph
-            formatted_lines.append(line)
+            # and add the line as a regular paragraph
+            output.add_rewritten(block, self.format_emphasis(line))
             i += 1
         
-        # Join lines and clean up excessive spacing
-        formatted_content = '\n'.join(formatted_lines)
-        formatted_content = re.sub(r'\n\s*\n\s*\n+', '\n\n', formatted_content)  # Max 2 newlines
-        return formatted_content.strip()
+        return output.blocks
     
     def is_principle_title(self, line: str, index: int, lines: list) -> bool:
         """Check if this line starts a principle title"""
@@ -83,21 +88,16 @@ class MDXFormatter:
                 ':' in line and 
                 len(line) > 10)
     
-    def collect_title_lines(self, start_index: int, lines: list) -> list:
+    def collect_title_lines(self, start_index: int, blocks: list) -> list:
         """Collect all lines that are part of the principle title"""
-        title_lines = []
-        i = start_index
-        
         # Get the first line (PRINCIPLE X:)
-        if i < len(lines):
-            title_lines.append(lines[i].strip())
-            i += 1
+        title_lines = [blocks[start_index].line]
+        i = start_index + 1
         
         # Collect following lines that are part of the title (all caps, no quotes)
-        while i < len(lines):
-            line = lines[i].strip()
-            if (line and 
-                line.isupper() and 
+        while i < len(blocks) and not blocks[i].gap:
+            line = blocks[i].line
+            if (blocks[i].upper and 
                 not line.startswith('"') and 
                 not line.startswith('—') and
                 len(line) < 50 and  # Reasonable title length
@@ -150,23 +150,36 @@ class MDXFormatter:
                 not line.endswith('"') and  # Multi-line quote
                 len(line) > 50)  # Substantial quote
     
-    def collect_scripture_block(self, start_index: int, lines: list) -> list:
+    def collect_scripture_block(self, start_index: int, blocks: list) -> list:
         """Collect scripture quotation block"""
         block_lines = []
         i = start_index
-        in_quote = True
         
-        while i < len(lines) and in_quote:
-            line = lines[i].strip()
-            if line:
-                block_lines.append(line)
-                # Check if quote ends
-                if line.endswith('"') or line.startswith('(') or line.startswith('—'):
-                    in_quote = False
+        while i < len(blocks):
+            line = blocks[i].line
+            block_lines.append(line)
+            # Check if quote ends
+            if line.endswith('"') or line.startswith('(') or line.startswith('—'):
+                break
             i += 1
             
         return block_lines
     
+    def skip_source_lines(self, start_index: int, count: int, blocks: list) -> int:
+        """Return the index of the block `count` source lines after the
+        block at start_index, counting the blank lines between blocks
+        
+        A scripture block is skipped by its number of non-blank lines, so
+        blank lines inside the quotation make the last lines of the quote
+        be read again.
+        """
+        i = start_index
+        while count > 0 and i < len(blocks):
+            i += 1
+            if i < len(blocks):
+                count -= blocks[i].gap + 1
+        return i
+    
     def format_scripture_block(self, block_lines: list) -> list:
         """Format scripture as blockquote"""
         formatted = []
@@ -187,25 +200,16 @@ class MDXFormatter:
         line = re.sub(r'"([^"]+)"', r'"\1"', line)  # Keep quotes as is for now
         
         # Bold important theological terms when they first appear
-        theological_terms = [
-            'missio Dei', 'incarnational', 'Christendom', 'post-Christendom',
-            'multiplication', 'discipleship', 'missional', 'ecclesiology'
-        ]
-        
-        for term in theological_terms:
-            # Only bold the first occurrence
-            pattern = rf'\b{re.escape(term)}\b'
-            if re.search(pattern, line, re.IGNORECASE):
-                line = re.sub(pattern, f'**{term}**', line, count=1, flags=re.IGNORECASE)
+        line = THEOLOGICAL_TERMS.emphasize(line, '**')
         
         return line
     
-    def format_mdx_file(self, mdx_path: Path):
+    def format_mdx_file(self, mdx_path: Path) -> bool:
         """Format a single MDX file"""
         try:
             # Read the file
             with open(mdx_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
+                post = load_post(f)
             
             print(f"📝 Formatting: {mdx_path.name}")
             
@@ -214,27 +218,36 @@ class MDXFormatter:
             post.content = formatted_content
             
             # Write back to file
-            with open(mdx_path, 'w', encoding='utf-8') as f:
-                f.write(frontmatter.dumps(post))
+            self.writer.write_text(mdx_path, dumps_post(post))
             
             print(f"✅ Completed: {mdx_path.name}")
+            return True
             
         except Exception as e:
             print(f"❌ Error formatting {mdx_path}: {e}")
+            return False
     
     def format_all_files(self):
         """Format all MDX files in the principles directory"""
         print("🚀 Starting MDX formatting for all principle files...")
         
+        manifest = BuildManifest('format_mdx_files', module_rule_files(__name__))
+        
         # Get all directories in principles
         for principle_dir in sorted(self.principles_dir.iterdir()):
             if principle_dir.is_dir():
                 mdx_file = principle_dir / 'overview.mdx'
                 if mdx_file.exists():
-                    self.format_mdx_file(mdx_file)
+                    if manifest.is_fresh(mdx_file):
+                        continue
+                    if self.format_mdx_file(mdx_file):
+                        manifest.record(mdx_file)
                 else:
                     print(f"⚠️  No overview.mdx found in {principle_dir.name}")
         
+        manifest.save()
+        print(manifest.summary())
+        print(self.writer.summary())
         print("✅ MDX formatting complete!")
 
 def main():
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Header-only frontmatter access for the content scripts
+
+frontmatter.load() reads and strips the whole file to get at a handful of
+metadata keys. read_metadata() reads lines only up to the closing `---`,
+so its cost depends on the size of the YAML header, not of the chapter.
+patch_metadata() changes metadata keys by re-serializing only the header
+and writing the body back verbatim. The result is byte-for-byte what
+frontmatter.load(), a metadata update and frontmatter.dumps() would write.
+
+load_post() and dumps_post() replace frontmatter.load() and
+frontmatter.dumps() with a faster codec that produces the same posts and
+the same text. Headers in the flat schema the converters write (string
+and integer values that PyYAML would write unquoted or single-quoted on
+one line) are parsed and written directly. Anything else goes to PyYAML,
+using libyaml's C loader and dumper when available, as frontmatter does;
+the two emitters wrap long double-quoted strings differently, so the
+dumper has to be the one frontmatter would pick.
+"""
+
+import re
+from pathlib import Path
+from typing import IO, Any, Dict, Optional, Tuple, Union
+
+import frontmatter
+import yaml
+
+from output_writer import OutputWriter
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+# Same delimiter rule as frontmatter's YAMLHandler
+BOUNDARY = re.compile(r'^-{3,}\s*$')
+BOUNDARY_LINE = re.compile(r'^-{3,}\s*$', re.MULTILINE)
+
+# The flat schema: one `key: value` line per key, with integer values and
+# string values that start with a letter (or a number, a space and a
+# letter, which no YAML type resolves) and hold only printable characters
+# that cannot start a line break, comment or YAML escape
+FLAT_KEY = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+FLAT_INT = re.compile(r'(?:0|-?[1-9][0-9]*)\Z')
+FLAT_TEXT = re.compile(r'(?:[A-Za-z]|[0-9]+ [A-Za-z])[\x20-\x7e\xa0-\u2027\u202a-\ud7ff\ue000-\ufefe\uff00-\ufffd]*\Z')
+FLAT_LINE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*): (.+)\Z")
+SINGLE_QUOTED = re.compile(r"'((?:[^']|'')*)'\Z")
+# Plain scalars that the YAML resolver reads as booleans or null
+RESERVED_WORDS = frozenset(spelling for word in ['yes', 'no', 'true', 'false', 'on', 'off', 'null']
+                           for spelling in (word, word.capitalize(), word.upper()))
+# PyYAML folds lines longer than this
+LINE_WIDTH = 80
+
+
+def is_plain(text: str) -> bool:
+    """Whether PyYAML writes a flat string value without quotes"""
+    return not (text[-1] in ' :' or ': ' in text or ' #' in text
+                or text in RESERVED_WORDS)
+
+
+def dump_flat(metadata: Dict[str, Any]) -> Optional[str]:
+    """Serialize a flat header exactly as PyYAML would, or return None
+    when the header is outside the flat schema"""
+    if not metadata:
+        return None
+    lines = []
+    for key in sorted(metadata):
+        value = metadata[key]
+        if not isinstance(key, str) or not FLAT_KEY.match(key) or key in RESERVED_WORDS:
+            return None
+        if type(value) is int:
+            scalar = str(value)
+        elif isinstance(value, str) and FLAT_TEXT.match(value):
+            scalar = value if is_plain(value) else "'" + value.replace("'", "''") + "'"
+        else:
+            return None
+        line = f"{key}: {scalar}"
+        if len(line) > LINE_WIDTH:
+            return None
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def load_flat(header: str) -> Optional[Dict[str, Any]]:
+    """Parse a flat header, or return None when it needs the YAML parser"""
+    metadata = {}
+    for line in filter(None, header.split('\n')):
+        match = FLAT_LINE.match(line)
+        if not match or match.group(1) in RESERVED_WORDS:
+            return None
+        key, value = match.groups()
+        if FLAT_INT.match(value):
+            metadata[key] = int(value)
+        elif FLAT_TEXT.match(value) and is_plain(value):
+            metadata[key] = value
+        else:
+            quoted = SINGLE_QUOTED.match(value)
+            if not quoted or not FLAT_TEXT.match(quoted.group(1)):
+                return None
+            metadata[key] = quoted.group(1).replace("''", "'")
+    return metadata
+
+
+def load_metadata(header: str) -> Dict[str, Any]:
+    data = load_flat(header)
+    if data is None:
+        data = yaml.load(header, Loader=SafeLoader)
+    return data if isinstance(data, dict) else {}
+
+
+def dump_metadata(metadata: Dict[str, Any]) -> str:
+    """Serialize metadata the way frontmatter.dumps() does"""
+    text = dump_flat(metadata)
+    if text is None:
+        text = yaml.dump(metadata, Dumper=SafeDumper, default_flow_style=False,
+                         allow_unicode=True)
+    # frontmatter strips the dump, including unicode spaces ending the last value
+    return text.strip()
+
+
+def loads_post(text: str) -> frontmatter.Post:
+    """Parse text into a post, like frontmatter.loads()"""
+    stripped = text.strip()
+    if not stripped.startswith('---'):
+        # Not YAML frontmatter; let frontmatter detect other formats
+        return frontmatter.loads(text)
+    split = split_frontmatter(stripped)
+    if split is None:
+        return frontmatter.Post(stripped)
+    return frontmatter.Post(split[1].strip(), **load_metadata(split[0]))
+
+
+def load_post(fd: Union[str, Path, IO[str]]) -> frontmatter.Post:
+    """Read a post from a path or open file, like frontmatter.load()"""
+    if hasattr(fd, 'read'):
+        return loads_post(fd.read())
+    with open(fd, 'r', encoding='utf-8') as f:
+        return loads_post(f.read())
+
+
+def dumps_post(post: frontmatter.Post) -> str:
+    """Serialize a post, like frontmatter.dumps()"""
+    return f"---\n{dump_metadata(post.metadata)}\n---\n\n{post.content}".strip()
+
+
+def read_head(path: Union[str, Path], body_lines: int = 0) -> Tuple[Dict[str, Any], str]:
+    """Read a file's metadata and the first body_lines lines of its body,
+    stopping there instead of reading the rest of the file"""
+    header_lines = None
+    head = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if header_lines is None:
+                if not line.strip():
+                    continue
+                if not BOUNDARY.match(line):
+                    # No frontmatter: the body starts here
+                    header_lines = []
+                    head.append(line)
+                    break
+                header_lines = [line]
+            elif BOUNDARY.match(line):
+                del header_lines[0]
+                break
+            else:
+                header_lines.append(line)
+        else:
+            # An unclosed header is not frontmatter, so it is all body
+            head = header_lines or []
+            header_lines = []
+
+        if body_lines:
+            for line in f:
+                if head or line.strip():
+                    head.append(line)
+                if len(head) >= body_lines:
+                    break
+
+    body = ''.join(head).lstrip()
+    if len(head) < body_lines:
+        body = body.rstrip()
+    return load_metadata(''.join(header_lines or [])), '\n'.join(body.split('\n')[:body_lines])
+
+
+def read_metadata(path: Union[str, Path]) -> Dict[str, Any]:
+    """Read only the YAML header of a file"""
+    return read_head(path)[0]
+
+
+def split_frontmatter(text: str) -> Optional[Tuple[str, str]]:
+    """Split text into its YAML header and body, or return None when it
+    has no frontmatter"""
+    text = text.strip()
+    if not BOUNDARY.match(text.split('\n', 1)[0]):
+        return None
+    parts = BOUNDARY_LINE.split(text, 2)
+    if len(parts) < 3:
+        return None
+    return parts[1], parts[2]
+
+
+def patch_metadata(path: Union[str, Path], updates: Dict[str, Any],
+                   writer: OutputWriter) -> frontmatter.Post:
+    """Set metadata keys in a file without re-serializing its body;
+    returns the patched post"""
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    split = split_frontmatter(text)
+    if split is None:
+        metadata, body = {}, text.strip()
+    else:
+        metadata, body = load_metadata(split[0]), split[1].strip()
+
+    metadata.update(updates)
+    writer.write_text(path, f"---\n{dump_metadata(metadata)}\n---\n\n{body}".strip())
+    return frontmatter.Post(body, **metadata)
@@ -6,55 +6,90 @@ This script creates a more organized structure by consolidating related sections
 and filtering out false positive chapter detections.
 """
 
-import fitz  # PyMuPDF
+import argparse
 import os
 import re
-import json
 from pathlib import Path
-from typing import List, Dict, Tuple
-import frontmatter
+from typing import List, Dict, Iterator, Optional, Tuple
 
-class ImprovedPDFToMDXConverter:
-    def __init__(self, pdf_path: str, output_dir: str):
+from page_text_cache import PageTextCache
+from pdf_chapters import (ChapterConverterMixin, add_converter_arguments, attach_figures,
+                          merge_same_slug, run_converter)
+from pdf_images import PDFImageExtractor
+from output_writer import OutputWriter
+from reading_stats import chapter_stats
+from run_report import RunReport
+
+# Running headers and footers dropped by clean_text()
+HEADER_LINES = frozenset(['RETHINK', 'THE 12 PRINCIPLES'])
+# One substitution for clean_text(): collapse runs of spaces and put a space
+# between a lowercase letter or period and a following uppercase letter
+INLINE_SPACING = re.compile(r' {2,}|(?<=[a-z.])(?=[A-Z])')
+
+class ImprovedPDFToMDXConverter(ChapterConverterMixin):
+    def __init__(self, pdf_path: str, output_dir: str, workers: int = 1,
+                 cache: Optional[PageTextCache] = None, report: Optional[RunReport] = None,
+                 page_range: Optional[Tuple[int, int]] = None, chapter_slug: Optional[str] = None,
+                 images: Optional[PDFImageExtractor] = None):
         self.pdf_path = pdf_path
         self.output_dir = Path(output_dir)
+        self.workers = workers
+        self.cache = cache
+        self.page_range = page_range  # 0-based (start, end) of chapter starts to convert
+        self.chapter_slug = chapter_slug
+        self.images = images
+        self.writer = OutputWriter()
+        self.report = report or RunReport('improved_pdf_to_mdx')
         self.doc = None
+        self.page_store = None
+        self.peak_buffered_chars = 0
+        self.detection_strategy = None
         self.chapters = []
-        
-    def open_pdf(self):
-        """Open the PDF document"""
-        try:
-            self.doc = fitz.open(self.pdf_path)
-            print(f"✅ Successfully opened PDF: {self.pdf_path}")
-            print(f"📄 Total pages: {len(self.doc)}")
-        except Exception as e:
-            print(f"❌ Error opening PDF: {e}")
-            raise
-    
-    def extract_text_from_page(self, page_num: int) -> str:
-        """Extract text from a specific page"""
-        page = self.doc[page_num]
-        text = page.get_text()
-        return text
     
     def get_main_chapters(self) -> List[Tuple[int, str]]:
         """Get the main chapter breaks (Introduction + 12 Principles)"""
+        outline = self.outline_chapter_starts()
+        if outline:
+            return sorted(outline.items())
+        
         main_chapters = []
         
         for page_num in range(len(self.doc)):
-            text = self.extract_text_from_page(page_num)
-            lines = text.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                # Look for main chapter patterns only
-                if self.is_main_chapter_title(line):
-                    main_chapters.append((page_num, line))
-                    print(f"📖 Found main chapter on page {page_num + 1}: {line}")
-                    break
+            title = self.find_main_chapter_title(page_num, self.extract_text_from_page(page_num))
+            if title:
+                main_chapters.append((page_num, title))
         
         return main_chapters
     
+    def outline_chapter_starts(self) -> Dict[int, str]:
+        """Read main chapter start pages from the PDF outline (bookmarks)
+        
+        Returns {page_num: title} for the outline entries, at any level, that
+        are main chapter titles, and records which detection strategy applies:
+        'outline', or 'scan' when the PDF has no usable outline and every page
+        has to be searched for titles.
+        """
+        starts = {}
+        with self.report.span('read_outline'):
+            for level, title, page in self.doc.get_toc(simple=True):
+                title = title.strip()
+                if page >= 1 and self.is_main_chapter_title(title) and page - 1 not in starts:
+                    starts[page - 1] = title
+                    self.report.log(f"📖 Found main chapter on page {page}: {title} (outline)")
+        
+        self.detection_strategy = 'outline' if starts else 'scan'
+        return starts
+    
+    def find_main_chapter_title(self, page_num: int, text: str) -> str:
+        """Return the first main chapter title on a page, or an empty string"""
+        for line in text.split('\n'):
+            line = line.strip()
+            # Look for main chapter patterns only
+            if self.is_main_chapter_title(line):
+                self.report.log(f"📖 Found main chapter on page {page_num + 1}: {line}")
+                return line
+        return ''
+    
     def is_main_chapter_title(self, line: str) -> bool:
         """Determine if a line is a main chapter title"""
         line = line.strip()
@@ -75,31 +110,21 @@ class ImprovedPDFToMDXConverter:
     def clean_text(self, text: str) -> str:
         """Clean and format text for MDX"""
         # Remove page numbers and headers/footers
-        lines = text.split('\n')
         cleaned_lines = []
         
-        for line in lines:
+        for line in text.split('\n'):
             line = line.strip()
             
             # Skip likely page numbers, headers, footers
-            if (re.match(r'^\d+$', line) or  # Just a number
-                line.upper() in ['RETHINK', 'THE 12 PRINCIPLES'] or  # Headers
-                len(line) < 3):  # Very short lines
+            if (len(line) < 3 or  # Very short lines
+                line.isdecimal() or  # Just a number
+                line.upper() in HEADER_LINES):  # Headers
                 continue
                 
             cleaned_lines.append(line)
         
-        text = '\n'.join(cleaned_lines)
-        
-        # Remove excessive whitespace
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
-        text = re.sub(r' +', ' ', text)
-        
-        # Fix common PDF extraction issues
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # Add space between words
-        text = re.sub(r'(\.)([A-Z])', r'. \2', text)  # Add space after periods
-        
-        return text.strip()
+        # Blank lines are gone, so only spacing within lines is left to fix
+        return INLINE_SPACING.sub(' ', '\n'.join(cleaned_lines)).strip()
     
     def create_slug(self, title: str) -> str:
         """Create a URL-friendly slug from title"""
@@ -120,40 +145,89 @@ class ImprovedPDFToMDXConverter:
     
     def extract_consolidated_chapters(self) -> List[Dict]:
         """Extract and consolidate chapters"""
-        main_chapters = self.get_main_chapters()
-        chapters = []
+        return list(self.iter_consolidated_chapters())
+    
+    def iter_consolidated_chapters(self, outline: Optional[Dict[int, str]] = None) -> Iterator[Dict]:
+        """Yield each consolidated chapter as soon as the next main chapter is seen
         
-        if not main_chapters:
-            print("❌ No main chapters found")
-            return []
+        Pages are streamed from the page store and only the pages of the
+        chapter being assembled are held in memory. Pages before the first
+        main chapter are skipped. With a page range or chapter slug, only
+        the selected chapters are assembled. The outline is read from the
+        PDF unless it is given.
+        """
+        self.peak_buffered_chars = 0
+        content_end = len(self.doc) - 10  # Exclude bibliography/references
+        chapter_number = 0
+        current = None  # (page_start, title) of the chapter being assembled
+        pages: List[str] = []
+        buffered_chars = 0
         
-        # Create consolidated chapters
-        for i, (page_num, title) in enumerate(main_chapters):
-            # Determine end page for this chapter
-            if i < len(main_chapters) - 1:
-                end_page = main_chapters[i + 1][0]
+        if outline is None:
+            outline = self.outline_chapter_starts()
+        start_page, end_page = self.selected_page_span(outline)
+        chapter_number = sum(1 for start in outline if start < start_page)
+        
+        for page_num, text in self.report.timed_pages('extract_pages',
+                                                      self.page_store.iter_pages(start_page, end_page)):
+            if outline:
+                # Chapter starts come from the outline; no page is searched
+                title = outline.get(page_num, '')
             else:
-                end_page = len(self.doc) - 10  # Exclude bibliography/references
-            
-            # Extract text for this chapter
-            chapter_text = ""
-            for p in range(page_num, min(end_page, len(self.doc))):
-                chapter_text += self.extract_text_from_page(p) + "\n"
-            
-            # Clean and format the title
-            clean_title = self.extract_chapter_title(title, chapter_text)
+                with self.report.span('detect_chapters', pages=1):
+                    title = self.find_main_chapter_title(page_num, text)
+            if title:
+                if current:
+                    chapter_number += 1
+                    if self.is_selected(current):
+                        yield self.build_chapter(current[1], current[0], page_num, pages, chapter_number)
+                current = (page_num, title)
+                pages = []
+                buffered_chars = 0
+                if self.page_range and page_num >= self.page_range[1]:
+                    # Every chapter starting in the page range is complete
+                    break
             
-            chapters.append({
-                'title': clean_title,
-                'slug': self.create_slug(title),
-                'content': self.clean_text(chapter_text),
-                'page_start': page_num + 1,
-                'page_end': min(end_page, len(self.doc)),
-                'chapter_number': i + 1,
-                'principle_number': self.extract_principle_number(title)
-            })
+            if current and self.is_selected(current):
+                pages.append(text)
+                buffered_chars += len(text)
+                self.peak_buffered_chars = max(self.peak_buffered_chars, buffered_chars)
         
-        return chapters
+        if not current:
+            if not self.partial:
+                print("❌ No main chapters found")
+            return
+        if not self.is_selected(current):
+            return
+        
+        page_num, title = current
+        chapter_number += 1
+        if end_page < len(self.doc):
+            # The span ended at the start of the next chapter
+            yield self.build_chapter(title, page_num, end_page, pages, chapter_number)
+            return
+        
+        # The last chapter stops before the back matter
+        yield self.build_chapter(title, page_num, content_end,
+                                 pages[:max(0, content_end - page_num)], chapter_number)
+    
+    def build_chapter(self, title: str, page_num: int, end_page: int,
+                      pages: List[str], chapter_number: int) -> Dict:
+        """Assemble a consolidated chapter from the text of its pages"""
+        chapter_text = ''.join(text + "\n" for text in pages)
+        
+        # Clean and format the title
+        clean_title = self.extract_chapter_title(title, chapter_text)
+        
+        return {
+            'title': clean_title,
+            'slug': self.create_slug(title),
+            'content': self.timed_clean_text(chapter_text),
+            'page_start': page_num + 1,
+            'page_end': min(end_page, len(self.doc)),
+            'chapter_number': chapter_number,
+            'principle_number': self.extract_principle_number(title)
+        }
     
     def extract_chapter_title(self, detected_title: str, chapter_text: str) -> str:
         """Extract a better chapter title from the content"""
@@ -191,23 +265,9 @@ class ImprovedPDFToMDXConverter:
         if chapter['principle_number'] > 0:
             frontmatter_data['principleNumber'] = chapter['principle_number']
             
+        frontmatter_data.update(chapter_stats(chapter))
         return frontmatter_data
     
-    def save_mdx_file(self, chapter: Dict, chapter_dir: Path):
-        """Save chapter as MDX file"""
-        # Create frontmatter
-        metadata = self.create_mdx_frontmatter(chapter)
-        
-        # Create the post with frontmatter
-        post = frontmatter.Post(chapter['content'], **metadata)
-        
-        # Save to file
-        mdx_file = chapter_dir / 'overview.mdx'
-        with open(mdx_file, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
-        
-        print(f"✅ Saved: {mdx_file}")
-    
     def create_chapter_metadata(self, chapter: Dict, chapter_dir: Path):
         """Create additional metadata files for the chapter"""
         # Create activities.json
@@ -219,7 +279,7 @@ class ImprovedPDFToMDXConverter:
                     "type": "reading",
                     "title": f"Read: {chapter['title']}",
                     "description": f"Read and understand the concepts in {chapter['title']}",
-                    "estimatedTime": 20 if chapter['principle_number'] > 0 else 15,
+                    "estimatedTime": chapter_stats(chapter)['readingMinutes'],
                     "required": True
                 }
             ]
@@ -236,9 +296,8 @@ class ImprovedPDFToMDXConverter:
                 "required": True
             })
         
-        with open(activities_file, 'w', encoding='utf-8') as f:
-            json.dump(activities, f, indent=2)
-        print(f"✅ Created: {activities_file}")
+        if self.writer.write_json(activities_file, activities):
+            self.report.log(f"✅ Created: {activities_file}")
         
         # Create quiz.json
         quiz_file = chapter_dir / 'quiz.json'
@@ -262,9 +321,8 @@ class ImprovedPDFToMDXConverter:
             ]
         }
         
-        with open(quiz_file, 'w', encoding='utf-8') as f:
-            json.dump(quiz, f, indent=2)
-        print(f"✅ Created: {quiz_file}")
+        if self.writer.write_json(quiz_file, quiz):
+            self.report.log(f"✅ Created: {quiz_file}")
     
     def convert(self):
         """Main conversion process"""
@@ -273,20 +331,24 @@ class ImprovedPDFToMDXConverter:
         
         # Open PDF
         self.open_pdf()
+        if self.partial:
+            print(f"🎯 Converting only {self.describe_selection()}")
+        if self.images:
+            with self.report.span('find_images', pages=len(self.doc)):
+                self.images.start(self.doc, self.pdf_path)
         
-        # Extract consolidated chapters
-        chapters = self.extract_consolidated_chapters()
-        print(f"📚 Found {len(chapters)} main chapters")
-        
-        if not chapters:
-            return []
-        
-        # Create output directory structure
+        # Stream consolidated chapters and save each one as soon as it and
+        # every other chapter with its slug are complete, so no folder is
+        # written twice
         principles_dir = self.output_dir / 'principles'
-        principles_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Save each chapter
-        for chapter in chapters:
+        outline = self.outline_chapter_starts()
+        chapters = []
+        for chapter in merge_same_slug(attach_figures(self.iter_consolidated_chapters(outline),
+                                                      self.images, self.report),
+                                       self.selected_slug_counts(outline)):
+            # Create output directory structure
+            principles_dir.mkdir(parents=True, exist_ok=True)
+            
             # Create chapter directory
             chapter_dir = principles_dir / chapter['slug']
             chapter_dir.mkdir(exist_ok=True)
@@ -295,17 +357,44 @@ class ImprovedPDFToMDXConverter:
             self.save_mdx_file(chapter, chapter_dir)
             
             # Create metadata files
-            self.create_chapter_metadata(chapter, chapter_dir)
+            with self.report.span('create_chapter_metadata'):
+                self.create_chapter_metadata(chapter, chapter_dir)
+            
+            # Keep only the summary; the chapter text is released here
+            chapters.append({k: v for k, v in chapter.items() if k != 'content'})
+        print(f"📚 Found {len(chapters)} main chapters")
+        if self.partial and not chapters:
+            print(f"❌ No chapter matches: {self.describe_selection()}")
+        
+        if self.images:
+            with self.report.span('encode_images'):
+                self.images.close()
         
         # Close PDF
         if self.doc:
             self.doc.close()
         
+        if not chapters:
+            return []
+        
+        print(f"🧭 Chapter detection: {self.detection_strategy}")
+        print(f"🔎 Text extraction calls: {self.page_store.get_text_calls} for {len(self.page_store)} pages")
+        if self.cache:
+            print(f"💾 Page cache: {self.cache.hits} hits, {self.cache.misses} misses, "
+                  f"{self.cache.evictions} evictions")
+        print(self.writer.summary())
+        if self.images:
+            print(self.images.summary())
+        print(f"🧠 Peak buffered page text: {self.peak_buffered_chars:,} chars")
         print(f"✅ Conversion complete! Generated {len(chapters)} chapters.")
         return chapters
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_converter_arguments(parser)
+    args = parser.parse_args()
+    
     pdf_path = "/Users/joshshepherd/Desktop/GitHub/rethink-book/docs/Rethink 12 Principles ebook.pdf"
     output_dir = "/Users/joshshepherd/Desktop/GitHub/rethink-book/content-improved"
     
@@ -313,8 +402,7 @@ def main():
         print(f"❌ PDF file not found: {pdf_path}")
         return
     
-    converter = ImprovedPDFToMDXConverter(pdf_path, output_dir)
-    chapters = converter.convert()
+    chapters = run_converter(ImprovedPDFToMDXConverter, 'improved_pdf_to_mdx', pdf_path, output_dir, args)
     
     # Print summary
     print("\n📊 Improved Conversion Summary:")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Lesson Splitting for oversized chapters
+
+Splits a formatted chapter into lesson files at heading boundaries, so the
+site can load and render one lesson at a time instead of a whole chapter.
+A section is a heading and the blocks up to the next heading; sections
+are packed in order into lessons of roughly equal size, none larger than
+the byte budget. A single section larger than the budget is split between
+blocks. Chapters within the budget are not split.
+
+Lessons are written next to overview.mdx as lesson-<n>-<slug>.mdx, the
+files loadPrincipleLessons() in src/lib/content-loader.ts reads, with
+their title, order, lesson count and reading statistics in frontmatter.
+Lesson files written by an earlier split that are no longer produced are
+removed; other lesson-*.mdx files are left alone.
+"""
+
+import math
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import frontmatter
+
+from frontmatter_io import dumps_post, load_post
+from mdx_blocks import HEADING, Block, render_blocks
+from output_writer import OutputWriter
+from reading_stats import block_stats
+
+DEFAULT_LESSON_BUDGET = 8 * 1024
+
+# Recorded in each lesson's frontmatter to tell generated lessons apart
+LESSON_SOURCE = 'overview.mdx'
+MAX_SLUG_WORDS = 6
+MINOR_WORDS = frozenset('a an and as at by for in of on or the to'.split())
+
+
+def block_size(block: Block) -> int:
+    """Bytes a block takes up in rendered MDX"""
+    return len(block.line.encode('utf-8')) + 1 + (1 if block.gap else 0)
+
+
+def split_sections(blocks: List[Block]) -> List[List[Block]]:
+    """Split blocks before each heading that follows text; consecutive
+    headings stay in one section"""
+    sections: List[List[Block]] = []
+    for block in blocks:
+        if not sections or (block.kind == HEADING
+                            and any(b.kind != HEADING for b in sections[-1])):
+            sections.append([])
+        sections[-1].append(block)
+    return sections
+
+
+def fit_section(section: List[Block], budget: int) -> List[List[Block]]:
+    """Split a section larger than the budget between blocks"""
+    parts: List[List[Block]] = [[]]
+    size = 0
+    for block in section:
+        if parts[-1] and size + block_size(block) > budget:
+            parts.append([])
+            size = 0
+        parts[-1].append(block)
+        size += block_size(block)
+    return parts
+
+
+def split_lessons(blocks: List[Block], budget: int = DEFAULT_LESSON_BUDGET) -> List[List[Block]]:
+    """Group a chapter's blocks into lessons under the budget; returns an
+    empty list when the chapter fits in one"""
+    total = sum(block_size(block) for block in blocks)
+    if total <= budget:
+        return []
+
+    # Aim for equal lessons rather than full ones and a short last one
+    target = total / math.ceil(total / budget)
+    lessons: List[List[Block]] = []
+    current: List[Block] = []
+    size = 0
+    for section in split_sections(blocks):
+        for part in fit_section(section, budget):
+            part_size = sum(block_size(block) for block in part)
+            if current and (size >= target or size + part_size > budget):
+                lessons.append(current)
+                current = []
+                size = 0
+            current += part
+            size += part_size
+    lessons.append(current)
+    return [[lesson[0].with_gap(0)] + lesson[1:] for lesson in lessons]
+
+
+def title_case(text: str) -> str:
+    """Title-case all-caps PDF headings; other text is kept as written"""
+    if not text.isupper():
+        return text
+    words = text.lower().split()
+    return ' '.join(word if i and word in MINOR_WORDS else word.capitalize()
+                    for i, word in enumerate(words))
+
+
+def lesson_heading(blocks: List[Block]) -> Optional[str]:
+    """The lesson's first heading, unless it is letter-spaced PDF text
+    whose word breaks are lost"""
+    for block in blocks:
+        if block.kind == HEADING:
+            words = block.text.strip('*_ ').split()
+            if words and sum(len(word) == 1 for word in words) * 2 <= len(words):
+                return title_case(' '.join(words))
+            return None
+    return None
+
+
+def lesson_slug(heading: Optional[str], number: int) -> str:
+    words = re.sub(r'[^a-z0-9]+', ' ', (heading or '').lower()).split()[:MAX_SLUG_WORDS]
+    return '-'.join([f"lesson-{number}"] + words)
+
+
+def write_lessons(chapter_dir: Path, metadata: Dict, blocks: List[Block], writer: OutputWriter,
+                  budget: int = DEFAULT_LESSON_BUDGET) -> int:
+    """Write a chapter's lessons and remove stale ones; returns the number
+    of lessons"""
+    lessons = split_lessons(blocks, budget)
+    chapter_title = title_case(str(metadata.get('title', chapter_dir.name)))
+    written = set()
+    for number, lesson in enumerate(lessons, 1):
+        heading = lesson_heading(lesson)
+        title = heading or f"{chapter_title}: Part {number}"
+        slug = lesson_slug(heading, number)
+        post = frontmatter.Post(render_blocks(lesson), title=title, slug=slug,
+                                principleSlug=chapter_dir.name, order=number,
+                                lessonCount=len(lessons), source=LESSON_SOURCE,
+                                **block_stats(lesson))
+        writer.write_text(chapter_dir / f"{slug}.mdx", dumps_post(post))
+        written.add(f"{slug}.mdx")
+
+    for lesson_file in chapter_dir.glob('lesson-*.mdx'):
+        if lesson_file.name not in written and load_post(lesson_file).metadata.get('source') == LESSON_SOURCE:
+            lesson_file.unlink()
+            writer.changed += 1
+    return len(lessons)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Typed Block IR for the MDX formatting rules
+
+An MDX body is tokenized once into a flat list of typed blocks, one per
+non-blank line: heading, blockquote, list item or paragraph. Each line is
+stripped and classified when its block is created, and a block records
+the number of blank lines before it. Formatting rules read and build block
+lists, so content is only split into lines when it is parsed and only
+joined back into MDX when it is rendered.
+
+The block form is exact for the formatters: they strip every line, treat
+any run of blank lines like a single one and collapse blank lines in
+their output, which is what parse_blocks() and render_blocks() do.
+"""
+
+import re
+from typing import Iterable, List
+
+HEADING = 'heading'
+BLOCKQUOTE = 'blockquote'
+LIST_ITEM = 'list_item'
+PARAGRAPH = 'paragraph'
+
+LIST_ITEM_PATTERN = re.compile(r'(?:[-*+]|\d+\.)\s')
+LIST_ITEM_STARTS = frozenset('-*+0123456789')
+
+
+class Block:
+    __slots__ = ('line', 'kind', 'level', 'upper', 'gap')
+
+    def __init__(self, line: str, gap: int = 0):
+        self.line = line
+        self.gap = gap
+        self.upper = line.isupper()
+
+        if line[0] == '#':
+            self.kind = HEADING
+            self.level = len(line) - len(line.lstrip('#'))
+        elif line[0] == '>':
+            self.kind = BLOCKQUOTE
+            self.level = 0
+        elif line[0] in LIST_ITEM_STARTS and LIST_ITEM_PATTERN.match(line):
+            self.kind = LIST_ITEM
+            self.level = 0
+        else:
+            self.kind = PARAGRAPH
+            self.level = 0
+
+    @property
+    def text(self) -> str:
+        """The line without its heading, blockquote or list marker"""
+        if self.kind == HEADING:
+            return self.line[self.level:].strip()
+        if self.kind == BLOCKQUOTE:
+            return self.line[1:].strip()
+        if self.kind == LIST_ITEM:
+            return LIST_ITEM_PATTERN.sub('', self.line, count=1).strip()
+        return self.line
+
+    def with_gap(self, gap: int) -> 'Block':
+        """Return this block with a different blank line count, without
+        classifying the line again"""
+        if gap == self.gap:
+            return self
+        block = Block.__new__(Block)
+        block.line = self.line
+        block.kind = self.kind
+        block.level = self.level
+        block.upper = self.upper
+        block.gap = gap
+        return block
+
+    def __repr__(self):
+        return f"Block({self.kind}, {self.line!r}{', gap' if self.gap else ''})"
+
+
+class BlockBuilder:
+    """Collect the output lines of a formatting rule as blocks
+
+    Lines are added the way the formatters append them to a list of
+    output lines: blank lines mark a paragraph break, runs of them count
+    once, and breaks at the start or end are dropped.
+    """
+    __slots__ = ('blocks', 'pending_gap')
+
+    def __init__(self):
+        self.blocks: List[Block] = []
+        self.pending_gap = False
+
+    def blank(self):
+        self.pending_gap = True
+
+    def add(self, line: str):
+        line = line.strip()
+        if not line:
+            self.pending_gap = True
+            return
+        self.blocks.append(Block(line, int(self.pending_gap and bool(self.blocks))))
+        self.pending_gap = False
+
+    def add_block(self, block: Block):
+        """Add an unchanged block, reusing its classification"""
+        self.blocks.append(block.with_gap(int(self.pending_gap and bool(self.blocks))))
+        self.pending_gap = False
+
+    def add_rewritten(self, block: Block, line: str):
+        """Add the result of rewriting a block's line; the block is reused
+        when the rewrite left the line unchanged"""
+        if line == block.line:
+            self.add_block(block)
+        else:
+            self.add(line)
+
+    def extend(self, lines: Iterable[str]):
+        for line in lines:
+            self.add(line)
+
+
+def parse_blocks(content: str) -> List[Block]:
+    """Tokenize an MDX body into blocks"""
+    blocks = []
+    gap = 0
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            gap += 1
+            continue
+        blocks.append(Block(line, gap if blocks else 0))
+        gap = 0
+    return blocks
+
+
+def render_blocks(blocks: List[Block]) -> str:
+    """Serialize blocks back into an MDX body"""
+    lines = []
+    for block in blocks:
+        if block.gap:
+            lines.append('')
+        lines.append(block.line)
+    return '\n'.join(lines)
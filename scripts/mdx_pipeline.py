@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Fused MDX Formatting Pipeline
+
+This script runs the rules of every MDX formatter and cleaner script as
+ordered stages over one in-memory document per file: each overview.mdx is
+read once, its frontmatter parsed once, its body tokenized once into
+typed blocks that every stage reads and rewrites, and the result rendered
+and written once. The output is equivalent to running the individual
+scripts one after another in the order of DEFAULT_STAGE_ORDER.
+
+Files that are unchanged since the current stages last wrote them are
+skipped, using the build manifest. Reading statistics are computed from
+the final blocks and written into each file's frontmatter and the reading
+activity in its activities.json. The formatted bodies are also indexed
+for site search as they pass through, and the index is written to
+public/search-index.json at the end of the run. With a lesson budget,
+chapters larger than the budget are also split at heading boundaries
+into ordered lesson files next to overview.mdx (see lesson_splitter).
+"""
+
+import argparse
+import inspect
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import frontmatter
+
+from build_manifest import DEFAULT_MANIFEST_PATH, BuildManifest, module_rule_files
+from frontmatter_io import dumps_post, load_post
+from lesson_splitter import DEFAULT_LESSON_BUDGET, write_lessons
+from mdx_blocks import Block, parse_blocks, render_blocks
+from output_writer import OutputWriter
+from reading_stats import block_stats, set_reading_time
+from run_report import RunReport
+from search_index import DEFAULT_SEARCH_INDEX_PATH, SearchIndexBuilder
+from format_mdx_files import MDXFormatter
+from enhanced_mdx_formatter import EnhancedMDXFormatter
+from final_mdx_formatter import FinalMDXFormatter
+from second_pass_cleaner import SecondPassMDXCleaner
+from simple_mdx_cleaner import clean_mdx_blocks
+from aggressive_mdx_cleaner import clean_mdx_blocks_aggressive
+from comprehensive_mdx_formatter import format_mdx_blocks
+
+DEFAULT_PRINCIPLES_DIR = Path(__file__).resolve().parent.parent / 'content' / 'principles'
+
+# The order the standalone scripts are run in
+DEFAULT_STAGE_ORDER = [
+    'format_mdx_files',
+    'enhanced_mdx_formatter',
+    'final_mdx_formatter',
+    'second_pass_cleaner',
+    'simple_mdx_cleaner',
+    'aggressive_mdx_cleaner',
+    'comprehensive_mdx_formatter',
+]
+
+Stage = Callable[[List[Block]], List[Block]]
+
+
+class MDXDocument:
+    """An MDX file held in memory while it passes through the stages"""
+
+    def __init__(self, path: Path, metadata: Dict, content: str):
+        self.path = path
+        self.metadata = metadata
+        self.content = content
+        # The final blocks of the content, once the stages have run
+        self.blocks: List[Block] = []
+
+    @classmethod
+    def load(cls, path: Path) -> 'MDXDocument':
+        with open(path, 'r', encoding='utf-8') as f:
+            post = load_post(f)
+        return cls(path, post.metadata, post.content)
+
+    def dumps(self) -> str:
+        return dumps_post(frontmatter.Post(self.content, **self.metadata))
+
+    def save(self, writer: OutputWriter) -> bool:
+        """Write the document unless the file already holds it; returns
+        True when the file changed"""
+        return writer.write_text(self.path, self.dumps())
+
+
+def default_stages(principles_dir: Path, book_dedup: bool = False) -> List[Tuple[str, Stage]]:
+    """Return the block rules of each formatter script, in script order"""
+    stages = {
+        'format_mdx_files': MDXFormatter(principles_dir).format_blocks,
+        'enhanced_mdx_formatter': EnhancedMDXFormatter(principles_dir).format_blocks,
+        'final_mdx_formatter': FinalMDXFormatter(principles_dir).format_blocks,
+        'second_pass_cleaner': SecondPassMDXCleaner(principles_dir, book_dedup).clean_blocks,
+        'simple_mdx_cleaner': clean_mdx_blocks,
+        'aggressive_mdx_cleaner': clean_mdx_blocks_aggressive,
+        'comprehensive_mdx_formatter': format_mdx_blocks,
+    }
+    return [(name, stages[name]) for name in DEFAULT_STAGE_ORDER]
+
+
+class MDXPipeline:
+    def __init__(self, principles_dir: str, stages: List[Tuple[str, Stage]] = None,
+                 manifest_path: Path = DEFAULT_MANIFEST_PATH, report: Optional[RunReport] = None,
+                 book_dedup: bool = False, search_index_path: Optional[Path] = None,
+                 lesson_budget: Optional[int] = None):
+        self.principles_dir = Path(principles_dir)
+        self.manifest_path = manifest_path
+        self.search_index_path = search_index_path
+        self.lesson_budget = lesson_budget
+        self.search_index = SearchIndexBuilder()
+        self.report = report or RunReport('mdx_pipeline')
+        self.writer = OutputWriter()
+        self.book_dedup = book_dedup
+        self.stages: List[Tuple[str, Stage]] = []
+        if stages is None:
+            stages = default_stages(self.principles_dir, book_dedup)
+        for name, stage in stages:
+            self.register(name, stage)
+
+    def register(self, name: str, stage: Stage):
+        """Append a block stage; stages run in registration order"""
+        self.stages.append((name, stage))
+
+    def run_stages(self, document: MDXDocument):
+        """Tokenize the document's content once, run every stage over the
+        blocks and render the result and its reading statistics once"""
+        with self.report.span('parse_blocks', bytes_in=len(document.content.encode('utf-8'))) as span:
+            blocks = parse_blocks(document.content)
+            span.lines = len(blocks)
+        
+        # JSX the converters append after the text, such as <img> tags, is
+        # not prose; the stages only see the blocks before it
+        split = len(blocks)
+        while split and blocks[split - 1].line[0] == '<':
+            split -= 1
+        blocks, markup = blocks[:split], blocks[split:]
+        
+        for name, stage in self.stages:
+            try:
+                with self.report.span(name, lines=len(blocks)):
+                    blocks = stage(blocks)
+            except Exception as e:
+                # A failing script left the file untouched, so keep the previous blocks
+                print(f"❌ Error in {name} for {document.path}: {e}")
+        
+        blocks += markup
+        with self.report.span('render_blocks', lines=len(blocks)) as span:
+            document.content = render_blocks(blocks)
+            span.bytes_out = len(document.content.encode('utf-8'))
+        document.blocks = blocks
+
+        with self.report.span('reading_stats', lines=len(blocks)):
+            document.metadata.update(block_stats(blocks))
+
+    def rule_files(self) -> List[str]:
+        """Source files whose changes invalidate previously formatted output:
+        this module, the stages' modules and everything they import"""
+        return (module_rule_files(__name__, *(stage.__module__ for _, stage in self.stages))
+                + [inspect.getsourcefile(stage) for _, stage in self.stages])
+
+    def manifest_name(self) -> str:
+        """Build manifest section of this pipeline; lessons are outputs too,
+        so each lesson budget is tracked separately"""
+        return f"mdx_pipeline:lessons-{self.lesson_budget}" if self.lesson_budget else 'mdx_pipeline'
+
+    def process_file(self, file_path: Path) -> bool:
+        """Read, format and write a single MDX file"""
+        try:
+            with self.report.span('read', bytes_in=file_path.stat().st_size):
+                document = MDXDocument.load(file_path)
+            self.run_stages(document)
+            if self.search_index_path:
+                with self.report.span('index'):
+                    self.search_index.add(file_path.parent.name, document.metadata, document.content)
+            with self.report.span('write') as span:
+                changed = document.save(self.writer)
+                span.bytes_out = file_path.stat().st_size
+            if self.lesson_budget:
+                with self.report.span('split_lessons', lines=len(document.blocks)):
+                    write_lessons(file_path.parent, document.metadata, document.blocks,
+                                  self.writer, self.lesson_budget)
+            self.update_activities(file_path.parent / 'activities.json', document.metadata['readingMinutes'])
+            self.report.log(f"✅ Formatted: {file_path.parent.name}" if changed
+                            else f"⏭️  Unchanged: {file_path.parent.name}")
+            return True
+        except Exception as e:
+            print(f"❌ Error processing {file_path}: {e}")
+            return False
+
+    def update_activities(self, activities_file: Path, minutes: int):
+        """Set the chapter's reading activity to its computed reading time"""
+        if not activities_file.exists():
+            return
+        with open(activities_file, 'r', encoding='utf-8') as f:
+            activities = json.load(f)
+        self.writer.write_json(activities_file, set_reading_time(activities, minutes))
+
+    def write_search_index(self):
+        """Write the search index, first indexing the chapters this run
+        skipped and dropping chapters that no longer exist"""
+        mdx_files = {path.parent.name: path for path in self.principles_dir.glob('*/overview.mdx')}
+        with self.report.span('index') as span:
+            for slug in list(self.search_index.documents):
+                if slug not in mdx_files:
+                    self.search_index.remove(slug)
+            for slug, mdx_file in mdx_files.items():
+                if slug not in self.search_index.documents:
+                    self.search_index.add_file(mdx_file)
+            changed = self.search_index.write(self.search_index_path, self.writer)
+            span.bytes_out = self.search_index_path.stat().st_size
+        self.report.log(f"🔍 Search index {'written' if changed else 'unchanged'}: "
+                        f"{len(self.search_index.documents)} chapters")
+
+    def process_all_files(self):
+        """Process all MDX files"""
+        print(f"🚀 Running {len(self.stages)} formatting stages in a single pass...")
+        # Book-wide dedup depends on every chapter, so no file can be skipped
+        manifest = None
+        if not self.book_dedup:
+            manifest = BuildManifest(self.manifest_name(), self.rule_files(), self.manifest_path)
+
+        for principle_dir in sorted(self.principles_dir.iterdir()):
+            if principle_dir.is_dir():
+                mdx_file = principle_dir / 'overview.mdx'
+                if mdx_file.exists():
+                    if manifest and manifest.is_fresh(mdx_file):
+                        continue
+                    if self.process_file(mdx_file) and manifest:
+                        manifest.record(mdx_file)
+
+        if self.search_index_path:
+            self.write_search_index()
+        if manifest:
+            manifest.save()
+            print(manifest.summary())
+        print(self.writer.summary())
+        print("✅ MDX formatting pipeline complete!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('principles_dir', nargs='?', default=str(DEFAULT_PRINCIPLES_DIR),
+                        help='directory of principle folders (default: content/principles)')
+    parser.add_argument('--book-dedup', action='store_true',
+                        help='remove lines repeated anywhere in the book, not only within a chapter')
+    parser.add_argument('--search-index', default=str(DEFAULT_SEARCH_INDEX_PATH),
+                        help='search index file to write (default: public/search-index.json)')
+    parser.add_argument('--no-search-index', action='store_true', help='do not build the search index')
+    parser.add_argument('--lesson-budget', type=int, default=DEFAULT_LESSON_BUDGET // 1024,
+                        help='split chapters larger than this many KB into lessons (default: 8)')
+    parser.add_argument('--no-lessons', action='store_true', help='do not split chapters into lessons')
+    parser.add_argument('--report', help='write a JSON run report with per-stage timings to this file')
+    parser.add_argument('--quiet', action='store_true', help='suppress per-file status messages')
+    args = parser.parse_args()
+    
+    report = RunReport('mdx_pipeline', quiet=args.quiet)
+    search_index_path = None if args.no_search_index else Path(args.search_index)
+    lesson_budget = None if args.no_lessons else args.lesson_budget * 1024
+    pipeline = MDXPipeline(args.principles_dir, report=report, book_dedup=args.book_dedup,
+                           search_index_path=search_index_path, lesson_budget=lesson_budget)
+    pipeline.process_all_files()
+    
+    print(report.summary())
+    if args.report:
+        report.write(args.report)
+        print(f"✅ Wrote run report: {args.report}")
+
+if __name__ == "__main__":
+    main()
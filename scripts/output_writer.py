@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Write-if-changed Output Writer for the content scripts
+
+Generated files are only written when their contents change. The new
+bytes are compared with the existing file first (by size, then contents),
+identical writes are skipped so mtimes stay put and the Next.js dev server
+and build caches are not invalidated, and changed files are written to a
+temporary file in the same directory and renamed over the original, so a
+reader never sees a half-written file.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Union
+
+
+def _default_mode() -> int:
+    """File mode for new files, as open() would create them"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+class OutputWriter:
+    def __init__(self):
+        self.changed = 0
+        self.unchanged = 0
+
+    def is_unchanged(self, path: Path, data: bytes) -> bool:
+        """Whether the file at path already holds exactly these bytes"""
+        try:
+            if path.stat().st_size != len(data):
+                return False
+            return path.read_bytes() == data
+        except FileNotFoundError:
+            return False
+
+    def write_bytes(self, path: Union[str, Path], data: bytes) -> bool:
+        """Atomically write data to path unless it is already there;
+        returns True when the file was changed"""
+        path = Path(path)
+        if self.is_unchanged(path, data):
+            self.unchanged += 1
+            return False
+
+        try:
+            mode = path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = _default_mode()
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self.changed += 1
+        return True
+
+    def write_text(self, path: Union[str, Path], text: str) -> bool:
+        return self.write_bytes(path, text.encode('utf-8'))
+
+    def write_json(self, path: Union[str, Path], data: Any, indent: int = 2) -> bool:
+        """Write data the way json.dump(data, f, indent=2) would"""
+        return self.write_text(path, json.dumps(data, indent=indent))
+
+    def summary(self) -> str:
+        return f"📝 Output: {self.changed} files changed, {self.unchanged} unchanged"
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Persistent Page Text Cache for the PDF to MDX converters
+
+Stores compressed per-page extraction results in a small SQLite database,
+keyed by the PDF's content hash, the page index and the extraction mode.
+Repeat conversions of an unchanged PDF read page text from here instead of
+running PyMuPDF text extraction again. The least recently used entries are
+evicted once the cache grows past its size limit.
+
+The database runs in WAL mode with a busy timeout, so several conversions
+can share one cache: readers never block, and a writer waits for another
+to commit instead of failing.
+"""
+
+import hashlib
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Set, Union
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / '.cache' / 'page-text'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# How long a writer waits for another process's transaction to commit
+BUSY_TIMEOUT_SECONDS = 60
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageTextCache:
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db = sqlite3.connect(str(self.cache_dir / 'pages.sqlite'), timeout=BUSY_TIMEOUT_SECONDS)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                doc_hash TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (doc_hash, page, mode)
+            )
+        ''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)')
+        self.total_bytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def cached_pages(self, doc_hash: str, mode: str) -> Set[int]:
+        """Return the page indexes cached for a document and extraction mode"""
+        rows = self.db.execute('SELECT page FROM pages WHERE doc_hash = ? AND mode = ?',
+                               (doc_hash, mode))
+        return {page for (page,) in rows}
+
+    def get(self, doc_hash: str, page: int, mode: str) -> Optional[str]:
+        """Return cached page text, or None on a miss"""
+        row = self.db.execute('SELECT data FROM pages WHERE doc_hash = ? AND page = ? AND mode = ?',
+                              (doc_hash, page, mode)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.db.execute('UPDATE pages SET last_used = ? WHERE doc_hash = ? AND page = ? AND mode = ?',
+                        (time.time(), doc_hash, page, mode))
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, doc_hash: str, page: int, mode: str, text: str):
+        """Store page text, evicting old entries if the cache is over its limit"""
+        data = zlib.compress(text.encode('utf-8'), 6)
+        old = self.db.execute('SELECT size FROM pages WHERE doc_hash = ? AND page = ? AND mode = ?',
+                              (doc_hash, page, mode)).fetchone()
+        if old:
+            self.total_bytes -= old[0]
+
+        self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                        (doc_hash, page, mode, data, len(data), time.time()))
+        self.total_bytes += len(data)
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its size limit"""
+        rows = self.db.execute('SELECT doc_hash, page, mode, size FROM pages ORDER BY last_used').fetchall()
+        for doc_hash, page, mode, size in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.db.execute('DELETE FROM pages WHERE doc_hash = ? AND page = ? AND mode = ?',
+                            (doc_hash, page, mode))
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def flush(self):
+        """Commit pending writes to disk"""
+        self.db.commit()
+
+    def close(self):
+        """Commit and close the cache database"""
+        self.db.commit()
+        self.db.close()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Chapter Handling shared by the PDF to MDX converters
+
+ChapterConverterMixin holds what both converters do the same way: opening
+the PDF, choosing the chapters of a partial conversion (--pages,
+--chapter), and the timed clean_text() and MDX writing stages.
+add_converter_arguments() and run_converter() are their shared command
+line.
+
+Chapters are written to a folder named by their slug, and different
+chapter titles can give the same slug: the basic converter finds several
+"POSSIBLE DISADVANTAGES" sections in the ebook, and the improved one maps
+both the contents page entry and the chapter itself to 'introduction'.
+Written as they come, the later chapter would overwrite the earlier one,
+losing its text and images, and a rerun would rewrite the folder twice.
+merge_same_slug() joins such chapters into one, in page order, so every
+folder is written once per run.
+"""
+
+import argparse
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import frontmatter
+
+from frontmatter_io import dumps_post
+from page_text_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, PageTextCache
+from pdf_images import DEFAULT_IMAGE_DIR, PDFImageExtractor
+from pdf_page_store import PageTextStore, open_document, parse_page_range
+from run_report import RunReport
+
+
+class ChapterConverterMixin:
+    """Stages shared by the PDF to MDX converters
+    
+    The converter provides pdf_path, workers, cache, page_range (0-based
+    (start, end) of chapter starts to convert), chapter_slug, writer and
+    report, and implements clean_text(), create_slug() and
+    create_mdx_frontmatter().
+    """
+    
+    def open_pdf(self):
+        """Open the PDF document"""
+        try:
+            with self.report.span('open_pdf', bytes_in=os.path.getsize(self.pdf_path)) as span:
+                self.doc = open_document(self.pdf_path)
+                span.pages = len(self.doc)
+            self.page_store = PageTextStore(self.doc, self.pdf_path, self.workers, self.cache)
+            print(f"✅ Successfully opened PDF: {self.pdf_path}")
+            print(f"📄 Total pages: {len(self.doc)}")
+            if self.workers > 1:
+                print(f"⚙️  Extracting pages with {self.workers} worker processes")
+        except Exception as e:
+            print(f"❌ Error opening PDF: {e}")
+            raise
+    
+    def extract_text_from_page(self, page_num: int) -> str:
+        """Extract text from a specific page"""
+        return self.page_store.get(page_num)
+    
+    @property
+    def partial(self) -> bool:
+        """Whether only some chapters are converted"""
+        return bool(self.page_range or self.chapter_slug)
+    
+    def is_selected(self, chapter: Optional[Tuple[int, str]]) -> bool:
+        """Whether a chapter, given as (page_num, title), is to be converted
+        
+        Pages before the first chapter are only kept in a full conversion.
+        """
+        if chapter is None:
+            return not self.partial
+        page_num, title = chapter
+        if self.page_range and not self.page_range[0] <= page_num < self.page_range[1]:
+            return False
+        return not self.chapter_slug or self.create_slug(title) == self.chapter_slug
+    
+    def selected_page_span(self, outline: Dict[int, str]) -> Tuple[int, int]:
+        """Return the (start, end) pages to stream for the selected chapters
+        
+        With an outline, the span runs from the first selected chapter to the
+        start of the chapter after the last one, so no other page is read.
+        Without one, chapter starts are only known by scanning from the
+        first page.
+        """
+        if not self.partial or not outline:
+            return 0, len(self.doc)
+        
+        starts = sorted(outline)
+        selected = [i for i, start in enumerate(starts) if self.is_selected((start, outline[start]))]
+        if not selected:
+            return 0, 0
+        last = selected[-1] + 1
+        return starts[selected[0]], starts[last] if last < len(starts) else len(self.doc)
+    
+    def selected_slug_counts(self, outline: Dict[int, str]) -> Optional[Counter]:
+        """The number of selected chapters per slug, known only from an outline"""
+        if not outline:
+            return None
+        return Counter(self.create_slug(title) for page_num, title in outline.items()
+                       if self.is_selected((page_num, title)))
+    
+    def describe_selection(self) -> str:
+        parts = []
+        if self.page_range:
+            parts.append(f"chapters starting on pages {self.page_range[0] + 1}-{self.page_range[1]}")
+        if self.chapter_slug:
+            parts.append(f"chapter '{self.chapter_slug}'")
+        return ', '.join(parts)
+    
+    def timed_clean_text(self, text: str) -> str:
+        """Run clean_text inside a report span"""
+        with self.report.span('clean_text', bytes_in=len(text.encode('utf-8')),
+                              lines=text.count('\n')) as span:
+            cleaned = self.clean_text(text)
+            span.bytes_out = len(cleaned.encode('utf-8'))
+        return cleaned
+    
+    def save_mdx_file(self, chapter: Dict, chapter_dir: Path):
+        """Save chapter as MDX file"""
+        # Create frontmatter
+        metadata = self.create_mdx_frontmatter(chapter)
+        
+        # Create the post with frontmatter
+        content = chapter['content']
+        if chapter.get('figures'):
+            content += '\n\n' + chapter['figures']
+        post = frontmatter.Post(content, **metadata)
+        
+        # Save to file
+        mdx_file = chapter_dir / 'overview.mdx'
+        with self.report.span('save_mdx_file') as span:
+            output = dumps_post(post)
+            changed = self.writer.write_text(mdx_file, output)
+            span.bytes_out = len(output.encode('utf-8'))
+        
+        self.report.log(f"✅ Saved: {mdx_file}" if changed else f"⏭️  Unchanged: {mdx_file}")
+
+
+def attach_figures(chapters: Iterable[Dict], images: Optional[PDFImageExtractor],
+                   report: RunReport) -> Iterator[Dict]:
+    """Reference each chapter's images, waiting for any still being encoded"""
+    for chapter in chapters:
+        if images:
+            with report.span('chapter_figures'):
+                chapter['figures'] = images.chapter_figures(chapter['page_start'] - 1,
+                                                            chapter['page_end'])
+        yield chapter
+
+
+def merge_chapter_parts(parts: List[Dict]) -> Dict:
+    """Join chapters sharing a slug into the first one"""
+    merged = dict(parts[0])
+    merged['content'] = '\n\n'.join(part['content'] for part in parts)
+    merged['page_end'] = parts[-1]['page_end']
+    if any('figures' in part for part in parts):
+        merged['figures'] = '\n\n'.join(part['figures'] for part in parts if part.get('figures'))
+    return merged
+
+
+def merge_same_slug(chapters: Iterable[Dict], slug_counts: Optional[Counter] = None) -> Iterator[Dict]:
+    """Yield chapters with those sharing a slug merged
+
+    A chapter is yielded as soon as its slug is complete: when slug_counts,
+    the number of chapters expected per slug (known from a PDF outline),
+    is reached. Without it, a later chapter may still share any slug, so
+    chapters are held until the end of the stream.
+    """
+    held: Dict[str, List[Dict]] = {}
+    for chapter in chapters:
+        parts = held.setdefault(chapter['slug'], [])
+        parts.append(chapter)
+        if slug_counts is not None and len(parts) >= slug_counts[chapter['slug']]:
+            yield merge_chapter_parts(held.pop(chapter['slug']))
+    for parts in held.values():
+        yield merge_chapter_parts(parts)
+
+
+def add_converter_arguments(parser: argparse.ArgumentParser):
+    """Add the options both converters take"""
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes for page extraction (default: 1, serial)')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR),
+                        help='directory of the persistent page text cache')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='evict least recently used pages beyond this size')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always extract page text with PyMuPDF')
+    parser.add_argument('--pages', type=parse_page_range, metavar='FIRST-LAST',
+                        help='only convert chapters starting on these pages (1-based, inclusive)')
+    parser.add_argument('--chapter', metavar='SLUG',
+                        help='only convert the chapter with this slug, e.g. principle-7')
+    parser.add_argument('--images', action='store_true',
+                        help='extract images into web formats and reference them in each chapter')
+    parser.add_argument('--image-dir', default=str(DEFAULT_IMAGE_DIR),
+                        help='folder for extracted images (default: public/images/book)')
+    parser.add_argument('--image-workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes for image encoding (default: one per CPU)')
+    parser.add_argument('--report', help='write a JSON run report with per-stage timings to this file')
+    parser.add_argument('--quiet', action='store_true', help='suppress per-file status messages')
+
+
+def run_converter(converter_class, report_name: str, pdf_path: str, output_dir: str,
+                  args: argparse.Namespace) -> List[Dict]:
+    """Convert a PDF with the options from add_converter_arguments()"""
+    cache = None if args.no_cache else PageTextCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
+    images = PDFImageExtractor(args.image_dir, workers=args.image_workers) if args.images else None
+    report = RunReport(report_name, quiet=args.quiet)
+    converter = converter_class(pdf_path, output_dir, workers=args.workers, cache=cache, report=report,
+                                page_range=args.pages, chapter_slug=args.chapter, images=images)
+    chapters = converter.convert()
+    if cache:
+        cache.close()
+    
+    print(report.summary())
+    if args.report:
+        report.write(args.report)
+        print(f"✅ Wrote run report: {args.report}")
+    return chapters
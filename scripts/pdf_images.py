@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Image Extraction for the PDF to MDX converters
+
+Walks the images placed on a document's pages once, deduplicates them by
+xref and by a hash of their contents, and transcodes each distinct image
+into web formats at several widths. As each chapter is written, its
+images are encoded in parallel by a process pool and referenced with
+responsive <img> tags at the end of its MDX; images outside the converted
+chapters, such as the cover, are never encoded.
+
+Output files are named by content hash and listed in images.json in the
+image folder, together with the images found on each page of every PDF
+converted so far (keyed by the PDF's content hash). A rerun on an
+unchanged PDF reads its images from there: no page is walked and no
+image is extracted or encoded again.
+
+WebP is written when Pillow is installed. Otherwise each width is encoded
+by PyMuPDF as both PNG and JPEG and the smaller file is kept; images with
+transparency are always PNG.
+"""
+
+import hashlib
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+from output_writer import OutputWriter
+from page_text_cache import file_sha256
+from pdf_page_store import open_document
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_IMAGE_DIR = Path(__file__).resolve().parent.parent / 'public' / 'images' / 'book'
+DEFAULT_IMAGE_URL = '/images/book'
+MANIFEST_NAME = 'images.json'
+MANIFEST_VERSION = 1
+
+# Widths written for each image; smaller images are also written at their own width
+IMAGE_WIDTHS = (480, 960, 1600)
+# Width of the src fallback and the largest width images are displayed at
+DISPLAY_WIDTH = 960
+# Rules, bullets and other decorations smaller than this are skipped
+MIN_IMAGE_SIDE = 48
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+# Part of every image's hash, so a change of encoder or settings re-encodes
+ENCODING = (f"webp:{WEBP_QUALITY}" if Image else f"png+jpeg:{JPEG_QUALITY}") + f":{IMAGE_WIDTHS}"
+
+# Document opened once per worker process by _init_worker()
+_worker_doc = None
+_worker_image_dir = None
+
+
+def _init_worker(pdf_path: str, image_dir: str):
+    """Open the PDF once for the lifetime of a worker process"""
+    global _worker_doc, _worker_image_dir
+    _worker_doc = open_document(pdf_path)
+    _worker_image_dir = Path(image_dir)
+
+
+def _encode_in_worker(job: Tuple[int, int, str]) -> Dict:
+    xref, smask, image_hash = job
+    return encode_image(_worker_doc, xref, smask, image_hash, _worker_image_dir)
+
+
+def image_widths(width: int) -> List[int]:
+    """Widths to write for an image of the given width, smallest first"""
+    return sorted({w for w in IMAGE_WIDTHS if w < width} | {min(width, IMAGE_WIDTHS[-1])})
+
+
+def load_pixmap(doc, xref: int, smask: int):
+    """Decode an image with its soft mask applied, in gray or RGB"""
+    pix = fitz.Pixmap(doc, xref)
+    if pix.colorspace and pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    if smask:
+        pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+    return pix
+
+
+def encode_pixmap(pix) -> Tuple[str, bytes]:
+    """Encode a pixmap for the web; returns (extension, data)"""
+    if Image:
+        mode = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}[pix.n]
+        buffer = io.BytesIO()
+        Image.frombytes(mode, (pix.width, pix.height), pix.samples).save(
+            buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+        return 'webp', buffer.getvalue()
+
+    candidates = [('png', pix.tobytes('png'))]
+    if not pix.alpha:
+        candidates.append(('jpg', pix.tobytes('jpeg', jpg_quality=JPEG_QUALITY)))
+    return min(candidates, key=lambda candidate: len(candidate[1]))
+
+
+def encode_image(doc, xref: int, smask: int, image_hash: str, image_dir: Path) -> Dict:
+    """Write an image at each of its widths; returns its manifest entry
+    plus the number of files changed and bytes written"""
+    pix = load_pixmap(doc, xref, smask)
+    writer = OutputWriter()
+    sources = []
+    size = 0
+    for width in image_widths(pix.width):
+        height = max(1, round(pix.height * width / pix.width))
+        scaled = pix if width == pix.width else fitz.Pixmap(pix, width, height, None)
+        ext, data = encode_pixmap(scaled)
+        filename = f"{image_hash}-{width}.{ext}"
+        writer.write_bytes(image_dir / filename, data)
+        sources.append([width, height, filename])
+        size += len(data)
+
+    return {
+        'hash': image_hash,
+        'width': pix.width,
+        'height': pix.height,
+        'sources': sources,
+        'changed': writer.changed,
+        'bytes': size,
+    }
+
+
+def image_tag(entry: Dict, url: str, alt: str) -> str:
+    """Responsive <img> for an image's manifest entry"""
+    sources = entry['sources']
+    srcset = ', '.join(f"{url}/{filename} {width}w" for width, _, filename in sources)
+    fitting = [source for source in sources if source[0] <= DISPLAY_WIDTH]
+    width, height, filename = fitting[-1] if fitting else sources[0]
+    return (f'<img src="{url}/{filename}" srcSet="{srcset}" '
+            f'sizes="(max-width: {width}px) 100vw, {width}px" width="{width}" height="{height}" '
+            f'alt="{alt}" loading="lazy" decoding="async" />')
+
+
+class PDFImageExtractor:
+    def __init__(self, image_dir: Union[str, Path] = DEFAULT_IMAGE_DIR, url: str = DEFAULT_IMAGE_URL,
+                 workers: int = 1):
+        self.image_dir = Path(image_dir)
+        self.url = url.rstrip('/')
+        self.workers = max(1, workers)
+        self.writer = OutputWriter()
+        self.manifest = self.load_manifest()
+        self.doc = None
+        self.pdf_path = None
+        self.doc_hash = None
+        self.pool = None
+        # page -> [image hash, xref, smask] of each distinct image, in order of appearance
+        self.page_images: Dict[int, List[List]] = {}
+        # image hash -> Future in the pool, or (xref, smask) when serial
+        self.pending: Dict[str, object] = {}
+        self.used = set()
+        self.encoded = 0
+        self.bytes_written = 0
+
+    def load_manifest(self) -> Dict:
+        try:
+            manifest = json.loads((self.image_dir / MANIFEST_NAME).read_text(encoding='utf-8'))
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'images': {}, 'documents': {}}
+
+    def is_written(self, image_hash: str) -> bool:
+        """Whether an image is in the manifest with all of its files on disk"""
+        entry = self.manifest['images'].get(image_hash)
+        return bool(entry) and all((self.image_dir / filename).exists()
+                                   for _, _, filename in entry['sources'])
+
+    def start(self, doc, pdf_path: str):
+        """Find the images on every page of a document, or read them from
+        the manifest when this PDF was converted before"""
+        self.doc = doc
+        self.pdf_path = pdf_path
+        self.doc_hash = file_sha256(pdf_path)
+        known = self.manifest['documents'].get(self.doc_hash)
+        if known is not None:
+            self.page_images = {int(page): images for page, images in known.items()}
+        else:
+            self.page_images = self.find_images()
+
+    def find_images(self) -> Dict[int, List[List]]:
+        """Walk every page's images once, hashing each xref once"""
+        xref_hashes: Dict[int, Optional[str]] = {}
+        page_images = {}
+        for page in self.doc:
+            images = []
+            for xref, smask, width, height, bpc, colorspace, *_ in page.get_images(full=True):
+                if xref not in xref_hashes:
+                    xref_hashes[xref] = self.hash_image(xref, smask, width, height, bpc, colorspace)
+                image_hash = xref_hashes[xref]
+                if image_hash and all(image[0] != image_hash for image in images):
+                    images.append([image_hash, xref, smask])
+            if images:
+                page_images[page.number] = images
+        return page_images
+
+    def hash_image(self, xref: int, smask: int, width: int, height: int, bpc: int,
+                   colorspace: str) -> Optional[str]:
+        """Content hash of an image's stream and soft mask, or None for
+        images that are skipped"""
+        if width < MIN_IMAGE_SIDE or height < MIN_IMAGE_SIDE or not colorspace:
+            return None
+        digest = hashlib.sha256(f"{ENCODING}:{width}x{height}:{bpc}:{colorspace}".encode('utf-8'))
+        digest.update(self.doc.xref_stream_raw(xref) or b'')
+        if smask:
+            digest.update(self.doc.xref_stream_raw(smask) or b'')
+        return digest.hexdigest()[:16]
+
+    def submit(self, image_hash: str, xref: int, smask: int):
+        """Start encoding an image unless it is written or already queued"""
+        if image_hash in self.pending or self.is_written(image_hash):
+            return
+        if self.workers == 1:
+            self.pending[image_hash] = (xref, smask)
+            return
+        if self.pool is None:
+            self.image_dir.mkdir(parents=True, exist_ok=True)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=_init_worker,
+                                            initargs=(self.pdf_path, str(self.image_dir)))
+        self.pending[image_hash] = self.pool.submit(_encode_in_worker, (xref, smask, image_hash))
+
+    def finish(self, image_hash: str):
+        """Wait for an image being encoded and record it in the manifest"""
+        job = self.pending.pop(image_hash, None)
+        if job is None:
+            return
+        if isinstance(job, tuple):
+            self.image_dir.mkdir(parents=True, exist_ok=True)
+            result = encode_image(self.doc, *job, image_hash, self.image_dir)
+        else:
+            result = job.result()
+        self.encoded += 1
+        self.writer.changed += result.pop('changed')
+        self.bytes_written += result.pop('bytes')
+        self.manifest['images'][result.pop('hash')] = result
+
+    def chapter_figures(self, page_start: int, page_end: int) -> str:
+        """MDX for the images on pages page_start..page_end-1 (0-based), each
+        distinct image once, in page order. The chapter's images are encoded
+        in parallel, and only images of converted chapters are encoded."""
+        figures = {}
+        for page_num in range(page_start, page_end):
+            for image_hash, xref, smask in self.page_images.get(page_num, []):
+                if image_hash not in figures:
+                    figures[image_hash] = page_num
+                    self.submit(image_hash, xref, smask)
+
+        tags = []
+        for image_hash, page_num in figures.items():
+            self.finish(image_hash)
+            tags.append(image_tag(self.manifest['images'][image_hash], self.url,
+                                  f"Image from page {page_num + 1}"))
+        self.used.update(figures)
+        return '\n\n'.join(tags)
+
+    def close(self):
+        """Finish any remaining images and write the manifest"""
+        for image_hash in list(self.pending):
+            self.finish(image_hash)
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+        if self.doc_hash:
+            # Merge with what other conversions sharing the folder wrote
+            # meanwhile; an entry lost to a race only costs a re-encode
+            manifest = self.load_manifest()
+            manifest['images'].update(self.manifest['images'])
+            manifest['documents'].update(self.manifest['documents'])
+            manifest['documents'][self.doc_hash] = {
+                str(page): images for page, images in sorted(self.page_images.items())}
+            manifest['images'] = dict(sorted(manifest['images'].items()))
+            self.manifest = manifest
+            self.image_dir.mkdir(parents=True, exist_ok=True)
+            self.writer.write_json(self.image_dir / MANIFEST_NAME, manifest, indent=None)
+
+    def summary(self) -> str:
+        return (f"🖼️  Images: {len(self.used)} referenced, {self.encoded} encoded "
+                f"({self.bytes_written / 1e6:.1f} MB), {len(self.used) - self.encoded} reused")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Page Text Store for the PDF to MDX converters
+
+Extracts the text of each PDF page exactly once so that chapter detection
+and chapter assembly read from the same results instead of calling
+page.get_text() on every page twice.
+
+With more than one worker, pages are extracted by a process pool: each
+worker opens the document once and extracts a contiguous page range, and
+the results are merged back in page order.
+
+iter_pages() streams pages in order without retaining them, so callers
+that emit chapters as they go only hold the pages they still need.
+
+Documents are opened by path. open_document() can also open one from a
+read-only memory map, which benchmark_pipeline.py compares; the map gave
+no memory saving, since MuPDF's own buffers dominate either way, and a
+PDF rewritten in place while mapped (as the watcher sees it) can crash
+the process with SIGBUS, so no converter uses it.
+
+When a PageTextCache is supplied, pages already extracted from the same
+PDF contents are read from the cache and only the remaining pages are
+extracted with PyMuPDF.
+"""
+
+import argparse
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from page_text_cache import PageTextCache, file_sha256
+
+# get_text() mode used for extraction; part of the cache key together with
+# the PyMuPDF version, since either can change the extracted text
+EXTRACTION_MODE = 'text'
+
+# Document opened once per worker process by _init_worker()
+_worker_doc = None
+
+# When streaming in parallel, pages are split into this many ranges per
+# worker so only a small window of extracted text is in flight at a time
+STREAM_RANGES_PER_WORKER = 4
+
+# Commit cache writes every this many pages, so a cache shared by several
+# conversions is never locked by one of them for a whole document
+CACHE_FLUSH_PAGES = 32
+
+
+def open_document(pdf_path: str, mapped: bool = False):
+    """Open a PDF by path, or with mapped=True from a read-only memory map
+    of the file. The document holds the only reference to the map, which
+    is unmapped when the document is garbage collected."""
+    if mapped:
+        with open(pdf_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                return fitz.open(stream=view, filetype='pdf')
+    return fitz.open(pdf_path)
+
+
+def _init_worker(pdf_path: str):
+    """Open the PDF once for the lifetime of a worker process"""
+    global _worker_doc
+    _worker_doc = open_document(pdf_path)
+
+
+def _extract_range(page_range: Tuple[int, int]) -> List[str]:
+    """Extract the text of a contiguous page range in a worker process"""
+    start, end = page_range
+    return [_worker_doc[page_num].get_text(EXTRACTION_MODE) for page_num in range(start, end)]
+
+
+def split_page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split page_count pages into at most `parts` contiguous (start, end) ranges"""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def parse_page_range(value: str) -> Tuple[int, int]:
+    """Parse a 1-based inclusive page range such as "12-20" or "7" into
+    0-based (start, end) page numbers"""
+    first, _, last = value.partition('-')
+    try:
+        start, end = int(first), int(last or first)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid page range: {value!r}")
+    if start < 1 or end < start:
+        raise argparse.ArgumentTypeError(f"invalid page range: {value!r}")
+    return start - 1, end
+
+
+def contiguous_runs(page_nums: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted page numbers into contiguous (start, end) ranges"""
+    runs = []
+    for page_num in page_nums:
+        if runs and runs[-1][1] == page_num:
+            runs[-1] = (runs[-1][0], page_num + 1)
+        else:
+            runs.append((page_num, page_num + 1))
+    return runs
+
+
+class PageTextStore:
+    def __init__(self, doc, pdf_path: Optional[str] = None, workers: int = 1,
+                 cache: Optional[PageTextCache] = None):
+        self.doc = doc
+        self.pdf_path = pdf_path
+        self.workers = max(1, workers)
+        self.page_count = len(doc)
+        self.pages: Dict[int, str] = {}
+        self.get_text_calls = 0
+
+        self.cache = cache if pdf_path else None
+        self.cache_mode = f"{EXTRACTION_MODE}:pymupdf-{fitz.VersionBind}"
+        self.doc_hash = file_sha256(pdf_path) if self.cache else None
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def load(self):
+        """Extract and retain every page in a single pass over the document"""
+        for page_num, text in self.iter_pages():
+            self.pages[page_num] = text
+        return self
+
+    def get(self, page_num: int) -> str:
+        """Return the text of a page, extracting it on first access only"""
+        text = self.pages.get(page_num)
+        if text is None:
+            text = self.read_cached(page_num)
+        if text is None:
+            text = self.extract(page_num)
+        self.pages[page_num] = text
+        if self.cache and len(self.pages) % CACHE_FLUSH_PAGES == 0:
+            self.cache.flush()
+        return text
+
+    def extract(self, page_num: int) -> str:
+        """Extract the text of a page without retaining it"""
+        self.get_text_calls += 1
+        text = self.doc[page_num].get_text(EXTRACTION_MODE)
+        self.write_cached(page_num, text)
+        return text
+
+    def read_cached(self, page_num: int) -> Optional[str]:
+        """Return page text from the persistent cache, if there is one"""
+        if not self.cache:
+            return None
+        return self.cache.get(self.doc_hash, page_num, self.cache_mode)
+
+    def write_cached(self, page_num: int, text: str):
+        """Store page text in the persistent cache, if there is one"""
+        if self.cache:
+            self.cache.put(self.doc_hash, page_num, self.cache_mode, text)
+
+    def iter_pages(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page_num, text) in page order without retaining the text,
+        optionally for the pages start..end-1 only"""
+        end = self.page_count if end is None else min(end, self.page_count)
+        cached = self.cache.cached_pages(self.doc_hash, self.cache_mode) if self.cache else set()
+        missing = [page_num for page_num in range(start, end)
+                   if page_num not in self.pages and page_num not in cached]
+        if self.cache:
+            self.cache.misses += len(missing)
+        
+        if self.workers > 1 and len(missing) > 1:
+            extracted = self.iter_extracted_parallel(missing)
+        else:
+            extracted = ((page_num, self.extract(page_num)) for page_num in missing)
+        
+        missing_pages = set(missing)
+        for page_num in range(start, end):
+            text = self.pages.get(page_num)
+            if page_num in missing_pages:
+                _, text = next(extracted)
+            elif text is None:
+                # Fall back to extraction if the entry was evicted meanwhile
+                text = self.read_cached(page_num)
+                if text is None:
+                    text = self.extract(page_num)
+            if self.cache and (page_num - start + 1) % CACHE_FLUSH_PAGES == 0:
+                self.cache.flush()
+            yield page_num, text
+        
+        if self.cache:
+            self.cache.flush()
+
+    def iter_extracted_parallel(self, page_nums: List[int]) -> Iterator[Tuple[int, str]]:
+        """Extract pages in order from a pool, keeping a bounded window in flight"""
+        ranges = deque()
+        for start, end in contiguous_runs(page_nums):
+            parts = self.workers * STREAM_RANGES_PER_WORKER * (end - start) // len(page_nums)
+            ranges.extend((start + s, start + e)
+                          for s, e in split_page_ranges(end - start, max(1, parts)))
+        
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.pdf_path,)) as pool:
+            in_flight = deque()
+            while ranges or in_flight:
+                while ranges and len(in_flight) < self.workers * 2:
+                    page_range = ranges.popleft()
+                    in_flight.append((page_range, pool.submit(_extract_range, page_range)))
+                
+                (start, end), future = in_flight.popleft()
+                texts = future.result()
+                self.get_text_calls += end - start
+                for page_num, text in zip(range(start, end), texts):
+                    self.write_cached(page_num, text)
+                    yield page_num, text
@@ -6,55 +6,88 @@ This script converts a PDF file to organized MDX files by chapters,
 preparing them for use in a Next.js ebook application.
 """
 
-import fitz  # PyMuPDF
+import argparse
 import os
 import re
-import json
 from pathlib import Path
-from typing import List, Dict, Tuple
-import frontmatter
+from typing import List, Dict, Iterator, Optional, Tuple
 
-class PDFToMDXConverter:
-    def __init__(self, pdf_path: str, output_dir: str):
+from page_text_cache import PageTextCache
+from pdf_chapters import (ChapterConverterMixin, add_converter_arguments, attach_figures,
+                          merge_same_slug, run_converter)
+from pdf_images import PDFImageExtractor
+from output_writer import OutputWriter
+from reading_stats import chapter_stats
+from run_report import RunReport
+
+# One substitution for clean_text(): collapse runs of spaces and put a space
+# between a lowercase letter or period and a following uppercase letter
+INLINE_SPACING = re.compile(r' {2,}|(?<=[a-z.])(?=[A-Z])')
+SENTENCE_ENDS = ('.', '!', '?', ':')
+
+class PDFToMDXConverter(ChapterConverterMixin):
+    def __init__(self, pdf_path: str, output_dir: str, workers: int = 1,
+                 cache: Optional[PageTextCache] = None, report: Optional[RunReport] = None,
+                 page_range: Optional[Tuple[int, int]] = None, chapter_slug: Optional[str] = None,
+                 images: Optional[PDFImageExtractor] = None):
         self.pdf_path = pdf_path
         self.output_dir = Path(output_dir)
+        self.workers = workers
+        self.cache = cache
+        self.page_range = page_range  # 0-based (start, end) of chapter starts to convert
+        self.chapter_slug = chapter_slug
+        self.images = images
+        self.writer = OutputWriter()
+        self.report = report or RunReport('pdf_to_mdx_converter')
         self.doc = None
+        self.page_store = None
+        self.peak_buffered_chars = 0
+        self.detection_strategy = None
         self.chapters = []
-        
-    def open_pdf(self):
-        """Open the PDF document"""
-        try:
-            self.doc = fitz.open(self.pdf_path)
-            print(f"✅ Successfully opened PDF: {self.pdf_path}")
-            print(f"📄 Total pages: {len(self.doc)}")
-        except Exception as e:
-            print(f"❌ Error opening PDF: {e}")
-            raise
-    
-    def extract_text_from_page(self, page_num: int) -> str:
-        """Extract text from a specific page"""
-        page = self.doc[page_num]
-        text = page.get_text()
-        return text
     
     def detect_chapter_breaks(self) -> List[Tuple[int, str]]:
         """Detect chapter breaks and titles"""
+        outline = self.outline_chapter_starts()
+        if outline:
+            return sorted(outline.items())
+        
         chapter_breaks = []
         
         for page_num in range(len(self.doc)):
-            text = self.extract_text_from_page(page_num)
-            lines = text.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                # Look for chapter patterns
-                if self.is_chapter_title(line):
-                    chapter_breaks.append((page_num, line))
-                    print(f"📖 Found chapter on page {page_num + 1}: {line}")
-                    break
+            title = self.find_chapter_title(page_num, self.extract_text_from_page(page_num))
+            if title:
+                chapter_breaks.append((page_num, title))
         
         return chapter_breaks
     
+    def outline_chapter_starts(self) -> Dict[int, str]:
+        """Read chapter start pages from the PDF outline (bookmarks)
+        
+        Returns {page_num: title} for the top-level outline entries and
+        records which detection strategy applies: 'outline', or 'scan' when
+        the PDF has no outline and every page has to be searched for titles.
+        """
+        starts = {}
+        with self.report.span('read_outline'):
+            for level, title, page in self.doc.get_toc(simple=True):
+                title = title.strip()
+                if level == 1 and page >= 1 and title and page - 1 not in starts:
+                    starts[page - 1] = title
+                    self.report.log(f"📖 Found chapter on page {page}: {title} (outline)")
+        
+        self.detection_strategy = 'outline' if starts else 'scan'
+        return starts
+    
+    def find_chapter_title(self, page_num: int, text: str) -> str:
+        """Return the first chapter title on a page, or an empty string"""
+        for line in text.split('\n'):
+            line = line.strip()
+            # Look for chapter patterns
+            if self.is_chapter_title(line):
+                self.report.log(f"📖 Found chapter on page {page_num + 1}: {line}")
+                return line
+        return ''
+    
     def is_chapter_title(self, line: str) -> bool:
         """Determine if a line is likely a chapter title"""
         line = line.strip()
@@ -88,42 +121,24 @@ class PDFToMDXConverter:
         return False
     
     def clean_text(self, text: str) -> str:
-        """Clean and format text for MDX"""
-        # Remove excessive whitespace
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
-        text = re.sub(r' +', ' ', text)
-        
-        # Fix common PDF extraction issues
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # Add space between lowercase and uppercase
-        text = re.sub(r'(\.)([A-Z])', r'. \2', text)  # Add space after periods
-        
-        # Clean up line breaks in paragraphs
-        lines = text.split('\n')
-        cleaned_lines = []
+        """Clean and format text for MDX
         
-        for i, line in enumerate(lines):
+        Lines are stripped and joined without breaks; a line that does not
+        end a sentence is joined to a following line that does not start
+        with a capital by a space.
+        """
+        parts = []
+        previous = ''
+        for line in INLINE_SPACING.sub(' ', text).split('\n'):
             line = line.strip()
-            if not line:
-                cleaned_lines.append('')
-                continue
-                
-            # If line ends mid-sentence and next line continues, join them
-            if (i < len(lines) - 1 and 
-                line and 
-                not line.endswith('.') and 
-                not line.endswith('!') and 
-                not line.endswith('?') and
-                not line.endswith(':') and
-                lines[i + 1].strip() and
-                not lines[i + 1].strip()[0].isupper()):
-                cleaned_lines.append(line + ' ')
-            else:
-                cleaned_lines.append(line)
-        
-        text = ''.join(cleaned_lines)
-        text = re.sub(r' +', ' ', text)
+            if (line and previous and
+                not previous.endswith(SENTENCE_ENDS) and
+                not line[0].isupper()):
+                parts.append(' ')
+            parts.append(line)
+            previous = line
         
-        return text.strip()
+        return ''.join(parts).strip()
     
     def create_slug(self, title: str) -> str:
         """Create a URL-friendly slug from title"""
@@ -133,46 +148,82 @@ class PDFToMDXConverter:
     
     def extract_chapters(self) -> List[Dict]:
         """Extract chapters from the PDF"""
-        chapter_breaks = self.detect_chapter_breaks()
-        chapters = []
+        return list(self.iter_chapters())
+    
+    def iter_chapters(self, outline: Optional[Dict[int, str]] = None) -> Iterator[Dict]:
+        """Yield each chapter as soon as the next chapter break is seen
         
-        if not chapter_breaks:
-            # If no chapters detected, treat entire PDF as one chapter
-            full_text = ""
-            for page_num in range(len(self.doc)):
-                full_text += self.extract_text_from_page(page_num) + "\n"
+        Pages are streamed from the page store and only the pages of the
+        chapter being assembled are held in memory. Pages before the first
+        chapter break are buffered in case no chapter is found at all, in
+        which case the entire PDF is treated as one chapter. With a page
+        range or chapter slug, only the selected chapters are assembled.
+        The outline is read from the PDF unless it is given.
+        """
+        self.peak_buffered_chars = 0
+        chapter_number = 0
+        current = None  # (page_start, title) of the chapter being assembled
+        pages: List[str] = []
+        buffered_chars = 0
+        
+        if outline is None:
+            outline = self.outline_chapter_starts()
+        start_page, end_page = self.selected_page_span(outline)
+        chapter_number = sum(1 for start in outline if start < start_page)
+        
+        for page_num, text in self.report.timed_pages('extract_pages',
+                                                      self.page_store.iter_pages(start_page, end_page)):
+            if outline:
+                # Chapter starts come from the outline; no page is searched
+                title = outline.get(page_num, '')
+            else:
+                with self.report.span('detect_chapters', pages=1):
+                    title = self.find_chapter_title(page_num, text)
+            if title:
+                if current:
+                    chapter_number += 1
+                    if self.is_selected(current):
+                        yield self.build_chapter(current[1], current[0], page_num, pages, chapter_number)
+                current = (page_num, title)
+                pages = []
+                buffered_chars = 0
+                if self.page_range and page_num >= self.page_range[1]:
+                    # Every chapter starting in the page range is complete
+                    break
             
-            chapters.append({
+            if not self.is_selected(current):
+                continue
+            pages.append(text)
+            buffered_chars += len(text)
+            self.peak_buffered_chars = max(self.peak_buffered_chars, buffered_chars)
+        
+        if current:
+            if self.is_selected(current):
+                chapter_number += 1
+                yield self.build_chapter(current[1], current[0], end_page, pages, chapter_number)
+        elif not self.partial:
+            # If no chapters detected, treat entire PDF as one chapter
+            yield {
                 'title': 'Rethink 12 Principles',
                 'slug': 'rethink-12-principles',
-                'content': self.clean_text(full_text),
+                'content': self.timed_clean_text(''.join(text + "\n" for text in pages)),
                 'page_start': 1,
                 'page_end': len(self.doc)
-            })
-        else:
-            # Extract content for each chapter
-            for i, (page_num, title) in enumerate(chapter_breaks):
-                # Determine end page for this chapter
-                if i < len(chapter_breaks) - 1:
-                    end_page = chapter_breaks[i + 1][0]
-                else:
-                    end_page = len(self.doc)
-                
-                # Extract text for this chapter
-                chapter_text = ""
-                for p in range(page_num, end_page):
-                    chapter_text += self.extract_text_from_page(p) + "\n"
-                
-                chapters.append({
-                    'title': title.strip(),
-                    'slug': self.create_slug(title),
-                    'content': self.clean_text(chapter_text),
-                    'page_start': page_num + 1,
-                    'page_end': end_page,
-                    'chapter_number': i + 1
-                })
+            }
+    
+    def build_chapter(self, title: str, page_num: int, end_page: int,
+                      pages: List[str], chapter_number: int) -> Dict:
+        """Assemble a chapter from the text of its pages"""
+        chapter_text = ''.join(text + "\n" for text in pages)
         
-        return chapters
+        return {
+            'title': title.strip(),
+            'slug': self.create_slug(title),
+            'content': self.timed_clean_text(chapter_text),
+            'page_start': page_num + 1,
+            'page_end': end_page,
+            'chapter_number': chapter_number
+        }
     
     def create_mdx_frontmatter(self, chapter: Dict) -> Dict:
         """Create frontmatter for MDX file"""
@@ -183,24 +234,10 @@ class PDFToMDXConverter:
             'pageStart': chapter['page_start'],
             'pageEnd': chapter['page_end'],
             'description': f"Chapter {chapter.get('chapter_number', 1)}: {chapter['title']}",
-            'type': 'chapter'
+            'type': 'chapter',
+            **chapter_stats(chapter)
         }
     
-    def save_mdx_file(self, chapter: Dict, chapter_dir: Path):
-        """Save chapter as MDX file"""
-        # Create frontmatter
-        metadata = self.create_mdx_frontmatter(chapter)
-        
-        # Create the post with frontmatter
-        post = frontmatter.Post(chapter['content'], **metadata)
-        
-        # Save to file
-        mdx_file = chapter_dir / 'overview.mdx'
-        with open(mdx_file, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
-        
-        print(f"✅ Saved: {mdx_file}")
-    
     def create_chapter_metadata(self, chapter: Dict, chapter_dir: Path):
         """Create additional metadata files for the chapter"""
         # Create activities.json if it doesn't exist
@@ -213,15 +250,14 @@ class PDFToMDXConverter:
                         "type": "reading",
                         "title": f"Read: {chapter['title']}",
                         "description": f"Read and understand the concepts in {chapter['title']}",
-                        "estimatedTime": 15,
+                        "estimatedTime": chapter_stats(chapter)['readingMinutes'],
                         "required": True
                     }
                 ]
             }
             
-            with open(activities_file, 'w', encoding='utf-8') as f:
-                json.dump(activities, f, indent=2)
-            print(f"✅ Created: {activities_file}")
+            self.writer.write_json(activities_file, activities)
+            self.report.log(f"✅ Created: {activities_file}")
         
         # Create quiz.json if it doesn't exist
         quiz_file = chapter_dir / 'quiz.json'
@@ -246,9 +282,8 @@ class PDFToMDXConverter:
                 ]
             }
             
-            with open(quiz_file, 'w', encoding='utf-8') as f:
-                json.dump(quiz, f, indent=2)
-            print(f"✅ Created: {quiz_file}")
+            self.writer.write_json(quiz_file, quiz)
+            self.report.log(f"✅ Created: {quiz_file}")
     
     def convert(self):
         """Main conversion process"""
@@ -257,17 +292,22 @@ class PDFToMDXConverter:
         
         # Open PDF
         self.open_pdf()
-        
-        # Extract chapters
-        chapters = self.extract_chapters()
-        print(f"📚 Found {len(chapters)} chapters")
+        if self.partial:
+            print(f"🎯 Converting only {self.describe_selection()}")
+        if self.images:
+            with self.report.span('find_images', pages=len(self.doc)):
+                self.images.start(self.doc, self.pdf_path)
         
         # Create output directory structure
         principles_dir = self.output_dir / 'principles'
         principles_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save each chapter
-        for chapter in chapters:
+        # Stream chapters and save each one as soon as it and every other
+        # chapter with its slug are complete, so no folder is written twice
+        outline = self.outline_chapter_starts()
+        chapters = []
+        for chapter in merge_same_slug(attach_figures(self.iter_chapters(outline), self.images, self.report),
+                                       self.selected_slug_counts(outline)):
             # Create chapter directory
             chapter_dir = principles_dir / chapter['slug']
             chapter_dir.mkdir(exist_ok=True)
@@ -276,17 +316,41 @@ class PDFToMDXConverter:
             self.save_mdx_file(chapter, chapter_dir)
             
             # Create metadata files
-            self.create_chapter_metadata(chapter, chapter_dir)
+            with self.report.span('create_chapter_metadata'):
+                self.create_chapter_metadata(chapter, chapter_dir)
+            
+            # Keep only the summary; the chapter text is released here
+            chapters.append({k: v for k, v in chapter.items() if k != 'content'})
+        print(f"📚 Found {len(chapters)} chapters")
+        if self.partial and not chapters:
+            print(f"❌ No chapter matches: {self.describe_selection()}")
+        
+        if self.images:
+            with self.report.span('encode_images'):
+                self.images.close()
         
         # Close PDF
         if self.doc:
             self.doc.close()
         
+        print(f"🧭 Chapter detection: {self.detection_strategy}")
+        print(f"🔎 Text extraction calls: {self.page_store.get_text_calls} for {len(self.page_store)} pages")
+        if self.cache:
+            print(f"💾 Page cache: {self.cache.hits} hits, {self.cache.misses} misses, "
+                  f"{self.cache.evictions} evictions")
+        print(self.writer.summary())
+        if self.images:
+            print(self.images.summary())
+        print(f"🧠 Peak buffered page text: {self.peak_buffered_chars:,} chars")
         print(f"✅ Conversion complete! Generated {len(chapters)} chapters.")
         return chapters
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_converter_arguments(parser)
+    args = parser.parse_args()
+    
     pdf_path = "/Users/joshshepherd/Desktop/GitHub/rethink-book/docs/Rethink 12 Principles ebook.pdf"
     output_dir = "/Users/joshshepherd/Desktop/GitHub/rethink-book/content"
     
@@ -294,8 +358,7 @@ def main():
         print(f"❌ PDF file not found: {pdf_path}")
         return
     
-    converter = PDFToMDXConverter(pdf_path, output_dir)
-    chapters = converter.convert()
+    chapters = run_converter(PDFToMDXConverter, 'pdf_to_mdx_converter', pdf_path, output_dir, args)
     
     # Print summary
     print("\n📊 Conversion Summary:")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Reading Statistics for the converted chapters
+
+Counts words, blocks by kind and headings in a chapter body, and derives
+the reading time from the word count. The formatting pipeline computes
+them from the typed blocks it already holds for each chapter, and the
+converters from the text they are about to write, so the site reads
+them from frontmatter and activities.json instead of computing them at
+render time.
+"""
+
+import math
+import re
+from typing import Any, Dict, List
+
+from mdx_blocks import BLOCKQUOTE, HEADING, LIST_ITEM, PARAGRAPH, Block, parse_blocks
+
+WORDS_PER_MINUTE = 200
+
+WORD = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+
+
+def block_stats(blocks: List[Block]) -> Dict[str, Any]:
+    """Reading statistics for a tokenized body, as frontmatter keys"""
+    counts = {HEADING: 0, PARAGRAPH: 0, BLOCKQUOTE: 0, LIST_ITEM: 0}
+    words = 0
+    for block in blocks:
+        if block.line[0] == '<':
+            # JSX such as the converters' <img> tags is not read
+            continue
+        counts[block.kind] += 1
+        words += len(WORD.findall(block.text))
+
+    minutes = math.ceil(words / WORDS_PER_MINUTE)
+    return {
+        'wordCount': words,
+        'readingMinutes': minutes,
+        'readingTime': f"{minutes} min read",
+        'blockCount': sum(counts.values()),
+        'headingCount': counts[HEADING],
+        'paragraphCount': counts[PARAGRAPH],
+        'blockquoteCount': counts[BLOCKQUOTE],
+        'listItemCount': counts[LIST_ITEM],
+    }
+
+
+def chapter_stats(chapter: Dict) -> Dict[str, Any]:
+    """Reading statistics for a converted chapter, computed once and kept
+    on the chapter for its frontmatter and activities"""
+    if 'stats' not in chapter:
+        chapter['stats'] = block_stats(parse_blocks(chapter['content']))
+    return chapter['stats']
+
+
+def set_reading_time(activities: Dict, minutes: int) -> Dict:
+    """Set the estimated time of the reading activities in activities.json data"""
+    for activity in activities.get('activities', []):
+        if 'reading' in activity.get('type', ''):
+            activity['estimatedTime'] = minutes
+    return activities
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Run Report for the content pipeline scripts
+
+Lightweight timing spans around pipeline stages. Each stage accumulates
+wall time, call count, bytes in and out, and pages and lines processed,
+and the totals can be written as a machine-readable JSON run report.
+Per-file status messages go through log(), which quiet mode silences.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Union
+
+
+class StageStats:
+    __slots__ = ('calls', 'seconds', 'bytes_in', 'bytes_out', 'pages', 'lines')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.pages = 0
+        self.lines = 0
+
+    def to_dict(self) -> Dict:
+        seconds = self.seconds or None
+        return {
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'bytesIn': self.bytes_in,
+            'bytesOut': self.bytes_out,
+            'pages': self.pages,
+            'lines': self.lines,
+            'pagesPerSecond': round(self.pages / seconds, 1) if seconds and self.pages else None,
+            'linesPerSecond': round(self.lines / seconds, 1) if seconds and self.lines else None,
+            'mbPerSecond': round(self.bytes_in / seconds / 1e6, 3) if seconds and self.bytes_in else None,
+        }
+
+
+class RunReport:
+    def __init__(self, name: str, quiet: bool = False):
+        self.name = name
+        self.quiet = quiet
+        self.started = datetime.now(timezone.utc)
+        self.start_time = time.perf_counter()
+        self.stages: Dict[str, StageStats] = {}
+
+    def log(self, message: str):
+        """Print a per-file status message unless running quietly"""
+        if not self.quiet:
+            print(message)
+
+    def stage(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def record(self, name: str, seconds: float, bytes_in: int = 0, bytes_out: int = 0,
+               pages: int = 0, lines: int = 0):
+        """Add one timed call to a stage's totals"""
+        stats = self.stage(name)
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+        stats.pages += pages
+        stats.lines += lines
+
+    @contextmanager
+    def span(self, name: str, bytes_in: int = 0, pages: int = 0, lines: int = 0) -> Iterator[StageStats]:
+        """Time a block of work; the block may add bytes_out, pages and lines
+        to the yielded counters"""
+        counters = StageStats()
+        counters.bytes_in = bytes_in
+        counters.pages = pages
+        counters.lines = lines
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.record(name, time.perf_counter() - start, counters.bytes_in,
+                        counters.bytes_out, counters.pages, counters.lines)
+
+    def timed_pages(self, name: str, pages: Iterable) -> Iterator:
+        """Wrap an iterator of (page_num, text) so producing each page is timed"""
+        iterator = iter(pages)
+        while True:
+            start = time.perf_counter()
+            try:
+                page_num, text = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - start,
+                        bytes_out=len(text.encode('utf-8')), pages=1)
+            yield page_num, text
+
+    def to_dict(self) -> Dict:
+        return {
+            'run': self.name,
+            'started': self.started.isoformat(),
+            'wallSeconds': round(time.perf_counter() - self.start_time, 6),
+            'stages': {name: stats.to_dict() for name, stats in self.stages.items()},
+        }
+
+    def write(self, path: Union[str, Path]):
+        """Write the run report as JSON"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding='utf-8')
+
+    def summary(self) -> str:
+        lines = [f"⏱️  {self.name}: {time.perf_counter() - self.start_time:.3f}s"]
+        for name, stats in self.stages.items():
+            lines.append(f"   {name:<28} {stats.seconds:8.4f}s  x{stats.calls}")
+        return '\n'.join(lines)
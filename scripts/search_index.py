@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Inverted Search Index for the converted chapters
+
+Tokenizes each chapter body into a positional inverted index with the
+term statistics BM25 needs, and writes it as one compact JSON file that
+the site loads lazily when search is first used. Queries are then a few
+dictionary lookups, with no chapter text scanned at query time.
+
+The index format (version 1):
+
+    {"version": 1, "k1": 1.2, "b": 0.75, "avgLength": 1234.5,
+     "docs": [[slug, title, length], ...],
+     "terms": {term: [doc, tf, pos, gap, gap, ..., doc, tf, pos, ...]}}
+
+Each term's postings are a flat list of (doc index, term frequency,
+positions) runs, with positions delta-encoded; the document frequency
+is the number of runs. Positions count every token, stopwords included,
+so phrase queries can check adjacency. Tokens are NFKC-normalized,
+lowercased runs of letters and digits, with soft hyphens removed.
+"""
+
+import argparse
+import json
+import math
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from frontmatter_io import load_post
+from output_writer import OutputWriter
+
+DEFAULT_SEARCH_INDEX_PATH = Path(__file__).resolve().parent.parent / 'public' / 'search-index.json'
+
+INDEX_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN = re.compile(r'[^\W_]+')
+# MDX markup that is not part of the text: JSX tags, link targets, code ticks
+MARKUP = re.compile(r'<[^>\n]*>|\]\([^)\n]*\)|`')
+
+# Too common to be worth a posting list; they still take up a position
+STOPWORDS = frozenset('''
+a an and are as at be but by for from has have he her his i in is it its of on or
+our s she so that the their them they this to was we were what which who will with
+you your
+'''.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized tokens, in order"""
+    text = unicodedata.normalize('NFKC', text.replace('\xad', '')).lower()
+    return TOKEN.findall(text)
+
+
+def index_terms(content: str) -> List[str]:
+    """Tokenize an MDX body, ignoring markup"""
+    return tokenize(MARKUP.sub(' ', content))
+
+
+class SearchIndexBuilder:
+    def __init__(self):
+        # slug -> (title, tokens)
+        self.documents: Dict[str, Tuple[str, List[str]]] = {}
+
+    def add(self, slug: str, metadata: Dict[str, Any], content: str):
+        """Index a chapter, replacing any previous version of it"""
+        self.documents[slug] = (str(metadata.get('title', slug)), index_terms(content))
+
+    def add_file(self, mdx_file: Path):
+        post = load_post(mdx_file)
+        self.add(mdx_file.parent.name, post.metadata, post.content)
+
+    def remove(self, slug: str):
+        self.documents.pop(slug, None)
+
+    def build(self) -> Dict:
+        """Build the serializable index from the current documents"""
+        docs = []
+        postings: Dict[str, List[int]] = {}
+        for doc_id, slug in enumerate(sorted(self.documents)):
+            title, tokens = self.documents[slug]
+            docs.append([slug, title, len(tokens)])
+
+            positions: Dict[str, List[int]] = {}
+            for position, token in enumerate(tokens):
+                if token not in STOPWORDS:
+                    positions.setdefault(token, []).append(position)
+            for term, term_positions in positions.items():
+                run = postings.setdefault(term, [])
+                run += [doc_id, len(term_positions)]
+                previous = 0
+                for position in term_positions:
+                    run.append(position - previous)
+                    previous = position
+
+        total = sum(length for _, _, length in docs)
+        return {
+            'version': INDEX_VERSION,
+            'k1': BM25_K1,
+            'b': BM25_B,
+            'avgLength': round(total / len(docs), 3) if docs else 0,
+            'docs': docs,
+            'terms': dict(sorted(postings.items())),
+        }
+
+    def write(self, path: Path, writer: OutputWriter) -> bool:
+        """Write the index compactly; returns True when the file changed"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self.build(), ensure_ascii=False, separators=(',', ':'))
+        return writer.write_text(path, data)
+
+
+def decode_postings(run: List[int]) -> Dict[int, List[int]]:
+    """Expand a term's postings into doc index -> positions"""
+    postings = {}
+    i = 0
+    while i < len(run):
+        doc_id, tf = run[i], run[i + 1]
+        positions = []
+        position = 0
+        for gap in run[i + 2:i + 2 + tf]:
+            position += gap
+            positions.append(position)
+        postings[doc_id] = positions
+        i += 2 + tf
+    return postings
+
+
+def search(index: Dict, query: str, limit: int = 10) -> List[Tuple[str, str, float]]:
+    """Rank chapters for a query with BM25; returns (slug, title, score).
+    The site's search uses the same scoring."""
+    docs = index['docs']
+    scores: Dict[int, float] = {}
+    for term in dict.fromkeys(tokenize(query)):
+        run = index['terms'].get(term)
+        if not run:
+            continue
+        postings = decode_postings(run)
+        idf = math.log(1 + (len(docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+        for doc_id, positions in postings.items():
+            tf = len(positions)
+            norm = 1 - index['b'] + index['b'] * docs[doc_id][2] / index['avgLength']
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (index['k1'] + 1) / (tf + index['k1'] * norm)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [(docs[doc_id][0], docs[doc_id][1], score) for doc_id, score in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('query', help='words to search for')
+    parser.add_argument('--index', default=str(DEFAULT_SEARCH_INDEX_PATH),
+                        help='index file (default: public/search-index.json)')
+    parser.add_argument('--limit', type=int, default=10, help='results to show (default: 10)')
+    args = parser.parse_args()
+
+    with open(args.index, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    results = search(index, args.query, args.limit)
+    if not results:
+        print(f"🔍 No chapters match: {args.query}")
+    for slug, title, score in results:
+        print(f"{score:8.3f}  {slug:<16} {title}")
+
+if __name__ == "__main__":
+    main()
@@ -12,63 +12,86 @@ This script focuses on fixing the most critical formatting issues:
 import os
 import re
 from pathlib import Path
-import frontmatter
+from typing import List
+
+from build_manifest import BuildManifest, module_rule_files
+from frontmatter_io import dumps_post, load_post
+from mdx_blocks import HEADING, Block, BlockBuilder, parse_blocks, render_blocks
+from output_writer import OutputWriter
+
+MALFORMED_TRIPLE_HEADER = re.compile(r'^#+\s*#+\s*#+\s*#\s*', re.MULTILINE)
+MALFORMED_HEADER = re.compile(r'^#+\s*#+\s*', re.MULTILINE)
+EXCESSIVE_BOLD = re.compile(r'\*{3,8}([^*]+)\*{3,8}')
+HEADER_MARKERS_ONLY = re.compile(r'[#\s]+')
 
 def clean_mdx_content(content: str) -> str:
     """Clean up MDX content focusing on critical issues"""
+    return render_blocks(clean_mdx_lines(parse_blocks(fix_markers(content))))
     
+def fix_markers(content: str) -> str:
+    """Fix malformed headers and excessive asterisks in bold text"""
     # Fix malformed headers
-    content = re.sub(r'^#+\s*#+\s*#+\s*#\s*', '# ', content, flags=re.MULTILINE)
-    content = re.sub(r'^#+\s*#+\s*', '# ', content, flags=re.MULTILINE)
+    content = MALFORMED_TRIPLE_HEADER.sub('# ', content)
+    content = MALFORMED_HEADER.sub('# ', content)
     
     # Fix excessive asterisks in bold text
-    content = re.sub(r'\*{3,8}([^*]+)\*{3,8}', r'**\1**', content)
+    content = EXCESSIVE_BOLD.sub(r'**\1**', content)
+    return content
     
-    lines = content.split('\n')
-    cleaned_lines = []
+def clean_mdx_blocks(blocks: List[Block]) -> List[Block]:
+    """Clean up tokenized MDX content focusing on critical issues"""
+    # A line of only header markers can pair with the next line, and bold
+    # markers can pair across lines, so those cases are fixed as joined text
+    if any('***' in block.line or
+           HEADER_MARKERS_ONLY.fullmatch(block.line)
+           for block in blocks):
+        return clean_mdx_lines(parse_blocks(fix_markers(render_blocks(blocks))))
+    
+    fixed = []
+    for block in blocks:
+        if block.kind == HEADING:
+            line = MALFORMED_HEADER.sub('# ', MALFORMED_TRIPLE_HEADER.sub('# ', block.line))
+            if line != block.line:
+                block = Block(line.strip(), block.gap)
+        fixed.append(block)
+    return clean_mdx_lines(fixed)
+        
+def clean_mdx_lines(blocks: List[Block]) -> List[Block]:
+    """Fix header lines of tokenized content"""
+    output = BlockBuilder()
     
-    for line in lines:
-        line = line.strip()
+    for block in blocks:
+        line = block.line
         
-        # Skip empty lines initially, add them back for spacing
-        if not line:
-            if cleaned_lines and cleaned_lines[-1] != '':
-                cleaned_lines.append('')
-            continue
+        # Add empty lines back for spacing
+        if block.gap:
+            output.blank()
         
         # Fix headers
         if line.startswith('## ## ##'):
             line = line.replace('## ## ## ', '').replace('## ## ', '').replace('## ', '')
             if line.startswith('# '):
-                cleaned_lines.append(line)
+                output.add(line)
             else:
-                cleaned_lines.append(f'# {line}')
-        elif line.startswith('##') and ('PRINCIPLE' in line or line.isupper()):
+                output.add(f'# {line}')
+        elif line.startswith('##') and ('PRINCIPLE' in line or block.upper):
             # Section headers
             header_text = line.replace('##', '').strip()
             if header_text.startswith('T H E') or header_text.startswith('I N C A R N'):
                 # Clean up spaced headers
                 header_text = re.sub(r'\s+', ' ', header_text)
-            cleaned_lines.append(f'## {header_text}')
-        elif line.startswith('#'):
-            cleaned_lines.append(line)
+            output.add(f'## {header_text}')
         else:
-            # Regular content
-            cleaned_lines.append(line)
+            # Other headers and regular content
+            output.add_block(block)
     
-    # Rejoin content
-    result = '\n'.join(cleaned_lines)
-    
-    # Clean up excessive spacing
-    result = re.sub(r'\n\s*\n\s*\n+', '\n\n', result)
-    
-    return result.strip()
+    return output.blocks
 
-def process_file(file_path: Path):
+def process_file(file_path: Path, writer: OutputWriter) -> bool:
     """Process a single MDX file"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+            post = load_post(f)
         
         print(f"🧹 Cleaning: {file_path.parent.name}")
         
@@ -76,13 +99,14 @@ def process_file(file_path: Path):
         post.content = clean_mdx_content(post.content)
         
         # Write back
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        writer.write_text(file_path, dumps_post(post))
         
         print(f"✅ Cleaned: {file_path.parent.name}")
+        return True
         
     except Exception as e:
         print(f"❌ Error cleaning {file_path}: {e}")
+        return False
 
 def main():
     """Main function"""
@@ -90,12 +114,21 @@ def main():
     
     print("🧹 Simple MDX cleanup...")
     
+    manifest = BuildManifest('simple_mdx_cleaner', module_rule_files(__name__))
+    writer = OutputWriter()
+    
     for principle_dir in sorted(principles_dir.iterdir()):
         if principle_dir.is_dir():
             mdx_file = principle_dir / 'overview.mdx'
             if mdx_file.exists():
-                process_file(mdx_file)
+                if manifest.is_fresh(mdx_file):
+                    continue
+                if process_file(mdx_file, writer):
+                    manifest.record(mdx_file)
     
+    manifest.save()
+    print(manifest.summary())
+    print(writer.summary())
     print("✅ Simple MDX cleanup complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Compiled Term Matcher for the MDX formatters
+
+Compiles a glossary of terms once into a single regular expression
+alternation, so one scan of a line tells which terms occur in it instead
+of one search and one freshly built pattern per term. Only the terms
+found are then substituted, each with its own precompiled pattern.
+
+Substitution keeps the semantics of the formatters' original per-term
+loops: terms are applied one after another in glossary order, each to
+the text the previous ones produced. An earlier term's markers therefore
+split a later term that contains it, so with "Christendom" listed before
+"post-Christendom", "POST-Christendom" becomes "POST-**Christendom**".
+
+Glossaries with fewer than SCAN_THRESHOLD terms skip the alternation and
+check each term as a substring of the line instead. Every glossary in the
+formatters today is that small (3 to 11 terms), so the alternation scan
+only runs for larger glossaries.
+"""
+
+import re
+from typing import Iterable, Set
+
+# Below this many terms, checking each term as a substring of the line is
+# cheaper than one scan of the alternation
+SCAN_THRESHOLD = 16
+
+
+class TermMatcher:
+    def __init__(self, terms: Iterable[str], ignore_case: bool = True, whole_words: bool = True):
+        self.terms = list(dict.fromkeys(terms))
+        self.ignore_case = ignore_case
+        self.canonical = {self.fold(term): term for term in self.terms}
+
+        flags = re.IGNORECASE if ignore_case else 0
+        boundary = r'\b' if whole_words else ''
+        self.term_patterns = [(term, re.compile(rf'{boundary}{re.escape(term)}{boundary}', flags))
+                              for term in self.terms]
+
+        # Terms occurring inside each term, such as "Christendom" in
+        # "post-Christendom", which a scan for the longest hit skips over
+        self.contained = {term: [other for other, pattern in self.term_patterns
+                                 if other != term and pattern.search(term)]
+                          for term in self.terms}
+
+        # Zero-width when terms overlap, so a hit is reported at every
+        # position, including positions inside another hit
+        alternation = '|'.join(re.escape(term) for term in sorted(self.canonical, key=len, reverse=True))
+        scan = (rf'(?={boundary}({alternation}){boundary})' if self.has_overlaps()
+                else rf'{boundary}({alternation}){boundary}')
+        # Scanning the folded text is much faster than an IGNORECASE scan;
+        # the latter is kept for text whose length changes when folded
+        self.pattern = re.compile(scan)
+        self.folding_pattern = re.compile(scan, flags)
+
+    def fold(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def has_overlaps(self) -> bool:
+        """Whether a term can start inside another term and end past it,
+        like "ab cd" and "cd ef", so that non-overlapping hits would miss it"""
+        folded = [self.fold(term) for term in self.terms]
+        return any(other.startswith(term[k:]) and len(other) > len(term) - k
+                   for term in folded for other in folded for k in range(1, len(term)))
+
+    def find_terms(self, text: str) -> Set[str]:
+        """Return every glossary term that occurs in the text, or for small
+        glossaries, every term that may occur in it"""
+        folded = self.fold(text)
+        if len(self.terms) < SCAN_THRESHOLD:
+            # May include hits without word boundaries, which the per-term
+            # patterns then leave alone
+            return {term for key, term in self.canonical.items() if key in folded}
+
+        found = set()
+        if len(folded) == len(text):
+            matches = self.pattern.finditer(folded)
+        else:
+            matches = self.folding_pattern.finditer(text)
+        for match in matches:
+            term = self.canonical[self.fold(match.group(1))]
+            if term not in found:
+                found.add(term)
+                found.update(self.contained[term])
+        return found
+
+    def emphasize(self, text: str, marker: str = '**', first_only: bool = True,
+                  canonical: bool = True, skip_marked: bool = False,
+                  fold_marked: bool = False) -> str:
+        """Wrap term hits in an emphasis marker, term by term in glossary order
+
+        first_only   wrap only the first hit of each term in the text
+        canonical    write the glossary spelling instead of the matched text
+        skip_marked  leave a term alone when the text already holds it
+                     wrapped in the marker, in its glossary spelling
+        fold_marked  look for the wrapped term in the lowercased text, as
+                     the cleaners do; terms with capitals are never skipped
+        """
+        found = self.find_terms(text)
+        if not found:
+            return text
+
+        for term, pattern in self.term_patterns:
+            if term not in found:
+                continue
+            if skip_marked and f"{marker}{term}{marker}" in (text.lower() if fold_marked else text):
+                continue
+            text = pattern.sub(lambda match: f"{marker}{term if canonical else match.group()}{marker}",
+                               text, count=1 if first_only else 0)
+        return text
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Watch Mode for the content pipeline
+
+Polls the source PDF and content/principles/*/overview.mdx and reprocesses
+only what changed. An edited overview.mdx runs through the formatting
+stages again. A changed PDF is reconverted, and only the chapters whose
+converted text differs from the previous conversion are written and
+formatted, and oversized chapters are split into lessons again. The
+formatting stages, the build manifest, the page text cache and the
+search index stay loaded between events, and a burst of events is
+debounced into a single update. An update that fails, such as a PDF read
+while it is still being saved or a chapter with broken frontmatter, is
+reported and watching goes on; the next save retries it.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from build_manifest import DEFAULT_MANIFEST_PATH, BuildManifest
+from improved_pdf_to_mdx import ImprovedPDFToMDXConverter
+from lesson_splitter import DEFAULT_LESSON_BUDGET
+from mdx_pipeline import DEFAULT_PRINCIPLES_DIR, MDXPipeline
+from page_text_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, PageTextCache
+from pdf_chapters import merge_chapter_parts
+from run_report import RunReport
+from search_index import DEFAULT_SEARCH_INDEX_PATH
+
+DEFAULT_PDF_PATH = Path(__file__).resolve().parent.parent / 'docs' / 'Rethink 12 Principles ebook.pdf'
+
+# Converter output shown while its progress messages are dropped
+DIAGNOSTIC_PREFIXES = ('❌', '⚠️')
+
+# (mtime_ns, size) of each watched file
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+class ContentWatcher:
+    def __init__(self, principles_dir: str, pdf_path: Optional[str] = None,
+                 interval: float = 0.2, debounce: float = 0.3,
+                 cache: Optional[PageTextCache] = None, manifest_path: Path = DEFAULT_MANIFEST_PATH,
+                 search_index_path: Optional[Path] = DEFAULT_SEARCH_INDEX_PATH,
+                 lesson_budget: Optional[int] = DEFAULT_LESSON_BUDGET, quiet: bool = True):
+        self.principles_dir = Path(principles_dir)
+        self.pdf_path = Path(pdf_path) if pdf_path else None
+        self.interval = interval
+        self.debounce = debounce
+        self.cache = cache
+        self.report = RunReport('watch_content', quiet=quiet)
+        self.pipeline = MDXPipeline(str(self.principles_dir), manifest_path=manifest_path, report=self.report,
+                                    search_index_path=search_index_path, lesson_budget=lesson_budget)
+        self.manifest = BuildManifest(self.pipeline.manifest_name(), self.pipeline.rule_files(), manifest_path)
+        self.chapter_hashes: Dict[str, str] = {}
+        self.snapshot: Snapshot = {}
+
+    def watched_files(self) -> Iterator[Path]:
+        if self.pdf_path:
+            yield self.pdf_path
+        yield from self.principles_dir.glob('*/overview.mdx')
+
+    def take_snapshot(self) -> Snapshot:
+        snapshot = {}
+        for path in self.watched_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def remember(self, path: Path):
+        """Record our own write to a watched file so it is not seen as an edit"""
+        stat = path.stat()
+        self.snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def wait_for_changes(self) -> Set[Path]:
+        """Poll until watched files change, then until they have been quiet
+        for the debounce interval, and return every file that changed"""
+        changed: Set[Path] = set()
+        quiet_since = 0.0
+        while True:
+            time.sleep(self.interval)
+            snapshot = self.take_snapshot()
+            new = {path for path, stamp in snapshot.items() if self.snapshot.get(path) != stamp}
+            self.snapshot = snapshot
+            if new:
+                changed |= new
+                quiet_since = time.monotonic()
+            elif changed and time.monotonic() - quiet_since >= self.debounce:
+                return changed
+
+    def convert_chapters(self, write: bool) -> List[Path]:
+        """Convert the PDF and return the overview.mdx of every chapter whose
+        converted text changed since the last conversion; with `write`,
+        those chapters are saved into the principles directory"""
+        converter = ImprovedPDFToMDXConverter(str(self.pdf_path), str(self.principles_dir.parent),
+                                              cache=self.cache, report=self.report)
+        digests = {}
+        chapters: Dict[str, List[Dict]] = {}
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                converter.open_pdf()
+                try:
+                    for chapter in converter.iter_consolidated_chapters():
+                        # Chapters sharing a slug are merged into one directory
+                        slug = chapter['slug']
+                        digests.setdefault(slug, hashlib.sha256()).update(
+                            json.dumps(chapter, sort_keys=True).encode('utf-8'))
+                        chapters.setdefault(slug, []).append(chapter)
+                finally:
+                    converter.doc.close()
+        finally:
+            for line in output.getvalue().splitlines():
+                if line.startswith(DIAGNOSTIC_PREFIXES):
+                    print(line)
+        if not digests:
+            # Most likely a PDF caught while it is being saved; keep the
+            # previous conversion to compare the next one with
+            return []
+
+        hashes = {slug: digest.hexdigest() for slug, digest in digests.items()}
+        changed = [slug for slug, digest in hashes.items() if self.chapter_hashes.get(slug) != digest]
+        self.chapter_hashes = hashes
+
+        if write:
+            for slug in changed:
+                chapter_dir = self.principles_dir / slug
+                chapter_dir.mkdir(parents=True, exist_ok=True)
+                chapter = merge_chapter_parts(chapters[slug])
+                converter.save_mdx_file(chapter, chapter_dir)
+                converter.create_chapter_metadata(chapter, chapter_dir)
+        return [self.principles_dir / slug / 'overview.mdx' for slug in changed]
+
+    def format_chapter(self, mdx_file: Path) -> bool:
+        """Run the formatting stages over one chapter; returns False when the
+        pipeline reported an error"""
+        formatted = self.pipeline.process_file(mdx_file)
+        if formatted:
+            self.manifest.record(mdx_file)
+        self.remember(mdx_file)
+        return formatted
+
+    def handle(self, changed: Set[Path]):
+        """Reprocess the chapters affected by a set of changed files"""
+        start = time.perf_counter()
+        mdx_files = {path for path in changed if path != self.pdf_path}
+
+        if self.pdf_path in changed:
+            try:
+                converted = self.convert_chapters(write=True)
+            except Exception as e:
+                print(f"❌ Error converting {self.pdf_path.name}: {type(e).__name__}: {e}")
+            else:
+                print(f"📄 PDF changed: {len(converted)} chapters reconverted")
+                mdx_files.update(converted)
+
+        for mdx_file in sorted(mdx_files):
+            if not mdx_file.exists():
+                continue
+            try:
+                formatted = self.format_chapter(mdx_file)
+            except Exception as e:
+                print(f"❌ Error formatting {mdx_file}: {type(e).__name__}: {e}")
+                formatted = False
+            if not formatted:
+                mdx_files.discard(mdx_file)
+        self.manifest.save()
+        if self.pipeline.search_index_path:
+            try:
+                self.pipeline.write_search_index()
+            except Exception as e:
+                # Indexing reads every chapter, so one broken chapter fails it
+                print(f"❌ Error updating the search index: {type(e).__name__}: {e}")
+
+        names = ', '.join(path.parent.name for path in sorted(mdx_files)) or 'no chapters'
+        print(f"⚡ Updated {names} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def watch(self):
+        """Watch until interrupted"""
+        if self.pdf_path and self.pdf_path.exists():
+            # Baseline for telling which chapters a PDF edit changed; without
+            # it, the first edit reconverts every chapter
+            try:
+                self.convert_chapters(write=False)
+            except Exception as e:
+                print(f"❌ Error converting {self.pdf_path.name}: {type(e).__name__}: {e}")
+        self.snapshot = self.take_snapshot()
+
+        sources = f"{self.principles_dir}" + (f" and {self.pdf_path.name}" if self.pdf_path else '')
+        print(f"👀 Watching {sources} (Ctrl+C to stop)")
+        try:
+            while True:
+                changed = self.wait_for_changes()
+                try:
+                    self.handle(changed)
+                except Exception as e:
+                    # Such as the search index failing to write; the next
+                    # change tries again
+                    print(f"❌ Update failed: {type(e).__name__}: {e}")
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('principles_dir', nargs='?', default=str(DEFAULT_PRINCIPLES_DIR),
+                        help='directory of principle folders (default: content/principles)')
+    parser.add_argument('--pdf', default=str(DEFAULT_PDF_PATH),
+                        help='source PDF to watch (default: docs/Rethink 12 Principles ebook.pdf)')
+    parser.add_argument('--no-pdf', action='store_true', help='only watch the MDX files')
+    parser.add_argument('--interval', type=float, default=0.2, help='seconds between polls (default: 0.2)')
+    parser.add_argument('--debounce', type=float, default=0.3,
+                        help='seconds without further changes before reprocessing (default: 0.3)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always extract page text with PyMuPDF')
+    parser.add_argument('--no-search-index', action='store_true',
+                        help='do not keep public/search-index.json up to date')
+    parser.add_argument('--no-lessons', action='store_true', help='do not split chapters into lessons')
+    parser.add_argument('--verbose', action='store_true', help='print per-file status messages')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else PageTextCache(DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES)
+    watcher = ContentWatcher(args.principles_dir, None if args.no_pdf else args.pdf,
+                             interval=args.interval, debounce=args.debounce, cache=cache,
+                             search_index_path=None if args.no_search_index else DEFAULT_SEARCH_INDEX_PATH,
+                             lesson_budget=None if args.no_lessons else DEFAULT_LESSON_BUDGET,
+                             quiet=not args.verbose)
+    watcher.watch()
+    if cache:
+        cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import crypto from 'crypto';
+import fs from 'fs';
+import path from 'path';
+
+// Written by scripts/finalize_content.py: every chapter's metadata and body
+// plus the table of contents, so pages don't parse each MDX file again
+const CONTENT_ROOT = path.join(process.cwd(), 'content', 'principles');
+const BUNDLE_FILE = path.join(process.cwd(), 'content', 'content-bundle.json');
+
+export interface BundledChapter {
+  slug: string;
+  source: string;
+  sourceSize: number;
+  sourceMtimeMs: number;
+  sourceHash: string;
+  hasOverview: boolean;
+  hasEbook: boolean;
+  metadata: {
+    title?: string;
+    [key: string]: any;
+  };
+  content: string;
+}
+
+export interface ContentBundle {
+  tableOfContents: {
+    title: string;
+    description: string;
+    chapters: {
+      slug: string;
+      title: string;
+      description: string;
+      principleNumber?: number;
+    }[];
+  };
+  chapters: BundledChapter[];
+}
+
+let cachedBundle: ContentBundle | null | undefined;
+
+// Size and mtime are checked first; a file that was only touched (a
+// checkout, a save without changes) still matches its content hash
+function isUnchanged(chapter: BundledChapter): boolean {
+  const sourcePath = path.join(CONTENT_ROOT, chapter.source);
+  if (!fs.existsSync(sourcePath)) return false;
+
+  const stat = fs.statSync(sourcePath);
+  if (
+    stat.size === chapter.sourceSize &&
+    Math.floor(stat.mtimeMs) === chapter.sourceMtimeMs
+  ) {
+    return true;
+  }
+  const hash = crypto
+    .createHash('sha256')
+    .update(fs.readFileSync(sourcePath))
+    .digest('hex');
+  return hash === chapter.sourceHash;
+}
+
+// The file each chapter is read from without a bundle: overview.mdx, or
+// ebook.mdx when there is no overview
+function chapterSources(): string[] {
+  return fs
+    .readdirSync(CONTENT_ROOT, { withFileTypes: true })
+    .filter(dirent => dirent.isDirectory())
+    .map(dirent =>
+      ['overview.mdx', 'ebook.mdx']
+        .map(name => `${dirent.name}/${name}`)
+        .find(source => fs.existsSync(path.join(CONTENT_ROOT, source)))
+    )
+    .filter((source): source is string => source !== undefined)
+    .sort();
+}
+
+// Stale when a chapter was added, removed, switched to another source file
+// or edited since the bundle was written
+function isFresh(bundle: ContentBundle): boolean {
+  const bundled = bundle.chapters.map(chapter => chapter.source).sort();
+  const sources = chapterSources();
+  return (
+    bundled.length === sources.length &&
+    bundled.every((source, i) => source === sources[i]) &&
+    bundle.chapters.every(isUnchanged)
+  );
+}
+
+/**
+ * Load the content bundle once per server process. Returns null in
+ * development, so edits to MDX files show up, and when the bundle is
+ * missing or the chapters have changed since it was written.
+ */
+export function loadContentBundle(): ContentBundle | null {
+  if (typeof window !== 'undefined') return null;
+  if (process.env.NODE_ENV === 'development') return null;
+
+  if (cachedBundle === undefined) {
+    cachedBundle = null;
+    try {
+      if (fs.existsSync(BUNDLE_FILE)) {
+        const bundle = JSON.parse(fs.readFileSync(BUNDLE_FILE, 'utf8'));
+        cachedBundle = isFresh(bundle) ? bundle : null;
+      }
+    } catch (error) {
+      console.warn(`Failed to read ${BUNDLE_FILE}:`, error);
+    }
+  }
+
+  return cachedBundle;
+}
+
+/**
+ * Get a chapter from the content bundle, or undefined when there is no
+ * usable bundle and the MDX file has to be read
+ */
+export function getBundledChapter(
+  slug: string
+): BundledChapter | null | undefined {
+  const bundle = loadContentBundle();
+  if (!bundle) return undefined;
+
+  return bundle.chapters.find(chapter => chapter.slug === slug) || null;
+}
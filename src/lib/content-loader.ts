@@ -2,6 +2,7 @@ import fs from 'fs';
 import path from 'path';
 import matter from 'gray-matter';
 import { Principle, Lesson } from '@/types/content';
+import { getBundledChapter } from '@/lib/content-bundle';
 
 // This runs only on the server side
 const isServer = typeof window === 'undefined';
@@ -26,6 +27,7 @@ export interface PrincipleMDX {
   title: string;
   summary?: string;
   order?: number;
+  readingMinutes?: number;
   content: string;
   hasOverview: boolean;
   hasEbook: boolean;
@@ -35,6 +37,7 @@ export interface LessonMDX {
   slug: string;
   title: string;
   order?: number;
+  readingMinutes?: number;
   content: string;
   principleSlug: string;
 }
@@ -62,6 +65,21 @@ export function getPrincipleSlugs(): string[] {
 export function loadPrincipleMDX(slug: string): PrincipleMDX | null {
   if (!isServer) return null;
 
+  // Prefer the pre-parsed content bundle over reading the MDX file
+  const bundled = getBundledChapter(slug);
+  if (bundled !== undefined) {
+    return (
+      bundled &&
+      toPrincipleMDX(
+        slug,
+        bundled.metadata,
+        bundled.content,
+        bundled.hasOverview,
+        bundled.hasEbook
+      )
+    );
+  }
+
   const principleDir = path.join(CONTENT_ROOT, slug);
 
   if (!fs.existsSync(principleDir)) {
@@ -83,6 +101,16 @@ export function loadPrincipleMDX(slug: string): PrincipleMDX | null {
   const fileContents = fs.readFileSync(contentPath, 'utf8');
   const { data, content } = matter(fileContents);
 
+  return toPrincipleMDX(slug, data, content, hasOverview, hasEbook);
+}
+
+function toPrincipleMDX(
+  slug: string,
+  data: { [key: string]: any },
+  content: string,
+  hasOverview: boolean,
+  hasEbook: boolean
+): PrincipleMDX {
   // Extract title from frontmatter or derive from slug
   const title = data.title || slugToTitle(slug);
   const summary = data.summary || generateSummary(content);
@@ -93,6 +121,8 @@ export function loadPrincipleMDX(slug: string): PrincipleMDX | null {
     title,
     summary,
     order,
+    // Written into the frontmatter by scripts/mdx_pipeline.py
+    readingMinutes: data.readingMinutes,
     content,
     hasOverview,
     hasEbook,
@@ -117,26 +147,53 @@ export function loadPrincipleLessons(principleSlug: string): LessonMDX[] {
   for (const file of files) {
     if (file.startsWith('lesson-') && file.endsWith('.mdx')) {
       const lessonPath = path.join(principleDir, file);
-      const fileContents = fs.readFileSync(lessonPath, 'utf8');
-      const { data, content } = matter(fileContents);
-
-      const lessonSlug = file.replace('.mdx', '');
-      const title = data.title || slugToTitle(lessonSlug);
-      const order = data.order || extractLessonNumber(file);
-
-      lessons.push({
-        slug: lessonSlug,
-        title,
-        order,
-        content,
-        principleSlug,
-      });
+      lessons.push(readLessonFile(principleSlug, lessonPath));
     }
   }
 
   return lessons.sort((a, b) => (a.order || 0) - (b.order || 0));
 }
 
+/**
+ * Load a single lesson, so a page renders one lesson of a long chapter
+ * instead of reading every lesson file
+ */
+export function loadPrincipleLesson(
+  principleSlug: string,
+  lessonSlug: string
+): LessonMDX | null {
+  if (!isServer || !/^lesson-[\w-]+$/.test(lessonSlug)) return null;
+
+  const lessonPath = path.join(
+    CONTENT_ROOT,
+    principleSlug,
+    `${lessonSlug}.mdx`
+  );
+
+  if (!fs.existsSync(lessonPath)) {
+    return null;
+  }
+
+  return readLessonFile(principleSlug, lessonPath);
+}
+
+function readLessonFile(principleSlug: string, lessonPath: string): LessonMDX {
+  const fileContents = fs.readFileSync(lessonPath, 'utf8');
+  const { data, content } = matter(fileContents);
+
+  const file = path.basename(lessonPath);
+  const lessonSlug = file.replace('.mdx', '');
+
+  return {
+    slug: lessonSlug,
+    title: data.title || slugToTitle(lessonSlug),
+    order: data.order || extractLessonNumber(file),
+    readingMinutes: data.readingMinutes,
+    content,
+    principleSlug,
+  };
+}
+
 /**
  * Get all principles with content from MDX files
  */
@@ -155,7 +212,7 @@ export function getAllPrinciples(): Principle[] {
         slug: mdx.slug,
         title: mdx.title,
         summary: mdx.summary || '',
-        estMinutes: 45, // Default estimate
+        estMinutes: mdx.readingMinutes || 45, // Default estimate
         badgeId:
           (defaultBadges as any)[mdx.slug] ||
           `badge_${slug.replace(/-/g, '_')}`,
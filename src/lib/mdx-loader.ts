@@ -8,6 +8,7 @@ import React from 'react';
 // Enhanced MDX Components
 import { Callout, Scripture, Quote } from '@/components/mdx/components';
 import { cn } from '@/lib/utils';
+import { getBundledChapter } from '@/lib/content-bundle';
 
 // Educational components defined inline to avoid module issues
 const ChapterIntro = ({
@@ -420,6 +421,14 @@ export interface PrincipleMDX {
 export async function loadPrincipleMDX(
   slug: string
 ): Promise<PrincipleMDX | null> {
+  // Prefer the pre-parsed content bundle over reading the MDX file
+  const bundled = getBundledChapter(slug);
+  if (bundled !== undefined) {
+    return (
+      bundled && compilePrincipleMDX(slug, bundled.metadata, bundled.content)
+    );
+  }
+
   const contentRoot = path.join(process.cwd(), 'content', 'principles');
   const mdxPath = path.join(contentRoot, slug, 'overview.mdx');
 
@@ -442,6 +451,14 @@ async function loadMDXFile(
   const source = fs.readFileSync(filePath, 'utf8');
   const { data, content } = matter(source);
 
+  return compilePrincipleMDX(slug, data, content);
+}
+
+async function compilePrincipleMDX(
+  slug: string,
+  data: { [key: string]: any },
+  content: string
+): Promise<PrincipleMDX> {
   const { content: compiledContent, frontmatter } = await compileMDX({
     source: content,
     options: { parseFrontmatter: true },
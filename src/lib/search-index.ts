@@ -0,0 +1,122 @@
+// Client for public/search-index.json, written by scripts/mdx_pipeline.py.
+// See scripts/search_index.py for the format; scoring matches its search().
+
+export interface SearchIndex {
+  version: number;
+  k1: number;
+  b: number;
+  avgLength: number;
+  // [slug, title, length in tokens]
+  docs: [string, string, number][];
+  // term -> runs of [doc, tf, ...delta-encoded positions]
+  terms: Record<string, number[]>;
+}
+
+export interface SearchResult {
+  slug: string;
+  title: string;
+  score: number;
+}
+
+// Runs of letters and digits, like [^\W_]+ in Python
+const TOKEN = new RegExp('[\\p{L}\\p{N}]+', 'gu');
+
+let indexPromise: Promise<SearchIndex> | null = null;
+
+/**
+ * Fetch the index on first use; later calls share the same request
+ */
+export function loadSearchIndex(): Promise<SearchIndex> {
+  if (!indexPromise) {
+    indexPromise = fetch('/search-index.json')
+      .then(response => {
+        if (!response.ok) {
+          throw new Error(`Failed to load search index: ${response.status}`);
+        }
+        return response.json();
+      })
+      .catch(error => {
+        indexPromise = null;
+        throw error;
+      });
+  }
+  return indexPromise;
+}
+
+/**
+ * Tokenize text the same way the index was built
+ */
+export function tokenize(text: string): string[] {
+  return (
+    text
+      .replace(/\u00ad/g, '')
+      .normalize('NFKC')
+      .toLowerCase()
+      .match(TOKEN) || []
+  );
+}
+
+/**
+ * Expand a term's postings into doc index -> positions
+ */
+export function decodePostings(run: number[]): Map<number, number[]> {
+  const postings = new Map<number, number[]>();
+  let i = 0;
+  while (i < run.length) {
+    const doc = run[i];
+    const tf = run[i + 1];
+    const positions: number[] = [];
+    let position = 0;
+    for (let j = i + 2; j < i + 2 + tf; j++) {
+      position += run[j];
+      positions.push(position);
+    }
+    postings.set(doc, positions);
+    i += 2 + tf;
+  }
+  return postings;
+}
+
+/**
+ * Rank chapters for a query with BM25
+ */
+export function searchIndex(
+  index: SearchIndex,
+  query: string,
+  limit = 10
+): SearchResult[] {
+  const scores = new Map<number, number>();
+
+  for (const term of new Set(tokenize(query))) {
+    const run = index.terms[term];
+    if (!run) continue;
+
+    const postings = decodePostings(run);
+    const idf = Math.log(
+      1 + (index.docs.length - postings.size + 0.5) / (postings.size + 0.5)
+    );
+    postings.forEach((positions, doc) => {
+      const tf = positions.length;
+      const norm =
+        1 - index.b + (index.b * index.docs[doc][2]) / index.avgLength;
+      const score = (idf * tf * (index.k1 + 1)) / (tf + index.k1 * norm);
+      scores.set(doc, (scores.get(doc) || 0) + score);
+    });
+  }
+
+  return Array.from(scores.entries())
+    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+    .slice(0, limit)
+    .map(([doc, score]) => ({
+      slug: index.docs[doc][0],
+      title: index.docs[doc][1],
+      score,
+    }));
+}
+
+export async function search(
+  query: string,
+  limit = 10
+): Promise<SearchResult[]> {
+  return searchIndex(await loadSearchIndex(), query, limit);
+}